@@ -0,0 +1,95 @@
+"""Benchmark the local SiteMinder filter expression compiler.
+
+Builds a synthetic set of detail-shaped objects (``{"data": {...}}``) and
+measures, per filter: cold compile time, cached (LRU) compile time and the
+time to evaluate the compiled predicate over every object.
+
+Usage::
+
+    python benchmarks/bench_filter_expr.py --objects 100000
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sm_mcp.core.filter_expr import compile_filter  # noqa: E402
+
+FILTERS = [
+    "Name contains 'login'",
+    "Name = 'realm-4242'",
+    "Desc != null",
+    "IsEnabled = true",
+    "Level > 500",
+    "ResourceFilter contains '/voonair' and ProtectAll = true",
+    "(Level >= 100 and Level < 200) or Name contains 'admin'",
+]
+
+
+def make_objects(count: int, seed: int = 7) -> list[dict]:
+    """Return ``count`` synthetic SiteMinder-like detail responses."""
+
+    rng = random.Random(seed)
+    words = ["login", "admin", "portal", "api", "legacy", "voonair", "hr", "billing"]
+    objects = []
+    for i in range(count):
+        objects.append({
+            "data": {
+                "id": f"CA.SM::Realm@06-{i:08x}",
+                "Name": f"realm-{i}" if i % 5 else f"{rng.choice(words)}-realm-{i}",
+                "Desc": "#" if i % 3 == 0 else f"{rng.choice(words)} resources",
+                "IsEnabled": rng.random() < 0.8,
+                "Level": rng.randrange(0, 1000),
+                "ProtectAll": rng.random() < 0.5,
+                "ResourceFilter": f"/{rng.choice(words)}/{i}",
+            }
+        })
+    return objects
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--objects", type=int, default=100_000)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results only.")
+    args = parser.parse_args()
+
+    objects = make_objects(args.objects)
+    results = []
+    for expr in FILTERS:
+        compile_filter.cache_clear()
+        start = time.perf_counter()
+        compile_filter(expr)
+        cold = time.perf_counter() - start
+
+        start = time.perf_counter()
+        predicate = compile_filter(expr).predicate
+        cached = time.perf_counter() - start
+
+        start = time.perf_counter()
+        matches = sum(1 for obj in objects if predicate(obj))
+        elapsed = time.perf_counter() - start
+        results.append({
+            "filter": expr,
+            "objects": len(objects),
+            "matches": matches,
+            "compile_us": round(cold * 1e6, 1),
+            "cached_compile_us": round(cached * 1e6, 2),
+            "eval_ms": round(elapsed * 1000, 2),
+            "objects_per_sec": round(len(objects) / elapsed),
+        })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'filter':<58} {'matches':>8} {'compile us':>10} {'eval ms':>9} {'obj/s':>11}")
+    for r in results:
+        print(f"{r['filter']:<58} {r['matches']:>8} {r['compile_us']:>10} {r['eval_ms']:>9} {r['objects_per_sec']:>11,}")
+
+
+if __name__ == "__main__":
+    main()
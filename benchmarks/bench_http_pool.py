@@ -0,0 +1,131 @@
+"""Compare the pooled SiteMinder HTTP client against a per-request client.
+
+Starts a small HTTPS server on localhost (using the repo's ``cert.pem`` /
+``key.pem``) and issues the same GETs through:
+
+* ``per-request``: ``create_insecure_httpx_client()`` per call, which is how
+  every SiteMinder call used to work (new SSL context + TCP/TLS handshake).
+* ``pooled``: ``get_http_client()`` from ``sm_mcp.api.http_pool``.
+
+Usage::
+
+    python benchmarks/bench_http_pool.py --requests 200 --concurrency 10
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from sm_mcp.api.http_pool import close_http_clients, get_http_client  # noqa: E402
+from sm_mcp.api.tls import create_insecure_httpx_client  # noqa: E402
+
+
+async def _object(request):
+    return JSONResponse({"responseType": "object", "data": {"id": request.path_params["obj_id"]}})
+
+
+def start_server(port: int) -> uvicorn.Server:
+    """Run a TLS Starlette app in a background thread and wait until it is up."""
+
+    app = Starlette(routes=[Route("/objects/{obj_id}", _object)])
+    server = uvicorn.Server(uvicorn.Config(
+        app,
+        host="127.0.0.1",
+        port=port,
+        ssl_certfile=str(ROOT / "cert.pem"),
+        ssl_keyfile=str(ROOT / "key.pem"),
+        log_level="warning",
+    ))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def _per_request_get(url: str) -> None:
+    async with create_insecure_httpx_client() as client:
+        resp = await client.get(url, timeout=30.0)
+        resp.raise_for_status()
+
+
+async def _pooled_get(url: str) -> None:
+    resp = await get_http_client().get(url, timeout=30.0)
+    resp.raise_for_status()
+
+
+async def run_mode(get, base_url: str, total: int, concurrency: int) -> dict:
+    """Issue ``total`` GETs with at most ``concurrency`` in flight."""
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+
+    async def one(i: int) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            await get(f"{base_url}/objects/{i}")
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 4),
+        "rps": round(total / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+    }
+
+
+async def main_async(args) -> dict:
+    base_url = f"https://127.0.0.1:{args.port}"
+    results = {
+        "per-request": await run_mode(_per_request_get, base_url, args.requests, args.concurrency),
+        "pooled": await run_mode(_pooled_get, base_url, args.requests, args.concurrency),
+    }
+    await close_http_clients()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--port", type=int, default=18443)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results only.")
+    args = parser.parse_args()
+
+    server = start_server(args.port)
+    try:
+        results = asyncio.run(main_async(args))
+    finally:
+        server.should_exit = True
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'mode':<12} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for mode, r in results.items():
+        print(f"{mode:<12} {r['rps']:>8} {r['p50_ms']:>8} {r['p95_ms']:>8}")
+    speedup = results["pooled"]["rps"] / results["per-request"]["rps"]
+    print(f"\npooled speedup: {speedup:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
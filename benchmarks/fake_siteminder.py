@@ -0,0 +1,494 @@
+"""Local SiteMinder REST stand-in generated from ``postman/swagger.json``.
+
+The class model (collection names, parent/child nesting, attribute schemas,
+required fields and link attributes) is read from the Swagger spec, and a
+deterministic synthetic policy store is generated for the classes in
+``sm_mcp/tools/sm_registry.json``.  Object details are generated on demand
+from a per-object seed, so 100k+ objects stay cheap to hold in memory.
+
+Served endpoints (under ``/ca/api/sso/services``):
+
+* ``POST login/v1/token`` (any Basic credentials) -> ``{"sessionkey": ...}``
+* ``GET  policy/v1/<Classes>[?filter=...]`` and nested collections
+  (``SmDomains/<d>/SmRealms``) -> links
+* ``GET  policy/v1/<Classes>/<name>[/...]`` and ``policy/v1/objects/<id>``
+  (``?op=expanded`` / ``?op=editinfo``) -> object
+* ``GET  policy/v1/objects/<id>/children|usedby|relatedobj|classinfo``
+* ``POST policy/v1/<collection>`` -> creates an object (required fields checked)
+
+Fault injection: base latency plus jitter, a slow tail (``--slow-rate`` of
+requests take ``--slow-ms``), a ``--error-rate`` of 503s and session keys that
+expire after ``--token-ttl`` seconds (401).  ``GET /__stats`` returns request
+and fault counters.
+
+Usage::
+
+    python benchmarks/fake_siteminder.py --objects 100000 --port 8443 --tls \\
+        --latency 20 --error-rate 0.01 --slow-rate 0.01 --slow-ms 2000 --token-ttl 900
+
+Point the server at it with ``SITE_MINDER_BASE_URL=https://127.0.0.1:8443``.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import secrets
+import sys
+import time
+import urllib.parse
+import zlib
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Optional
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from sm_mcp.core.filter_expr import FilterExpressionError, compile_filter  # noqa: E402
+
+SERVICES = "/ca/api/sso/services"
+POLICY = SERVICES + "/policy/v1"
+SPEC_PATH = ROOT / "postman" / "swagger.json"
+REGISTRY_PATH = ROOT / "sm_mcp" / "tools" / "sm_registry.json"
+
+# Share of the generated objects per class; realms and rules dominate real stores.
+CLASS_WEIGHTS = {
+    "SmDomain": 2, "SmRealm": 35, "SmRule": 35, "SmPolicy": 8, "SmResponse": 6,
+    "SmAgent": 6, "SmAgentGroup": 1, "SmAgentConfig": 2, "SmAgentType": 0.05,
+    "SmAuthScheme": 1, "SmUserDirectory": 1, "SmPasswordPolicy": 0.5, "SmTrustedHost": 2,
+}
+
+
+# --- Spec ---
+
+@dataclass
+class ClassSpec:
+    """One SiteMinder object class as described by the Swagger spec."""
+
+    name: str
+    plural: str
+    parent: Optional[str]
+    properties: dict[str, dict]
+    required: list[str]
+    code: int
+
+    def link_target(self, prop: str, classes: dict[str, "ClassSpec"]) -> Optional[str]:
+        """Return the class a ``...Link`` attribute points to, if it is in ``classes``."""
+
+        if not prop.endswith("Link") or prop.startswith("Parent"):
+            return None
+        stem = "Sm" + prop[:-4]
+        for candidate in (stem, stem[:-3] + "y" if stem.endswith("ies") else None, stem[:-1]):
+            if candidate in classes:
+                return candidate
+        return None
+
+
+def load_spec(spec_path: Path = SPEC_PATH) -> dict[str, ClassSpec]:
+    """Return every class with a collection endpoint, keyed by class name."""
+
+    spec = json.loads(spec_path.read_text(encoding="utf-8"))
+    template_class: dict[str, str] = {}
+    for path, ops in spec["paths"].items():
+        rel = path[len(POLICY):].strip("/")
+        for op in ops.values():
+            if rel and not rel.startswith("objects") and op.get("tags"):
+                template_class[rel] = op["tags"][0]
+
+    classes: dict[str, ClassSpec] = {}
+    for rel, name in sorted(template_class.items()):
+        segments = rel.split("/")
+        if segments[-1].startswith("{"):
+            continue
+        parent = template_class.get("/".join(segments[:-1])) if len(segments) > 1 else None
+        existing = classes.get(name)
+        # Nested classes have a GET-only top-level list and a POST under the parent.
+        if existing is not None and (existing.parent or not parent):
+            continue
+        definition = spec["definitions"].get(name, {})
+        classes[name] = ClassSpec(
+            name=name,
+            plural=segments[-1],
+            parent=parent,
+            properties=definition.get("properties", {}),
+            required=definition.get("required", []),
+            code=0,
+        )
+    for code, name in enumerate(sorted(classes), start=1):
+        classes[name].code = code
+    return classes
+
+
+# --- Dataset ---
+
+@dataclass
+class Record:
+    """A generated object; attributes beyond these are derived from ``seed``."""
+
+    id: str
+    cls: str
+    name: str
+    path: str
+    parent: Optional["Record"]
+    seed: int
+    desc: str
+    refs: dict[str, list[str]] = field(default_factory=dict)
+    data: Optional[dict] = None  # set for objects created through the API
+
+
+class Dataset:
+    """The synthetic policy store with id, path, class, child and used-by indexes."""
+
+    def __init__(self, classes: dict[str, ClassSpec]) -> None:
+        self.classes = classes
+        self.by_id: dict[str, Record] = {}
+        self.by_path: dict[str, Record] = {}
+        self.by_class: dict[str, list[Record]] = {}
+        self.children: dict[str, list[Record]] = {}
+        self.used_by: dict[str, list[str]] = {}
+        self._counter = 0
+
+    def add(self, cls: str, name: str, parent: Optional[Record], desc: str = "",
+            data: Optional[dict] = None) -> Record:
+        spec = self.classes[cls]
+        self._counter += 1
+        obj_id = f"CA.SM::{cls[2:]}@{spec.code:02x}-{self._counter:08x}-{zlib.crc32(name.encode()):08x}"
+        prefix = parent.path if parent else ""
+        path = f"{prefix}/{spec.plural}/{urllib.parse.quote(name, safe='')}"
+        record = Record(obj_id, cls, name, path, parent, zlib.crc32(obj_id.encode()), desc, data=data)
+        self.by_id[obj_id] = record
+        self.by_path[path] = record
+        self.by_class.setdefault(cls, []).append(record)
+        if parent:
+            self.children.setdefault(parent.id, []).append(record)
+        return record
+
+    def link(self, record: Record, prop: str, target: Record) -> None:
+        record.refs.setdefault(prop, []).append(target.id)
+        self.used_by.setdefault(target.id, []).append(record.id)
+
+
+def build_dataset(objects: int, seed: int = 42, class_names: Optional[list[str]] = None,
+                  classes: Optional[dict[str, ClassSpec]] = None) -> Dataset:
+    """Generate ``objects`` objects spread over ``class_names`` (default: the registry)."""
+
+    classes = classes or load_spec()
+    if class_names is None:
+        class_names = list(json.loads(REGISTRY_PATH.read_text(encoding="utf-8")))
+    class_names = [c for c in class_names if c in classes]
+    # Parents are generated before their children.
+    order: list[str] = []
+
+    def visit(name: str) -> None:
+        parent = classes[name].parent
+        if parent and parent not in order:
+            if parent not in class_names:
+                class_names.append(parent)
+            visit(parent)
+        if name not in order:
+            order.append(name)
+
+    for name in list(class_names):
+        visit(name)
+
+    weights = {c: CLASS_WEIGHTS.get(c, 1) for c in order}
+    total = sum(weights.values())
+    rng = random.Random(seed)
+    dataset = Dataset(classes)
+    words = ["portal", "api", "hr", "billing", "legacy", "admin", "mobile", "partner"]
+    for cls in order:
+        count = max(1, round(objects * weights[cls] / total))
+        parents = dataset.by_class.get(classes[cls].parent, []) if classes[cls].parent else [None]
+        stem = cls[2:].lower()
+        for i in range(count):
+            dataset.add(cls, f"{stem}-{i}", rng.choice(parents), desc=f"{rng.choice(words)} {stem}")
+
+    for cls in order:
+        spec = classes[cls]
+        targets = {
+            prop: dataset.by_class.get(spec.link_target(prop, classes) or "", [])
+            for prop in spec.properties
+        }
+        targets = {prop: recs for prop, recs in targets.items() if recs}
+        for record in dataset.by_class[cls]:
+            for prop, recs in targets.items():
+                if prop in spec.required or rng.random() < 0.5:
+                    dataset.link(record, prop, rng.choice(recs))
+    return dataset
+
+
+# --- Rendering ---
+
+def make_link(record: Record, base: str, href_style: str = "path") -> dict[str, Any]:
+    href = f"{base}{POLICY}{record.path}" if href_style == "path" else f"{base}{POLICY}/objects/{record.id}"
+    return {"id": record.id, "path": record.path, "href": href, "desc": record.desc}
+
+
+def attributes(dataset: Dataset, record: Record, base: str, href_style: str) -> dict[str, Any]:
+    """Return the object's attributes, generated deterministically from its seed."""
+
+    if record.data is not None:
+        return dict(record.data)
+    rng = random.Random(record.seed)
+    spec = dataset.classes[record.cls]
+    data: dict[str, Any] = {}
+    for prop, schema in spec.properties.items():
+        if prop == "Name":
+            data[prop] = record.name
+        elif prop == "Desc":
+            data[prop] = record.desc
+        elif prop in record.refs:
+            links = [make_link(dataset.by_id[t], base, href_style) for t in record.refs[prop]]
+            data[prop] = links[0] if "$ref" in schema else links
+        elif "link" in json.dumps(schema):
+            continue
+        elif "enum" in schema:
+            data[prop] = rng.choice(schema["enum"])
+        elif schema.get("type") == "boolean":
+            data[prop] = rng.random() < 0.5
+        elif schema.get("type") == "integer":
+            data[prop] = rng.randrange(0, 1000)
+        elif schema.get("type") == "array":
+            data[prop] = []
+        elif prop not in spec.required and rng.random() < 0.3:
+            data[prop] = "#"  # SiteMinder's marker for an unset value
+        else:
+            data[prop] = f"{prop.lower()}-{record.seed % 10000}"
+    return data
+
+
+def object_body(dataset: Dataset, record: Record, base: str, href_style: str) -> dict[str, Any]:
+    body = {
+        "responseType": "object",
+        "path": record.path,
+        "data": attributes(dataset, record, base, href_style),
+    }
+    if record.parent:
+        body["parent"] = make_link(record.parent, base, href_style)
+    return body
+
+
+def error(status: int, message: str) -> JSONResponse:
+    return JSONResponse(
+        {"responseType": "error", "status": status,
+         "data": {"msgId": f"SM-{status}", "code": status, "message": message}},
+        status_code=status,
+    )
+
+
+# --- Server ---
+
+@dataclass
+class FaultConfig:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    slow_rate: float = 0.0
+    slow_ms: float = 2000.0
+    error_rate: float = 0.0
+    token_ttl: float = 900.0
+
+
+def create_app(dataset: Dataset, faults: Optional[FaultConfig] = None, href_style: str = "path",
+               seed: int = 7) -> Starlette:
+    """Return the Starlette app serving ``dataset`` with ``faults`` injected."""
+
+    faults = faults or FaultConfig()
+    rng = random.Random(seed)
+    sessions: dict[str, float] = {}
+    stats: Counter = Counter()
+    # Collections are addressed by the spec's plural; the registry-driven list
+    # and search tools use the class name itself (``/policy/v1/SmAgent``).
+    plural_to_class = {spec.plural: name for name, spec in dataset.classes.items()}
+    plural_to_class.update({name: name for name in dataset.classes})
+
+    async def inject(kind: str) -> Optional[JSONResponse]:
+        stats[f"requests:{kind}"] += 1
+        delay = faults.latency_ms + (rng.random() * faults.jitter_ms if faults.jitter_ms else 0)
+        if faults.slow_rate and rng.random() < faults.slow_rate:
+            stats["faults:slow"] += 1
+            delay += faults.slow_ms
+        if delay:
+            await asyncio.sleep(delay / 1000)
+        if faults.error_rate and rng.random() < faults.error_rate:
+            stats["faults:503"] += 1
+            return error(503, "Injected server error")
+        return None
+
+    def authorized(request: Request) -> bool:
+        header = request.headers.get("authorization", "")
+        expiry = sessions.get(header[7:]) if header.startswith("Bearer ") else None
+        if expiry is None or expiry < time.monotonic():
+            stats["faults:401"] += 1
+            return False
+        return True
+
+    def base_of(request: Request) -> str:
+        return f"{request.url.scheme}://{request.url.netloc}"
+
+    async def login(request: Request) -> JSONResponse:
+        if (fault := await inject("login")) is not None:
+            return fault
+        if not request.headers.get("authorization", "").startswith("Basic "):
+            return error(401, "Missing credentials")
+        key = secrets.token_hex(16)
+        sessions[key] = time.monotonic() + faults.token_ttl
+        return JSONResponse({"sessionkey": key})
+
+    def links_response(records: list[Record], request: Request) -> JSONResponse:
+        base = base_of(request)
+        expr = request.query_params.get("filter")
+        if expr:
+            try:
+                predicate = compile_filter(expr).predicate
+            except FilterExpressionError as e:
+                return error(400, str(e))
+            records = [
+                r for r in records
+                if predicate({"data": {**attributes(dataset, r, base, href_style), "desc": r.desc}})
+            ]
+        return JSONResponse({"responseType": "links", "data": [make_link(r, base, href_style) for r in records]})
+
+    def object_view(record: Record, view: Optional[str], request: Request) -> JSONResponse:
+        base = base_of(request)
+        op = request.query_params.get("op")
+        if view == "children":
+            return JSONResponse({"responseType": "links", "data": [
+                make_link(r, base, href_style) for r in dataset.children.get(record.id, [])]})
+        if view == "usedby":
+            return JSONResponse({"responseType": "links", "data": [
+                make_link(dataset.by_id[i], base, href_style) for i in dataset.used_by.get(record.id, [])]})
+        if view == "relatedobj":
+            related = [t for ids in record.refs.values() for t in ids]
+            return JSONResponse({"responseType": "links", "data": [
+                make_link(dataset.by_id[i], base, href_style) for i in related]})
+        if view == "classinfo" or op == "editinfo":
+            spec = dataset.classes[record.cls]
+            return JSONResponse({"responseType": "classinfo", "data": {
+                "className": record.cls, "required": spec.required, "properties": spec.properties}})
+        if view is not None:
+            return error(404, f"Unknown view {view}")
+        body = object_body(dataset, record, base, href_style)
+        if op == "expanded":
+            body["children"] = [
+                object_body(dataset, child, base, href_style)
+                for child in dataset.children.get(record.id, [])
+            ]
+        return JSONResponse(body)
+
+    async def create(request: Request, collection: str, parent: Optional[Record]) -> JSONResponse:
+        cls = plural_to_class.get(collection)
+        if cls is None or dataset.classes[cls].parent != (parent.cls if parent else None):
+            return error(404, f"No collection {collection} here")
+        try:
+            payload = await request.json()
+        except ValueError:
+            return error(400, "Body must be JSON")
+        spec = dataset.classes[cls]
+        missing = [f for f in spec.required if f not in payload]
+        if missing:
+            return error(400, f"Missing required attribute(s): {', '.join(missing)}")
+        name = str(payload["Name"])
+        path = f"{parent.path if parent else ''}/{collection}/{urllib.parse.quote(name, safe='')}"
+        if path in dataset.by_path:
+            return error(409, f"{cls} {name} already exists")
+        record = dataset.add(cls, name, parent, desc=str(payload.get("Desc", "")), data=payload)
+        for prop, value in payload.items():
+            for link in value if isinstance(value, list) else [value]:
+                if isinstance(link, dict):
+                    target = dataset.by_id.get(link.get("id", "")) or dataset.by_path.get(
+                        urllib.parse.urlparse(link.get("href", "")).path[len(POLICY):])
+                    if target:
+                        dataset.link(record, prop, target)
+        stats["created"] += 1
+        response = object_body(dataset, record, base_of(request), href_style)
+        return JSONResponse(response, status_code=201)
+
+    async def policy(request: Request) -> JSONResponse:
+        rest = request.path_params["rest"].strip("/")
+        segments = rest.split("/")
+        kind = "objects" if segments[0] == "objects" else ("collection" if len(segments) % 2 else "object")
+        if (fault := await inject(f"{request.method} {kind}")) is not None:
+            return fault
+        if not authorized(request):
+            return error(401, "Session expired or invalid")
+
+        if segments[0] == "objects":
+            record = dataset.by_id.get(urllib.parse.unquote(segments[1])) if len(segments) > 1 else None
+            if record is None:
+                return error(404, "Object not found")
+            return object_view(record, segments[2] if len(segments) > 2 else None, request)
+
+        if len(segments) % 2:  # a collection: /<Classes> or /<Classes>/<name>/<Children>
+            parent = dataset.by_path.get("/" + "/".join(segments[:-1])) if len(segments) > 1 else None
+            if len(segments) > 1 and parent is None:
+                return error(404, "Parent not found")
+            if request.method == "POST":
+                return await create(request, segments[-1], parent)
+            cls = plural_to_class.get(segments[-1])
+            if cls is None:
+                return error(404, f"Unknown class {segments[-1]}")
+            if parent is None:
+                return links_response(dataset.by_class.get(cls, []), request)
+            return links_response([c for c in dataset.children.get(parent.id, []) if c.cls == cls], request)
+
+        record = dataset.by_path.get("/" + "/".join(
+            urllib.parse.quote(urllib.parse.unquote(s), safe="") for s in segments))
+        if record is None:
+            return error(404, "Object not found")
+        return object_view(record, None, request)
+
+    async def stats_endpoint(request: Request) -> JSONResponse:
+        return JSONResponse({
+            "objects": len(dataset.by_id),
+            "classes": {c: len(r) for c, r in dataset.by_class.items()},
+            "sessions": len(sessions),
+            **dict(stats),
+        })
+
+    app = Starlette(routes=[
+        Route(SERVICES + "/login/v1/token", login, methods=["POST"]),
+        Route(POLICY + "/{rest:path}", policy, methods=["GET", "POST"]),
+        Route("/__stats", stats_endpoint),
+    ])
+    app.state.dataset = dataset
+    app.state.stats = stats
+    return app
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--objects", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8443)
+    parser.add_argument("--tls", action="store_true", help="Serve HTTPS with the repo's cert.pem/key.pem.")
+    parser.add_argument("--href-style", choices=["path", "id"], default="path",
+                        help="Build link hrefs from name paths or from objects/<id>.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Base latency per request (ms).")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Uniform extra latency (ms).")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="Fraction of requests in the slow tail.")
+    parser.add_argument("--slow-ms", type=float, default=2000.0, help="Extra latency of slow-tail requests (ms).")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503.")
+    parser.add_argument("--token-ttl", type=float, default=900.0, help="Session key lifetime (s) before 401s.")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    dataset = build_dataset(args.objects, args.seed)
+    print(f"Generated {len(dataset.by_id)} objects in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    faults = FaultConfig(args.latency, args.jitter, args.slow_rate, args.slow_ms, args.error_rate, args.token_ttl)
+    ssl = {"ssl_certfile": str(ROOT / "cert.pem"), "ssl_keyfile": str(ROOT / "key.pem")} if args.tls else {}
+    uvicorn.run(create_app(dataset, faults, args.href_style, args.seed), host=args.host, port=args.port,
+                log_level="warning", **ssl)
+
+
+if __name__ == "__main__":
+    main()
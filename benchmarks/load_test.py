@@ -0,0 +1,261 @@
+"""Concurrent load test of the MCP server's tools over streamable HTTP.
+
+Starts the ASGI ``app`` from ``main.py`` in-process (uvicorn in a background
+thread) with ``MCP_AUTH_DISABLED=true``, pointed at a SiteMinder upstream: the
+local fake from ``fake_siteminder.py`` by default (with its latency and fault
+injection options), or any server given with ``--upstream``.
+For every scenario (list, search, get-by-id, link) and every client count,
+that many MCP sessions call the tool concurrently for ``--calls`` calls each.
+
+Per scenario and client count it reports throughput, p50/p95/p99 latency,
+errors and the number of SiteMinder requests the calls caused (read from the
+server's own upstream metrics).  Results are JSON so runs can be compared
+across commits.
+
+Usage::
+
+    python benchmarks/load_test.py --clients 1,10,50 --calls 20 --output results.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import uvicorn
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+POLICY = "/ca/api/sso/services/policy/v1"
+
+SCENARIOS = {
+    "list": ("list_smagent_summary", lambda ids, rng: {}),
+    "search": ("search_smagent", lambda ids, rng: {"filter_expression": f"Name contains 'agent-{rng.randrange(10)}'"}),
+    "get_by_id": ("get_object_by_id", lambda ids, rng: {"id": rng.choice(ids)}),
+    "link": ("get_children_of_object", lambda ids, rng: {"id_or_url": rng.choice(ids)}),
+}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(app, port: int) -> uvicorn.Server:
+    """Serve ``app`` on localhost from a background thread and wait until it is up."""
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def sample_ids(upstream: str, count: int, rng: random.Random) -> list[str]:
+    """Log in to ``upstream`` and sample ``count`` agent ids from its SmAgents list."""
+
+    import httpx
+
+    with httpx.Client(verify=False, timeout=60) as client:
+        resp = client.post(
+            f"{upstream}/ca/api/sso/services/login/v1/token",
+            auth=(os.environ["SITE_MINDER_USERNAME"], os.environ["SITE_MINDER_PASSWORD"]),
+        )
+        resp.raise_for_status()
+        headers = {"Authorization": f"Bearer {resp.json()['sessionkey']}"}
+        links = client.get(f"{upstream}{POLICY}/SmAgents", headers=headers).json().get("data", [])
+    agent_ids = [link["id"] for link in links if isinstance(link, dict) and link.get("id")]
+    return [rng.choice(agent_ids) for _ in range(count)] if agent_ids else []
+
+
+def percentile(samples: list[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def upstream_calls() -> int:
+    from sm_mcp.core import metrics
+
+    return int(sum(metrics.UPSTREAM_RESPONSES.values.values()))
+
+
+async def run_scenario(url: str, tool: str, make_args, ids: list[str], clients: int,
+                       calls: int, seed: int) -> dict:
+    """Run ``clients`` concurrent sessions making ``calls`` calls each to ``tool``."""
+
+    from fastmcp import Client
+    from fastmcp.client.transports import StreamableHttpTransport
+
+    latencies: list[float] = []
+    errors = 0
+    connected = 0
+    go = asyncio.Event()
+
+    async def session(n: int) -> None:
+        nonlocal errors, connected
+        rng = random.Random(seed + n)
+        async with Client(StreamableHttpTransport(url)) as client:
+            # Sessions are opened before the clock starts; only tool calls are timed.
+            connected += 1
+            if connected == clients:
+                go.set()
+            await go.wait()
+            for _ in range(calls):
+                start = time.perf_counter()
+                try:
+                    result = await client.call_tool(tool, make_args(ids, rng), raise_on_error=False)
+                    if result.is_error:
+                        errors += 1
+                except Exception:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+    async def timed() -> float:
+        await go.wait()
+        return time.perf_counter()
+
+    before = upstream_calls()
+    clock = asyncio.ensure_future(timed())
+    await asyncio.gather(*(session(n) for n in range(clients)))
+    elapsed = time.perf_counter() - await clock
+    upstream = upstream_calls() - before
+    total = len(latencies)
+    return {
+        "tool": tool,
+        "clients": clients,
+        "calls": total,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(total / elapsed, 1) if elapsed else None,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2) if latencies else None,
+        "upstream_calls": upstream,
+        "upstream_calls_per_call": round(upstream / total, 3) if total else None,
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except Exception:
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", default="1,10,50", help="Comma-separated concurrent client counts.")
+    parser.add_argument("--calls", type=int, default=20, help="Calls per client per scenario.")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Subset of: " + ", ".join(SCENARIOS))
+    parser.add_argument("--upstream", help="SiteMinder base URL to use instead of the local fake.")
+    parser.add_argument("--objects", type=int, default=10_000, help="Objects generated by the local fake.")
+    parser.add_argument("--ids", type=int, default=200, help="Distinct object ids used by get/link calls.")
+    parser.add_argument("--upstream-latency", type=float, default=5.0, help="Fake base latency (ms).")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fake 503 rate.")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="Fake slow-tail rate.")
+    parser.add_argument("--slow-ms", type=float, default=1000.0, help="Fake slow-tail latency (ms).")
+    parser.add_argument("--token-ttl", type=float, default=900.0, help="Fake session lifetime (s).")
+    parser.add_argument("--keep-cache", action="store_true", help="Do not clear the object cache between runs.")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write the JSON results to this file as well as stdout.")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    fake_port = None if args.upstream else free_port()
+    upstream = args.upstream.rstrip("/") if args.upstream else f"http://127.0.0.1:{fake_port}"
+
+    # Configure the server before main.py (and sm_mcp.core.config) is imported,
+    # and keep the project's .env from overriding it.
+    os.environ.update({
+        "SM_DOTENV": "0",
+        "MCP_AUTH_DISABLED": "true",
+        "SITE_MINDER_BASE_URL": upstream,
+        "SITE_MINDER_USERNAME": os.environ.get("SITE_MINDER_USERNAME", "loadtest"),
+        "SITE_MINDER_PASSWORD": os.environ.get("SITE_MINDER_PASSWORD", "loadtest"),
+        "SM_DETAIL_DISK_CACHE_PATH": "",
+        "LOG_LEVEL": "WARNING",
+    })
+    import main as server_main
+    from benchmarks.fake_siteminder import FaultConfig, build_dataset, create_app
+    from sm_mcp.api.siteminder_api import clear_detail_cache
+    from sm_mcp.core import config
+
+    if (config.SITE_MINDER_BASE_URL or "").rstrip("/") != upstream:
+        sys.exit(f"Refusing to run: the server is configured for {config.SITE_MINDER_BASE_URL}, not {upstream}")
+
+    if args.upstream:
+        ids = sample_ids(upstream, args.ids, rng)
+    else:
+        dataset = build_dataset(args.objects, args.seed)
+        faults = FaultConfig(
+            latency_ms=args.upstream_latency, slow_rate=args.slow_rate, slow_ms=args.slow_ms,
+            error_rate=args.error_rate, token_ttl=args.token_ttl,
+        )
+        start_server(create_app(dataset, faults, href_style="id", seed=args.seed), fake_port)
+        agents = dataset.by_class["SmAgent"]
+        ids = [rng.choice(agents).id for _ in range(args.ids)]
+
+    mcp_port = free_port()
+    start_server(server_main.app, mcp_port)
+    url = f"http://127.0.0.1:{mcp_port}/mcp"
+
+    client_counts = [int(c) for c in args.clients.split(",") if c.strip()]
+
+    results = []
+    for name in [s.strip() for s in args.scenarios.split(",") if s.strip()]:
+        tool, make_args = SCENARIOS[name]
+        for clients in client_counts:
+            if not args.keep_cache:
+                asyncio.run(clear_detail_cache())
+            result = asyncio.run(run_scenario(url, tool, make_args, ids, clients, args.calls, args.seed))
+            result["scenario"] = name
+            results.append(result)
+            print(
+                f"{name:<10} clients={clients:<4} {result['throughput_rps']:>8} rps  "
+                f"p50={result['p50_ms']}ms p95={result['p95_ms']}ms p99={result['p99_ms']}ms  "
+                f"upstream={result['upstream_calls']} errors={result['errors']}",
+                file=sys.stderr,
+            )
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "config": {
+            "clients": client_counts,
+            "calls_per_client": args.calls,
+            "upstream": args.upstream or "fake",
+            "objects": args.objects,
+            "ids": args.ids,
+            "upstream_latency_ms": args.upstream_latency,
+            "error_rate": args.error_rate,
+            "slow_rate": args.slow_rate,
+            "slow_ms": args.slow_ms,
+            "token_ttl": args.token_ttl,
+            "keep_cache": args.keep_cache,
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""Upstream logins and cache hit rate of a multi-worker deployment.
+
+For every worker count and cache mode this starts ``uvicorn main:app
+--workers N`` (stateless HTTP, auth disabled) against the local fake
+SiteMinder from ``fake_siteminder.py`` and opens ``--clients`` MCP sessions,
+which the kernel spreads over the workers.  Each session calls
+``get_object_by_id`` on ids drawn from a fixed set of ``--ids`` objects.
+
+Cache modes:
+
+- ``local``: no persistent tier; every worker logs in and caches on its own.
+- ``disk``: the persistent SQLite tier in one file, without ``SM_SHARED_CACHE``.
+- ``shared``: ``SM_SHARED_CACHE=sqlite``; workers share the token, a login
+  lock and cache invalidations as well.
+
+Per run it reports SiteMinder logins and object GETs (read from the fake's
+``/__stats``), the hit rate (``1 - GETs / calls``), throughput and latency
+percentiles, as JSON.  A short ``--token-ttl`` shows how many logins the
+workers need when sessions expire (401) during the run.
+
+Usage::
+
+    python benchmarks/multi_worker.py --workers 1,2,4 --modes local,disk,shared
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.load_test import free_port, git_commit, percentile, start_server  # noqa: E402
+
+MODES = {
+    "local": {"SM_DETAIL_DISK_CACHE_PATH": "", "SM_SHARED_CACHE": ""},
+    "disk": {"SM_SHARED_CACHE": ""},
+    "shared": {"SM_SHARED_CACHE": "sqlite"},
+}
+
+
+def upstream_stats(upstream: str) -> dict:
+    return httpx.get(f"{upstream}/__stats", timeout=10).json()
+
+
+def start_workers(workers: int, port: int, env: dict, workdir: str) -> subprocess.Popen:
+    """Start ``uvicorn main:app`` with ``workers`` processes and wait until it answers."""
+
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--app-dir", str(ROOT), "--host", "127.0.0.1",
+         "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/metrics", timeout=1).status_code == 200:
+                # The first worker is up; give the others time to finish importing.
+                time.sleep(1.0 + 0.5 * workers)
+                return proc
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError(f"uvicorn with {workers} workers did not start")
+
+
+def stop_workers(proc: subprocess.Popen) -> None:
+    proc.terminate()
+    try:
+        proc.wait(timeout=20)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+async def run_clients(url: str, ids: list[str], clients: int, calls: int, seed: int) -> dict:
+    """Run ``clients`` concurrent sessions making ``calls`` get_object_by_id calls each."""
+
+    from fastmcp import Client
+    from fastmcp.client.transports import StreamableHttpTransport
+
+    latencies: list[float] = []
+    errors = 0
+
+    async def session(n: int) -> None:
+        nonlocal errors
+        rng = random.Random(seed + n)
+        async with Client(StreamableHttpTransport(url)) as client:
+            for _ in range(calls):
+                start = time.perf_counter()
+                try:
+                    result = await client.call_tool("get_object_by_id", {"id": rng.choice(ids)},
+                                                    raise_on_error=False)
+                    errors += result.is_error
+                except Exception:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(session(n) for n in range(clients)))
+    elapsed = time.perf_counter() - start
+    return {
+        "calls": len(latencies),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated uvicorn worker counts.")
+    parser.add_argument("--modes", default=",".join(MODES), help="Subset of: " + ", ".join(MODES))
+    parser.add_argument("--clients", type=int, default=16, help="Concurrent MCP sessions per run.")
+    parser.add_argument("--calls", type=int, default=25, help="Calls per session.")
+    parser.add_argument("--ids", type=int, default=50, help="Distinct object ids requested.")
+    parser.add_argument("--objects", type=int, default=5_000, help="Objects generated by the fake.")
+    parser.add_argument("--upstream-latency", type=float, default=5.0, help="Fake base latency (ms).")
+    parser.add_argument("--token-ttl", type=float, default=900.0, help="Fake session lifetime (s).")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write the JSON results to this file as well as stdout.")
+    args = parser.parse_args()
+
+    from benchmarks.fake_siteminder import FaultConfig, build_dataset, create_app
+
+    rng = random.Random(args.seed)
+    dataset = build_dataset(args.objects, args.seed)
+    fake_port = free_port()
+    upstream = f"http://127.0.0.1:{fake_port}"
+    faults = FaultConfig(latency_ms=args.upstream_latency, token_ttl=args.token_ttl)
+    start_server(create_app(dataset, faults, href_style="id", seed=args.seed), fake_port)
+    agents = dataset.by_class["SmAgent"]
+    ids = [agent.id for agent in rng.sample(agents, min(args.ids, len(agents)))]
+
+    results = []
+    for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+        for workers in [int(w) for w in args.workers.split(",") if w.strip()]:
+            with tempfile.TemporaryDirectory() as workdir:
+                env = {
+                    **os.environ,
+                    # Workers must not read the project's .env (it could point them elsewhere).
+                    "SM_DOTENV": "0",
+                    "MCP_AUTH_DISABLED": "true",
+                    "FASTMCP_STATELESS_HTTP": "true",
+                    "SITE_MINDER_BASE_URL": upstream,
+                    "SITE_MINDER_USERNAME": "loadtest",
+                    "SITE_MINDER_PASSWORD": "loadtest",
+                    "SM_DETAIL_DISK_CACHE_PATH": os.path.join(workdir, "cache.sqlite3"),
+                    "SM_STARTUP_WARMUP": "false",
+                    "LOG_LEVEL": "WARNING",
+                    **MODES[mode],
+                }
+                port = free_port()
+                proc = start_workers(workers, port, env, workdir)
+                try:
+                    before = upstream_stats(upstream)
+                    result = asyncio.run(run_clients(f"http://127.0.0.1:{port}/mcp", ids, args.clients,
+                                                     args.calls, args.seed))
+                    after = upstream_stats(upstream)
+                finally:
+                    stop_workers(proc)
+            gets = sum(after.get(k, 0) - before.get(k, 0) for k in after if k.startswith("requests:GET"))
+            logins = after.get("requests:login", 0) - before.get("requests:login", 0)
+            if not gets and not logins:
+                sys.exit(f"The workers did not call the local fake at {upstream}; aborting.")
+            result.update({
+                "mode": mode,
+                "workers": workers,
+                "logins": logins,
+                "upstream_gets": gets,
+                "hit_rate": round(1 - gets / result["calls"], 3) if result["calls"] else None,
+            })
+            results.append(result)
+            print(
+                f"{mode:<7} workers={workers:<3} logins={logins:<3} upstream_gets={gets:<5} "
+                f"hit_rate={result['hit_rate']}  {result['throughput_rps']} rps  "
+                f"p50={result['p50_ms']}ms p95={result['p95_ms']}ms errors={result['errors']}",
+                file=sys.stderr,
+            )
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "config": {
+            "clients": args.clients,
+            "calls_per_client": args.calls,
+            "ids": len(ids),
+            "objects": args.objects,
+            "upstream_latency_ms": args.upstream_latency,
+            "token_ttl": args.token_ttl,
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
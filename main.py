@@ -1,13 +1,17 @@
+import asyncio
 import warnings
 import logging
 from pathlib import Path
 import os
-from starlette.responses import JSONResponse
+import time
+from contextlib import asynccontextmanager
+from starlette.responses import JSONResponse, PlainTextResponse
 
 # Suppress noisy deprecation warnings
 warnings.filterwarnings("ignore", category=DeprecationWarning)
 
-from sm_mcp.core.config import LOG_LEVEL, MCP_AUTH_DISABLED
+from sm_mcp.core.config import LOG_LEVEL, MCP_AUTH_DISABLED, SM_METRICS_ENABLED
+from sm_mcp.core import metrics, startup, tracing
 
 # Configure logging
 log_level = getattr(logging, LOG_LEVEL, logging.INFO)
@@ -32,11 +36,20 @@ for logger_name in ["sm_mcp", "main", "fastmcp"]:
     l = logging.getLogger(logger_name)
     l.setLevel(log_level)
 
-from sm_mcp.tools.tooling import mcp
+with startup.phase("fastmcp import"):
+    import fastmcp
+with startup.phase("tools"):
+    from sm_mcp.tools.tooling import mcp, OBJECT_CLASSES
+from sm_mcp.api.backends import BACKENDS
+from sm_mcp.api.http_pool import http_client_lifespan
+from sm_mcp.api.siteminder_api import detail_cache_lifespan, token_refresher_lifespan
+from sm_mcp.api.replica import replica_lifespan
+from sm_mcp.api.dependency_graph import graph_lifespan
 
 logging.info("--- MCP Server Starting ---")
 logging.info(f"CWD: {os.getcwd()}")
 logging.info(f"SITE_MINDER_BASE_URL: {os.getenv('SITE_MINDER_BASE_URL')}")
+logging.info(f"SiteMinder environments: {', '.join(f'{b.name}={b.base_url}' for b in BACKENDS.values())}")
 logging.info(f"MCP_AUTH_DISABLED: {MCP_AUTH_DISABLED}")
 
 if not MCP_AUTH_DISABLED:
@@ -100,14 +113,53 @@ if not MCP_AUTH_DISABLED:
 else:
     logging.info("OIDC Discovery endpoints skipped as authentication is disabled.")
 
+if SM_METRICS_ENABLED:
+    @mcp.custom_route("/metrics", methods=["GET"])
+    async def metrics_endpoint(request):
+        """Expose tool, SiteMinder HTTP and cache metrics in the Prometheus text format."""
+        # Rendered in a thread: the cache size gauge counts the SQLite tier.
+        return PlainTextResponse(
+            await asyncio.to_thread(metrics.render_metrics), media_type="text/plain; version=0.0.4; charset=utf-8"
+        )
+
 
 # Create ASGI application
-app = mcp.http_app()
+with startup.phase("app"):
+    app = mcp.http_app()
+
+# Wrap the MCP lifespan so pooled SiteMinder HTTP clients, the background token
+# refresher, the persistent detail cache and the (optional) policy replica and
+# dependency graph refreshers live as long as the app.
+_mcp_lifespan = app.router.lifespan_context
+
+@asynccontextmanager
+async def lifespan(app):
+    lifespan_started = time.perf_counter()
+    async with (
+        http_client_lifespan([backend.base_url for backend in BACKENDS.values()]),
+        token_refresher_lifespan(),
+        detail_cache_lifespan(),
+        replica_lifespan(list(OBJECT_CLASSES)),
+        graph_lifespan(list(OBJECT_CLASSES)),
+    ):
+        try:
+            async with _mcp_lifespan(app) as state:
+                startup.record("lifespan", time.perf_counter() - lifespan_started)
+                startup.mark_ready()
+                yield state
+        finally:
+            await tracing.close_tracing()
+
+app.router.lifespan_context = lifespan
 
 @app.middleware("http")
 async def log_requests(request, call_next):
     logging.debug(f"Incoming request: {request.method} {request.url.path}")
-    response = await call_next(request)
+    metrics.HTTP_IN_FLIGHT.inc()
+    try:
+        response = await call_next(request)
+    finally:
+        metrics.HTTP_IN_FLIGHT.dec()
     logging.debug(f"Response status: {response.status_code} for {request.method} {request.url.path}")
     return response
 
@@ -0,0 +1,113 @@
+"""Named SiteMinder backends (environments) served by one MCP server.
+
+The ``SITE_MINDER_*`` settings define the default backend, named
+``SM_DEFAULT_BACKEND``.  ``SM_BACKENDS=dev,staging,prod`` adds more, each
+configured with ``SM_BACKEND_<NAME>_BASE_URL``, ``_USERNAME`` and
+``_PASSWORD``.  The backend a call runs against is carried in a
+``ContextVar``: tools enter :func:`use_backend` and everything below them
+(URLs, the pooled HTTP client, the session token and the cache namespace)
+follows it, so concurrent calls against different backends do not interfere.
+"""
+
+import json
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+from ..core import config
+
+# ``environment`` values that address every backend at once.
+FAN_OUT = ("*", "all")
+
+
+@dataclass(frozen=True)
+class Backend:
+    name: str
+    base_url: str
+    username: Optional[str]
+    password: Optional[str]
+
+    @property
+    def is_default(self) -> bool:
+        return self.name == config.SM_DEFAULT_BACKEND
+
+
+def _env_name(name: str) -> str:
+    return "".join(c if c.isalnum() else "_" for c in name).upper()
+
+
+def load_backends() -> dict[str, Backend]:
+    """Return the configured backends, the default one first."""
+
+    default = config.SM_DEFAULT_BACKEND
+    backends = {
+        default: Backend(default, (config.SITE_MINDER_BASE_URL or "").rstrip("/"),
+                         config.SITE_MINDER_USERNAME, config.SITE_MINDER_PASSWORD)
+    }
+    for name in config.SM_BACKENDS:
+        prefix = f"SM_BACKEND_{_env_name(name)}_"
+        fallback = backends.get(name)
+        backends[name] = Backend(
+            name,
+            (os.getenv(prefix + "BASE_URL") or (fallback.base_url if fallback else "")).rstrip("/"),
+            os.getenv(prefix + "USERNAME") or (fallback.username if fallback else None),
+            os.getenv(prefix + "PASSWORD") or (fallback.password if fallback else None),
+        )
+    return backends
+
+
+BACKENDS = load_backends()
+
+_current: ContextVar[str] = ContextVar("sm_mcp_backend", default=config.SM_DEFAULT_BACKEND)
+
+
+def backend_names() -> list[str]:
+    return list(BACKENDS)
+
+
+def current_backend() -> Backend:
+    return BACKENDS[_current.get()]
+
+
+def resolve_backend(name: Optional[str]) -> Backend:
+    """Return the backend called ``name`` (the default one for ``None``/``""``).
+
+    Raises ``ValueError`` for unknown names (naming the configured backends)
+    and for the fan-out values, which callers must handle themselves.
+    """
+
+    if not name or not name.strip():
+        return BACKENDS[config.SM_DEFAULT_BACKEND]
+    if name.strip() in FAN_OUT:
+        raise ValueError(f"environment={name.strip()!r} (all environments) is not supported by this tool")
+    backend = BACKENDS.get(name.strip())
+    if backend is None:
+        raise ValueError(f"Unknown environment {name!r}; configured: {', '.join(BACKENDS)}")
+    return backend
+
+
+@contextmanager
+def use_backend(name: Optional[str]) -> Iterator[Backend]:
+    """Run the enclosed block (and tasks created in it) against backend ``name``."""
+
+    backend = resolve_backend(name)
+    token = _current.set(backend.name)
+    try:
+        yield backend
+    finally:
+        _current.reset(token)
+
+
+def cache_namespace() -> str:
+    """Return the cache key prefix of the current backend (empty for the default one)."""
+
+    backend = current_backend()
+    return "" if backend.is_default else f"@{backend.name}/"
+
+
+def backend_fingerprint() -> str:
+    """Return the backend names and base URLs, which cached responses depend on."""
+
+    return json.dumps({name: backend.base_url for name, backend in BACKENDS.items()}, sort_keys=True)
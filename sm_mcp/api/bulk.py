@@ -0,0 +1,299 @@
+"""Validated, concurrent bulk creation of SiteMinder objects.
+
+Every payload is checked locally before anything is sent:
+
+* against the class schema of a ``classinfo`` response, read through the
+  object cache from any existing object of the class (required attributes,
+  unknown attributes, types, enums, lengths and link shapes);
+* against the names already in the target collection, from a live (uncached)
+  class listing so objects created elsewhere are seen, and the other payloads
+  of the batch;
+* for nested classes, against the registry's container class (a realm needs a
+  domain as its parent, a top-level class takes no parent).
+
+Valid payloads are then POSTed with at most ``concurrency`` requests in
+flight and at most ``rate`` per second.  Each item's outcome is reported
+separately, so a failed item does not stop the rest of the batch.
+"""
+
+import asyncio
+import difflib
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+import httpx
+
+from ..core import config, tracing
+from ..core.json_render import is_unset
+from ..core.ratelimit import RateLimiter
+from .replica import name_from_path, parent_path
+from .siteminder_api import (
+    build_object_id_url,
+    canonical_class,
+    collection_name,
+    create_object,
+    fetch_objects,
+    get_object_details_from_href,
+)
+
+logger = logging.getLogger(__name__)
+
+_TYPES: dict[str, Any] = {
+    "string": str,
+    "boolean": bool,
+    "integer": int,
+    "number": (int, float),
+    "array": list,
+    "object": dict,
+}
+
+
+@dataclass
+class ClassSchema:
+    properties: dict[str, dict]
+    required: set[str]
+
+
+def parse_classinfo(body: Any) -> Optional[ClassSchema]:
+    """Return the attribute schema of a ``classinfo`` response, or ``None``.
+
+    Accepts properties as a name -> schema mapping or as a list of attribute
+    descriptions with a ``name`` and an optional ``required`` flag.
+    """
+
+    data = body.get("data", body) if isinstance(body, dict) else None
+    if not isinstance(data, dict):
+        return None
+    raw = data.get("properties") or data.get("Properties") or data.get("attributes")
+    required = {str(name) for name in data.get("required") or []}
+    properties: dict[str, dict] = {}
+    if isinstance(raw, dict):
+        properties = {str(name): schema if isinstance(schema, dict) else {} for name, schema in raw.items()}
+    elif isinstance(raw, list):
+        for item in raw:
+            if not isinstance(item, dict):
+                continue
+            name = item.get("name") or item.get("Name")
+            if not name:
+                continue
+            # ``Type``/``Enum``/``MaxLength`` -> ``type``/``enum``/``maxLength``
+            properties[str(name)] = {k[:1].lower() + k[1:]: v for k, v in item.items()}
+            if item.get("required") is True or item.get("Required") is True:
+                required.add(str(name))
+    return ClassSchema(properties, required) if properties else None
+
+
+def _check_value(name: str, schema: dict, value: Any) -> Optional[str]:
+    """Return why ``value`` does not fit ``schema``, or ``None``."""
+
+    if is_unset(value):
+        return None
+    if "$ref" in schema or (name.endswith("Link") and "type" not in schema):
+        if not (isinstance(value, dict) and any(isinstance(value.get(k), str) for k in ("id", "href", "path"))):
+            return f"{name} must be a link object with an id or href"
+        return None
+    kind = str(schema.get("type", "")).lower()
+    expected = _TYPES.get(kind)
+    if expected is None:
+        return None
+    if (kind in ("integer", "number") and isinstance(value, bool)) or not isinstance(value, expected):
+        return f"{name} must be of type {kind}, not {type(value).__name__}"
+    if schema.get("enum") and value not in schema["enum"]:
+        return f"{name} must be one of: {', '.join(map(str, schema['enum']))}"
+    if kind == "string" and schema.get("maxLength") and len(value) > int(schema["maxLength"]):
+        return f"{name} is longer than {schema['maxLength']} characters"
+    if kind == "array" and isinstance(schema.get("items"), dict):
+        for i, item in enumerate(value):
+            error = _check_value(f"{name}[{i}]", schema["items"], item)
+            if error:
+                return error
+    return None
+
+
+def validate_payload(schema: Optional[ClassSchema], payload: Any) -> list[str]:
+    """Return the problems of ``payload`` (empty when valid).
+
+    Without a schema only the ``Name`` attribute is checked.
+    """
+
+    if not isinstance(payload, dict):
+        return ["payload must be a JSON object"]
+    errors = []
+    name = payload.get("Name")
+    if not isinstance(name, str) or not name.strip():
+        errors.append("Name is required")
+    if schema is None:
+        return errors
+    missing = sorted(attr for attr in schema.required - {"Name"} if is_unset(payload.get(attr, "#")))
+    if missing:
+        errors.append(f"missing required attribute(s): {', '.join(missing)}")
+    for attr, value in payload.items():
+        if attr not in schema.properties:
+            close = difflib.get_close_matches(attr, list(schema.properties), n=1)
+            errors.append(f"unknown attribute {attr}" + (f" (did you mean {close[0]}?)" if close else ""))
+            continue
+        if attr != "Name" or isinstance(value, str):
+            error = _check_value(attr, schema.properties[attr], value)
+            if error:
+                errors.append(error)
+    return errors
+
+
+async def load_schema(
+    class_name: str, token: Optional[str] = None, listing: Optional[list[Any]] = None
+) -> Optional[ClassSchema]:
+    """Return the schema of ``class_name`` from the cached ``classinfo`` of one of its objects.
+
+    ``listing`` is the class listing when the caller already has it.
+    """
+
+    if listing is None:
+        listing = await fetch_objects(class_name, token)
+    for obj in listing:
+        if isinstance(obj, dict) and obj.get("id"):
+            body = await get_object_details_from_href(f"{build_object_id_url(obj['id'])}/classinfo", token)
+            return parse_classinfo(body)
+    return None
+
+
+async def resolve_parent_path(parent: str, token: Optional[str] = None) -> str:
+    """Return the path of ``parent``, given as a path, id or href."""
+
+    parent = parent.strip()
+    if parent.startswith("/"):
+        return parent.rstrip("/")
+    url = parent if parent.startswith("http") else build_object_id_url(parent)
+    detail = await get_object_details_from_href(url, token)
+    path = detail.get("path") if isinstance(detail, dict) else None
+    if not isinstance(path, str):
+        raise ValueError(f"parent {parent!r} not found")
+    return path.rstrip("/")
+
+
+def _http_error(error: BaseException) -> str:
+    if isinstance(error, httpx.HTTPStatusError):
+        try:
+            message = error.response.json().get("data", {}).get("message")
+        except Exception:
+            message = None
+        return f"HTTP {error.response.status_code}: {message or error.response.text[:200]}"
+    if isinstance(error, asyncio.TimeoutError):
+        return "timed out"
+    return str(error) or type(error).__name__
+
+
+async def bulk_create(
+    class_name: str,
+    items: list[Any],
+    parent: str = "",
+    dry_run: bool = False,
+    token: Optional[str] = None,
+    concurrency: Optional[int] = None,
+    rate: Optional[float] = None,
+    on_progress: Optional[Callable[[int, int], Awaitable[None]]] = None,
+    parent_class: str = "",
+) -> tuple[list[dict[str, Any]], dict[str, Any]]:
+    """Validate ``items`` and create the valid ones as ``class_name`` objects.
+
+    ``parent_class`` is the registry's container class of ``class_name``
+    (``SmDomain`` for realms, empty for top-level classes).  ``parent`` (path,
+    id or href) is the container for nested classes; an item's ``_parent``
+    key overrides it.  Returns ``(report,
+    summary)``: one ``{"index", "name", "status", ...}`` entry per item, with
+    status ``invalid``, ``would create`` (dry run), ``created`` or ``failed``.
+    """
+
+    start = time.perf_counter()
+    canonical = canonical_class(class_name)
+    collection = collection_name(canonical)
+    schema: Optional[ClassSchema] = None
+    notes = []
+    # A cached listing can miss objects created by someone else since it was read.
+    listing = await fetch_objects(canonical, token, use_cache=False)
+    try:
+        schema = await load_schema(canonical, token, listing)
+    except Exception as e:
+        logger.warning(f"classinfo of {canonical} unavailable: {e}")
+    if schema is None:
+        notes.append(f"classinfo of {canonical} unavailable (no existing object); only Name was checked")
+
+    existing = [obj.get("path") if isinstance(obj, dict) else str(obj) for obj in listing]
+    taken = {(parent_path(path) or "", name_from_path(path).casefold()) for path in existing if path}
+
+    parents: dict[str, str] = {}
+    seen: dict[tuple[str, str], int] = {}
+    report: list[dict[str, Any]] = []
+    pending: list[tuple[dict[str, Any], dict, str]] = []
+    for index, item in enumerate(items):
+        payload = dict(item) if isinstance(item, dict) else item
+        target = str(payload.pop("_parent", parent) or "") if isinstance(payload, dict) else parent
+        name = payload.get("Name") if isinstance(payload, dict) else None
+        entry: dict[str, Any] = {"index": index, "name": name if isinstance(name, str) else None}
+        report.append(entry)
+        errors = validate_payload(schema, payload)
+        container = ""
+        if target:
+            if target not in parents:
+                try:
+                    parents[target] = await resolve_parent_path(target, token)
+                except Exception as e:
+                    parents[target] = ""
+                    logger.warning(f"Could not resolve parent {target!r}: {e}")
+            container = parents[target]
+            if not container:
+                errors.append(f"parent {target!r} not found")
+            elif not parent_class:
+                errors.append(f"{canonical} objects are not nested; drop parent")
+            elif canonical_class(container.split("/")[-2]) != parent_class:
+                errors.append(f"parent {target!r} is not a {parent_class}")
+        elif parent_class:
+            errors.append(f"{canonical} objects live under a {parent_class}; set parent or _parent")
+        if isinstance(name, str) and name.strip():
+            key = (container, name.strip().casefold())
+            if key in taken:
+                errors.append(f"{canonical} {name!r} already exists")
+            elif key in seen:
+                errors.append(f"duplicate of item {seen[key]}")
+            else:
+                seen[key] = index
+        if errors:
+            entry.update(status="invalid", errors=errors)
+            continue
+        entry["collection"] = f"{container}/{collection}".lstrip("/")
+        if dry_run:
+            entry["status"] = "would create"
+        else:
+            pending.append((entry, payload, entry["collection"]))
+
+    semaphore = asyncio.Semaphore(max(1, concurrency or config.SM_BULK_CONCURRENCY))
+    limiter = RateLimiter(config.SM_BULK_RATE if rate is None else rate)
+    done = 0
+
+    async def create_one(entry: dict[str, Any], payload: dict, target: str) -> None:
+        nonlocal done
+        try:
+            async with semaphore:
+                await limiter.acquire()
+                response = await create_object(target, payload, token, raise_errors=True)
+            data = response.get("data") if isinstance(response, dict) else None
+            entry.update(status="created", path=(response or {}).get("path"),
+                         id=data.get("id") if isinstance(data, dict) else None)
+        except Exception as e:
+            entry.update(status="failed", error=_http_error(e))
+        finally:
+            done += 1
+            if on_progress is not None:
+                await on_progress(done, len(pending))
+
+    with tracing.span("bulk_create", cls=canonical, items=len(items), posts=len(pending)):
+        await asyncio.gather(*(create_one(*args) for args in pending))
+
+    summary: dict[str, Any] = {"class": canonical, "items": len(items), "dry_run": dry_run}
+    for entry in report:
+        summary[entry["status"]] = summary.get(entry["status"], 0) + 1
+    summary["seconds"] = round(time.perf_counter() - start, 3)
+    summary["notes"] = notes
+    logger.info(f"Bulk create {canonical}: {summary}")
+    return report, summary
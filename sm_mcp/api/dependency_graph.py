@@ -0,0 +1,385 @@
+"""In-memory dependency graph of SiteMinder policy objects for impact analysis.
+
+Nodes are objects (by id); an edge ``A -> B`` means *A depends on B*, labelled
+with the attribute holding the link (``AuthSchemeLink``, ``Rules``, ...) or
+``parent`` for containment (a realm depends on its domain, a rule on its
+realm).  Transitive *used by* queries walk edges backwards ("what breaks if
+I change this auth scheme?"), *depends on* queries walk them forwards.
+
+The graph is filled from three sources:
+
+* class listings (nodes and parent edges derived from object paths);
+* object details (outgoing links, replacing the node's previous edges);
+* ``children`` and ``usedby`` responses (incoming edges, replacing the
+  containment or reference edges those views reported before).
+
+A build drops the nodes of listed classes that are no longer listed, and
+objects invalidated as deleted are dropped at once, with all their edges.
+
+Every object response the API layer fetches is ingested as it is cached
+(:func:`add_fetch_listener`), and :meth:`DependencyGraph.build` crawls the
+details of all registry classes, skipping objects indexed less than
+``SM_GRAPH_MAX_AGE`` seconds ago.  Queries only touch memory.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Iterable, Optional
+
+from ..core import config
+from .replica import name_from_path, parent_path
+from .siteminder_api import (
+    DETAIL_CACHE,
+    add_class_invalidation_listener,
+    add_delete_listener,
+    add_fetch_listener,
+    build_object_id_url,
+    canonical_class,
+    fetch_objects,
+    get_object_details_from_href,
+    object_cache_key,
+)
+
+logger = logging.getLogger(__name__)
+
+PARENT = "parent"
+# Label for edges only known from a ``usedby`` listing, not from the detail.
+REFERENCE = "ref"
+
+
+def class_from_id(obj_id: str) -> str:
+    """Return ``SmRealm`` for ``CA.SM::Realm@06-...`` (best effort)."""
+
+    kind = obj_id.split("::", 1)[-1].split("@", 1)[0]
+    return f"Sm{kind}" if kind and not kind.startswith("Sm") else kind
+
+
+def _links(value: Any) -> Iterable[dict]:
+    """Yield the link objects (dicts with an ``id``) in an attribute value."""
+
+    if isinstance(value, dict):
+        if isinstance(value.get("id"), str):
+            yield value
+    elif isinstance(value, list):
+        for item in value:
+            yield from _links(item)
+
+
+class DependencyGraph:
+    """Adjacency maps of object dependencies, updated in place."""
+
+    def __init__(self) -> None:
+        # id -> {"class", "path", "name"}
+        self.nodes: dict[str, dict[str, Any]] = {}
+        self.by_path: dict[str, str] = {}
+        # src -> {dst: labels} (src depends on dst) and the reverse map.
+        self.out_edges: dict[str, dict[str, set[str]]] = {}
+        self.in_edges: dict[str, dict[str, set[str]]] = {}
+        # id -> time its outgoing links were last read from a detail.
+        self.indexed: dict[str, float] = {}
+        self.built_at: Optional[float] = None
+        self.build_seconds: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._build_lock = asyncio.Lock()
+
+    # --- Updates ---
+
+    def add_node(self, obj_id: str, class_name: Optional[str] = None, path: Optional[str] = None) -> None:
+        node = self.nodes.get(obj_id)
+        if node is None:
+            node = self.nodes[obj_id] = {"class": class_name or class_from_id(obj_id), "path": None, "name": obj_id}
+        elif class_name:
+            node["class"] = class_name
+        if path and node["path"] != path:
+            node["path"] = path
+            node["name"] = name_from_path(path)
+            self.by_path[path.rstrip("/")] = obj_id
+
+    def add_edge(self, src: str, dst: str, label: str) -> None:
+        if src == dst:
+            return
+        labels = self.out_edges.setdefault(src, {}).setdefault(dst, set())
+        if label == REFERENCE and labels:
+            return  # Already known with its attribute name.
+        labels.discard(REFERENCE)
+        labels.add(label)
+        self.in_edges.setdefault(dst, {})[src] = labels
+
+    def _drop_out_edges(self, src: str, keep: tuple[str, ...] = ()) -> None:
+        for dst, labels in list(self.out_edges.get(src, {}).items()):
+            labels.intersection_update(keep)
+            if not labels:
+                del self.out_edges[src][dst]
+                self.in_edges.get(dst, {}).pop(src, None)
+
+    def _drop_in_edges(self, dst: str, label: str, keep: set[str]) -> None:
+        """Remove ``label`` from the edges into ``dst`` whose source is not in ``keep``."""
+
+        for src, labels in list(self.in_edges.get(dst, {}).items()):
+            if src in keep or label not in labels:
+                continue
+            labels.discard(label)
+            if not labels:
+                del self.in_edges[dst][src]
+                self.out_edges.get(src, {}).pop(dst, None)
+
+    def remove_node(self, obj_id: str) -> None:
+        """Forget ``obj_id`` and every edge from or to it (the object was deleted)."""
+
+        node = self.nodes.pop(obj_id, None)
+        if node is not None and node["path"] and self.by_path.get(node["path"].rstrip("/")) == obj_id:
+            del self.by_path[node["path"].rstrip("/")]
+        for dst in self.out_edges.pop(obj_id, {}):
+            self.in_edges.get(dst, {}).pop(obj_id, None)
+        for src in self.in_edges.pop(obj_id, {}):
+            self.out_edges.get(src, {}).pop(obj_id, None)
+        self.indexed.pop(obj_id, None)
+
+    def prune_class(self, class_name: str, listed: set[str]) -> int:
+        """Remove the nodes of ``class_name`` missing from its full listing; return the count."""
+
+        gone = [obj_id for obj_id, node in self.nodes.items()
+                if node["class"] == class_name and obj_id not in listed]
+        for obj_id in gone:
+            self.remove_node(obj_id)
+        return len(gone)
+
+    def _add_link_node(self, link: dict) -> str:
+        path = link.get("path") if isinstance(link.get("path"), str) else None
+        self.add_node(link["id"], path=path)
+        return link["id"]
+
+    def ingest_detail(self, obj_id: str, payload: dict, class_name: Optional[str] = None) -> None:
+        """Replace the outgoing edges of ``obj_id`` with the links in its detail."""
+
+        if not isinstance(payload, dict):
+            return
+        path = payload.get("path") if isinstance(payload.get("path"), str) else None
+        self.add_node(obj_id, class_name, path)
+        self._drop_out_edges(obj_id)
+        parent = payload.get("parent")
+        if isinstance(parent, dict) and isinstance(parent.get("id"), str):
+            self.add_edge(obj_id, self._add_link_node(parent), PARENT)
+        elif path:
+            parent_id = self.by_path.get(parent_path(path) or "")
+            if parent_id:
+                self.add_edge(obj_id, parent_id, PARENT)
+        data = payload.get("data")
+        if isinstance(data, dict):
+            for attr, value in data.items():
+                for link in _links(value):
+                    self.add_edge(obj_id, self._add_link_node(link), attr)
+        self.indexed[obj_id] = time.time()
+
+    def ingest_usedby(self, obj_id: str, links: Iterable[Any]) -> None:
+        self.add_node(obj_id)
+        sources = {self._add_link_node(link) for link in _links(list(links))}
+        self._drop_in_edges(obj_id, REFERENCE, sources)
+        for src in sources:
+            self.add_edge(src, obj_id, REFERENCE)
+
+    def ingest_children(self, obj_id: str, links: Iterable[Any]) -> None:
+        self.add_node(obj_id)
+        children = {self._add_link_node(link) for link in _links(list(links))}
+        self._drop_in_edges(obj_id, PARENT, children)
+        for child in children:
+            self.add_edge(child, obj_id, PARENT)
+
+    def ingest_listing(self, class_name: str, objects: Iterable[Any]) -> list[str]:
+        """Add the objects of a class listing as nodes; returns their ids."""
+
+        ids = []
+        for obj in objects:
+            if isinstance(obj, dict) and isinstance(obj.get("id"), str):
+                self.add_node(obj["id"], class_name, obj.get("path") if isinstance(obj.get("path"), str) else None)
+                ids.append(obj["id"])
+        return ids
+
+    def link_parents(self, ids: Iterable[str]) -> None:
+        """Add parent edges derived from the paths of ``ids``."""
+
+        for obj_id in ids:
+            path = self.nodes[obj_id]["path"]
+            parent_id = self.by_path.get(parent_path(path) or "") if path else None
+            if parent_id:
+                self.add_edge(obj_id, parent_id, PARENT)
+
+    def on_fetch(self, key: str, payload: Any) -> None:
+        """Fetch listener: ingest object details and ``children``/``usedby`` views."""
+
+        obj_id, _, view = key.partition("|")
+        if not view or obj_id.startswith("class:") or not isinstance(payload, dict):
+            return
+        if view == "detail":
+            self.ingest_detail(obj_id, payload)
+        elif view == "usedby":
+            self.ingest_usedby(obj_id, payload.get("data") or [])
+        elif view == "children":
+            self.ingest_children(obj_id, payload.get("data") or [])
+
+    def mark_class_stale(self, class_name: str) -> None:
+        """Re-read the details of ``class_name`` on the next build (it was written)."""
+
+        for obj_id, node in self.nodes.items():
+            if node["class"] == class_name:
+                self.indexed.pop(obj_id, None)
+
+    # --- Building ---
+
+    async def build(self, class_names: list[str], max_age: Optional[float] = None,
+                    concurrency: Optional[int] = None) -> dict[str, Any]:
+        """Index every object of ``class_names``; details newer than ``max_age`` are reused."""
+
+        max_age = config.SM_GRAPH_MAX_AGE if max_age is None else max_age
+        concurrency = max(1, concurrency or config.SM_GRAPH_CONCURRENCY)
+        async with self._build_lock:
+            start = time.perf_counter()
+            # Details already in the memory cache cost nothing.
+            for key, entry in list(DETAIL_CACHE.items()):
+                # Other backends' entries are namespaced ``@<name>/``; the graph covers the default one.
+                if key.endswith("|detail") and not key.startswith(("class:", "@")):
+                    obj_id = key.split("|", 1)[0]
+                    if self.indexed.get(obj_id, 0) < entry.stored_at:
+                        self.ingest_detail(obj_id, entry.value)
+
+            listings = await asyncio.gather(*(fetch_objects(name) for name in class_names), return_exceptions=True)
+            errors = []
+            listed: list[tuple[str, str]] = []
+            pruned = 0
+            for class_name, objects in zip(class_names, listings):
+                if isinstance(objects, BaseException):
+                    errors.append(f"{class_name}: {objects}")
+                    continue
+                ids = self.ingest_listing(class_name, objects or [])
+                # fetch_objects returns [] on upstream errors too: only prune on a non-empty listing.
+                if ids:
+                    pruned += self.prune_class(class_name, set(ids))
+                listed.extend((obj_id, class_name) for obj_id in ids)
+            self.link_parents(obj_id for obj_id, _ in listed)
+
+            cutoff = time.time() - max_age
+            pending = [(obj_id, cls) for obj_id, cls in listed if self.indexed.get(obj_id, 0) < cutoff]
+            semaphore = asyncio.Semaphore(concurrency)
+            failed = 0
+
+            async def index_one(obj_id: str, class_name: str) -> None:
+                nonlocal failed
+                async with semaphore:
+                    detail = await get_object_details_from_href(build_object_id_url(obj_id))
+                if detail:
+                    self.ingest_detail(obj_id, detail, class_name)
+                else:
+                    failed += 1
+
+            await asyncio.gather(*(index_one(obj_id, cls) for obj_id, cls in pending))
+            if failed:
+                errors.append(f"{failed} details could not be fetched")
+            self.built_at = time.time()
+            self.build_seconds = time.perf_counter() - start
+            self.last_error = "; ".join(errors) or None
+            logger.info(
+                f"Dependency graph built: {len(self.nodes)} nodes, {self.edge_count()} edges, "
+                f"{len(pending)} details fetched, {pruned} deleted objects dropped in {self.build_seconds:.2f}s"
+            )
+            return {**self.status(), "details_fetched": len(pending), "nodes_pruned": pruned}
+
+    # --- Queries ---
+
+    def resolve(self, id_or_url: str) -> str:
+        """Return the node id for an object id, href or path."""
+
+        if id_or_url.startswith("http"):
+            key = object_cache_key(id_or_url)
+            if "|" in key:
+                return key.split("|", 1)[0]
+            id_or_url = "/" + id_or_url.split("/policy/v1/", 1)[-1].split("?", 1)[0]
+        if id_or_url.startswith("/"):
+            return self.by_path.get(id_or_url.rstrip("/"), id_or_url)
+        return id_or_url
+
+    def traverse(self, obj_id: str, direction: str = "usedby", max_depth: int = 3,
+                 limit: int = 200) -> tuple[list[tuple[str, list[tuple[str, str]]]], bool]:
+        """Breadth-first walk from ``obj_id``.
+
+        Returns ``([(node id, path)], truncated)`` in order of distance, where
+        ``path`` is the list of ``(edge label, node id)`` hops from ``obj_id``.
+        """
+
+        edges = self.in_edges if direction == "usedby" else self.out_edges
+        paths: dict[str, list[tuple[str, str]]] = {obj_id: []}
+        queue = deque([obj_id])
+        found: list[tuple[str, list[tuple[str, str]]]] = []
+        while queue:
+            current = queue.popleft()
+            path = paths[current]
+            if len(path) >= max_depth:
+                continue
+            for neighbour, labels in sorted(edges.get(current, {}).items()):
+                if neighbour in paths:
+                    continue
+                paths[neighbour] = path + [(",".join(sorted(labels)), neighbour)]
+                found.append((neighbour, paths[neighbour]))
+                if len(found) >= limit:
+                    return found, True
+                queue.append(neighbour)
+        return found, False
+
+    def describe(self, obj_id: str) -> str:
+        node = self.nodes.get(obj_id)
+        if node is None:
+            return obj_id
+        return f"{node['class']} '{node['name']}' ({obj_id})"
+
+    def edge_count(self) -> int:
+        return sum(len(targets) for targets in self.out_edges.values())
+
+    def status(self) -> dict[str, Any]:
+        classes: dict[str, int] = {}
+        for node in self.nodes.values():
+            classes[node["class"]] = classes.get(node["class"], 0) + 1
+        return {
+            "nodes": len(self.nodes),
+            "edges": self.edge_count(),
+            "indexed_details": len(self.indexed),
+            "built_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.built_at)) if self.built_at else None,
+            "build_seconds": round(self.build_seconds, 3) if self.build_seconds is not None else None,
+            "classes": dict(sorted(classes.items())),
+            "last_error": self.last_error,
+        }
+
+
+GRAPH = DependencyGraph()
+add_fetch_listener(GRAPH.on_fetch)
+add_delete_listener(GRAPH.remove_node)
+add_class_invalidation_listener(lambda name: GRAPH.mark_class_stale(canonical_class(name)))
+
+async def run_graph_builder(class_names: list[str]) -> None:
+    """Rebuild the graph every ``SM_GRAPH_REFRESH_SECONDS`` seconds."""
+
+    while True:
+        try:
+            await GRAPH.build(class_names)
+        except Exception as e:
+            GRAPH.last_error = str(e)
+            logger.exception("Dependency graph build failed")
+        await asyncio.sleep(config.SM_GRAPH_REFRESH_SECONDS)
+
+@asynccontextmanager
+async def graph_lifespan(class_names: list[str]) -> AsyncIterator[None]:
+    """Keep the graph rebuilt in the background when ``SM_GRAPH_REFRESH_SECONDS`` > 0."""
+
+    if config.SM_GRAPH_REFRESH_SECONDS <= 0:
+        yield
+        return
+    task = asyncio.create_task(run_graph_builder(class_names))
+    try:
+        yield
+    finally:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
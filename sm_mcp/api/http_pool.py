@@ -0,0 +1,99 @@
+"""Long-lived, connection-pooled HTTPX clients for SiteMinder backends.
+
+Every SiteMinder call used to build a fresh ``AsyncClient`` (new SSL context,
+new TCP + TLS handshake).  This module keeps one keep-alive client per backend
+base URL instead.  Clients are opened and closed with the ASGI app lifespan
+(see ``main.py``) and are created lazily when no lifespan is running, e.g. in
+scripts or ``dev.py``.
+"""
+
+import asyncio
+import importlib.util
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+import httpx
+
+from ..core import config
+from .tls import get_ssl_context
+
+logger = logging.getLogger(__name__)
+
+# Pooled clients keyed by backend base URL, along with the event loop that
+# owns their connections.
+_CLIENTS: dict[str, tuple[asyncio.AbstractEventLoop, httpx.AsyncClient]] = {}
+
+def http2_enabled() -> bool:
+    """Return ``True`` when HTTP/2 is requested and the ``h2`` package exists."""
+
+    if not config.SM_HTTP2:
+        return False
+    if importlib.util.find_spec("h2") is None:
+        logger.warning("SM_HTTP2 is set but 'h2' is not installed; falling back to HTTP/1.1.")
+        return False
+    return True
+
+def build_pool_limits() -> httpx.Limits:
+    """Return connection pool limits from configuration."""
+
+    return httpx.Limits(
+        max_connections=config.SM_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=config.SM_HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=config.SM_HTTP_KEEPALIVE_EXPIRY,
+    )
+
+def create_pooled_httpx_client() -> httpx.AsyncClient:
+    """Return a keep-alive ``AsyncClient`` sharing the cached SSL context."""
+
+    transport = httpx.AsyncHTTPTransport(
+        verify=get_ssl_context(),
+        http2=http2_enabled(),
+        limits=build_pool_limits(),
+    )
+    return httpx.AsyncClient(transport=transport)
+
+def _backend_key(backend: Optional[str]) -> str:
+    return (backend or config.SITE_MINDER_BASE_URL or "").rstrip("/")
+
+def get_http_client(backend: Optional[str] = None) -> httpx.AsyncClient:
+    """Return the pooled client for ``backend`` (defaults to the configured base URL).
+
+    A client is bound to the event loop it was first used on; if called from a
+    different loop (e.g. successive ``asyncio.run`` calls) a new one is created.
+    """
+
+    key = _backend_key(backend)
+    loop = asyncio.get_running_loop()
+    entry = _CLIENTS.get(key)
+    if entry is not None:
+        owner, client = entry
+        if owner is loop and not client.is_closed:
+            return client
+        logger.debug(f"Discarding pooled HTTP client for {key!r} bound to another event loop")
+
+    client = create_pooled_httpx_client()
+    _CLIENTS[key] = (loop, client)
+    logger.debug(f"Opened pooled HTTP client for {key!r} (http2={http2_enabled()})")
+    return client
+
+async def close_http_clients() -> None:
+    """Close every pooled client owned by the running event loop."""
+
+    loop = asyncio.get_running_loop()
+    for key, (owner, client) in list(_CLIENTS.items()):
+        if owner is loop:
+            await client.aclose()
+        del _CLIENTS[key]
+    logger.debug("Closed pooled HTTP clients")
+
+@asynccontextmanager
+async def http_client_lifespan(backends: Optional[list[str]] = None) -> AsyncIterator[None]:
+    """Open pooled clients for ``backends`` on entry and close them on exit."""
+
+    for backend in backends or [None]:
+        get_http_client(backend)
+    try:
+        yield
+    finally:
+        await close_http_clients()
@@ -0,0 +1,234 @@
+"""Optional indexed in-memory replica of the SiteMinder policy store.
+
+When ``SM_REPLICA_ENABLED`` is set, the object links of every registry class
+are loaded through :func:`fetch_objects` and indexed by id, class, name and
+parent path.  A background task reloads them every
+``SM_REPLICA_REFRESH_SECONDS`` so ``list_<type>_summary`` and
+``search_<type>`` can be answered locally.  Data older than
+``SM_REPLICA_MAX_STALENESS`` seconds is not served, nor is a class written
+through this server since the last refresh.
+"""
+
+import asyncio
+import logging
+import time
+import urllib.parse
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Optional
+
+from ..core import config
+from ..core.filter_expr import compile_filter
+from .siteminder_api import add_class_invalidation_listener, fetch_objects
+
+logger = logging.getLogger(__name__)
+
+# Attributes present in link data, i.e. filters the replica can answer locally.
+LINK_ATTRIBUTES = frozenset({"name", "desc"})
+
+def name_from_path(path: str) -> str:
+    """Return the display name encoded in the last segment of ``path``."""
+
+    return urllib.parse.unquote(path).split("/")[-1].replace("+", " ")
+
+def parent_path(path: str) -> Optional[str]:
+    """Return the path of the parent object (``/SmDomains/D/SmRealms/R`` -> ``/SmDomains/D``)."""
+
+    parts = path.rstrip("/").split("/")
+    if len(parts) <= 3:
+        return None
+    return "/".join(parts[:-2])
+
+def body_key(body: dict) -> Optional[str]:
+    """Return the id or path identifying an object body (e.g. an expanded child)."""
+
+    data = body.get("data")
+    for value in (body.get("id"), data.get("id") if isinstance(data, dict) else None, body.get("path")):
+        if isinstance(value, str):
+            return value
+    return None
+
+class PolicyReplica:
+    """Indexes of SiteMinder object links, swapped atomically on each refresh."""
+
+    def __init__(self) -> None:
+        self.by_id: dict[str, dict] = {}
+        self.by_class: dict[str, list[dict]] = {}
+        self.by_name: dict[str, list[dict]] = {}
+        self.by_parent: dict[str, list[dict]] = {}
+        self.loaded_at: Optional[float] = None
+        self.load_seconds: Optional[float] = None
+        self.last_error: Optional[str] = None
+        # Classes written since the last refresh, with the sequence number of
+        # their latest write; served live until reloaded.
+        self.dirty: dict[str, int] = {}
+        self._writes = 0
+        self._refresh_lock = asyncio.Lock()
+
+    @property
+    def age(self) -> Optional[float]:
+        """Seconds since the last successful refresh, or ``None`` if never loaded."""
+
+        return time.time() - self.loaded_at if self.loaded_at is not None else None
+
+    def is_fresh(self, class_name: Optional[str] = None) -> bool:
+        """Return ``True`` when enabled, loaded and within ``SM_REPLICA_MAX_STALENESS``.
+
+        With ``class_name``, also require that the class has not been written
+        since the last refresh.
+        """
+
+        age = self.age
+        if class_name is not None and class_name in self.dirty:
+            return False
+        return config.SM_REPLICA_ENABLED and age is not None and age <= config.SM_REPLICA_MAX_STALENESS
+
+    def mark_dirty(self, class_name: str) -> None:
+        """Stop serving ``class_name`` locally until the next refresh."""
+
+        self._writes += 1
+        self.dirty[class_name] = self._writes
+
+    async def refresh(self, class_names: list[str]) -> None:
+        """Reload every class and rebuild the indexes."""
+
+        async with self._refresh_lock:
+            start = time.perf_counter()
+            # Only writes seen before the fetches started are covered by them.
+            reloading = dict(self.dirty)
+            results = await asyncio.gather(
+                *(fetch_objects(name, use_cache=False) for name in class_names),
+                return_exceptions=True,
+            )
+            by_id: dict[str, dict] = {}
+            by_class: dict[str, list[dict]] = {}
+            by_name: dict[str, list[dict]] = {}
+            by_parent: dict[str, list[dict]] = {}
+            errors = []
+            for class_name, objects in zip(class_names, results):
+                if isinstance(objects, BaseException) or (not objects and self.by_class.get(class_name)):
+                    # fetch_objects returns [] on upstream errors too, so keep the
+                    # previous snapshot of a class rather than emptying it.
+                    errors.append(f"{class_name}: {objects or 'empty response'}")
+                    objects = self.by_class.get(class_name, [])
+                    reloading.pop(class_name, None)
+                records = by_class.setdefault(class_name, [])
+                for obj in objects:
+                    record = self._make_record(class_name, obj)
+                    records.append(record)
+                    if record.get("id"):
+                        by_id[record["id"]] = record
+                    by_name.setdefault(record["name"].lower(), []).append(record)
+                    parent = parent_path(record.get("path") or "")
+                    if parent:
+                        by_parent.setdefault(parent, []).append(record)
+
+            self.by_id, self.by_class, self.by_name, self.by_parent = by_id, by_class, by_name, by_parent
+            for class_name, write in reloading.items():
+                # A write during the refresh has a newer number and keeps the class dirty.
+                if self.dirty.get(class_name) == write:
+                    del self.dirty[class_name]
+            self.loaded_at = time.time()
+            self.load_seconds = time.perf_counter() - start
+            self.last_error = "; ".join(errors) or None
+            logger.info(
+                f"Replica refreshed: {len(by_id)} objects across {len(class_names)} classes "
+                f"in {self.load_seconds:.2f}s"
+            )
+
+    @staticmethod
+    def _make_record(class_name: str, obj: Any) -> dict:
+        """Return a normalized link record for ``obj`` (SiteMinder 12.9 may return strings)."""
+
+        if not isinstance(obj, dict):
+            obj = {"path": str(obj)}
+        record = dict(obj)
+        record["class"] = class_name
+        record["name"] = name_from_path(record["path"]) if record.get("path") else record.get("name", "")
+        return record
+
+    def list_objects(self, class_name: str) -> list[dict]:
+        """Return every record of ``class_name``."""
+
+        return self.by_class.get(class_name, [])
+
+    def search(self, class_name: str, filter_expr: str) -> Optional[list[dict]]:
+        """Return matching records, or ``None`` when the filter needs a live query."""
+
+        if not filter_expr.strip():
+            return list(self.by_class.get(class_name, []))
+        compiled = compile_filter(filter_expr)
+        if any(attr.lower() not in LINK_ATTRIBUTES for attr in compiled.attributes):
+            return None
+        if compiled.equality and compiled.equality[0].lower() == "name":
+            # Exact name lookups go through the name index.
+            candidates = self.by_name.get(compiled.equality[1], [])
+            return [rec for rec in candidates if rec["class"] == class_name]
+        predicate = compiled.predicate
+        return [rec for rec in self.by_class.get(class_name, []) if predicate(rec)]
+
+    def get(self, obj_id: str) -> Optional[dict]:
+        """Return the record for ``obj_id``."""
+
+        return self.by_id.get(obj_id)
+
+    def children(self, path: str) -> list[dict]:
+        """Return the records whose parent path is ``path``."""
+
+        return self.by_parent.get(path.rstrip("/"), [])
+
+    def staleness_note(self) -> str:
+        """Return a one-line indicator telling the caller how old the data is."""
+
+        return (
+            f"(Served from local replica, {self.age:.0f}s old; "
+            "pass live=true to query SiteMinder directly.)"
+        )
+
+    def status(self) -> dict[str, Any]:
+        """Return replica size and freshness information."""
+
+        age = self.age
+        return {
+            "enabled": config.SM_REPLICA_ENABLED,
+            "fresh": self.is_fresh(),
+            "age_seconds": round(age, 1) if age is not None else None,
+            "load_seconds": round(self.load_seconds, 3) if self.load_seconds is not None else None,
+            "objects": len(self.by_id),
+            "dirty_classes": sorted(self.dirty),
+            "classes": {name: len(records) for name, records in self.by_class.items()},
+            "refresh_interval": config.SM_REPLICA_REFRESH_SECONDS,
+            "max_staleness": config.SM_REPLICA_MAX_STALENESS,
+            "last_error": self.last_error,
+        }
+
+
+REPLICA = PolicyReplica()
+add_class_invalidation_listener(REPLICA.mark_dirty)
+
+async def run_replica_refresher(class_names: list[str]) -> None:
+    """Reload the replica every ``SM_REPLICA_REFRESH_SECONDS`` seconds."""
+
+    while True:
+        try:
+            await REPLICA.refresh(class_names)
+        except Exception as e:
+            REPLICA.last_error = str(e)
+            logger.exception("Replica refresh failed")
+        await asyncio.sleep(config.SM_REPLICA_REFRESH_SECONDS)
+
+@asynccontextmanager
+async def replica_lifespan(class_names: list[str]) -> AsyncIterator[None]:
+    """Keep the replica refreshed for the duration of the context, if enabled."""
+
+    if not config.SM_REPLICA_ENABLED:
+        yield
+        return
+    task = asyncio.create_task(run_replica_refresher(class_names))
+    try:
+        yield
+    finally:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
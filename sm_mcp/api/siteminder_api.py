@@ -1,32 +1,140 @@
+import asyncio
 import logging
 import os
-from typing import Any, Optional
-from urllib.parse import urlparse, urlunparse
+import re
+import socket
+import sqlite3
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Iterable, Optional
+from urllib.parse import parse_qs, unquote, urlparse, urlunparse
 
 import httpx
-from cachetools import TTLCache
 
 from ..core import config
-from .tls import create_insecure_httpx_client
-from ..core.cache_util import TimedCache
+from .backends import backend_fingerprint, backend_names, cache_namespace, current_backend, use_backend
+from .http_pool import get_http_client
+from ..core.cache_util import CountingTTLCache, TimedCache
+from ..core import metrics, tracing
+from ..core.disk_cache import CacheEntry, PersistentCache, SharedCache
+from ..core.singleflight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
-# Cache of object details keyed by URL.  Entries expire after 5 minutes.
-DETAIL_CACHE = TTLCache(maxsize=100, ttl=300)
+# Unified object cache holding ``CacheEntry`` objects.  Keys are
+# ``<object id>|<view>`` (see ``object_cache_key``) for object endpoints and
+# ``class:<Class>|list`` / ``class:<Class>|search:<filter>`` for class
+# listings.  Entries are fresh for 5 minutes by default and kept for a further
+# stale-while-revalidate grace window.
+DETAIL_CACHE = CountingTTLCache(
+    maxsize=config.SM_DETAIL_CACHE_SIZE,
+    ttl=config.SM_DETAIL_CACHE_TTL + config.SM_DETAIL_STALE_GRACE,
+)
+
+def _make_disk_cache() -> Optional[PersistentCache]:
+    """Build the persistent tier; a :class:`SharedCache` when workers share it."""
+    if not config.SM_DETAIL_DISK_CACHE_PATH:
+        if config.SM_SHARED_CACHE:
+            logger.warning("SM_SHARED_CACHE needs SM_DETAIL_DISK_CACHE_PATH; workers will not share state.")
+        return None
+    cache_class = PersistentCache
+    if config.SM_SHARED_CACHE == "sqlite":
+        cache_class = SharedCache
+    elif config.SM_SHARED_CACHE:
+        logger.warning(f"Unknown SM_SHARED_CACHE={config.SM_SHARED_CACHE!r}; workers will not share state.")
+    return cache_class(
+        config.SM_DETAIL_DISK_CACHE_PATH,
+        max_entries=config.SM_DETAIL_DISK_CACHE_SIZE,
+        max_age=config.SM_DETAIL_DISK_CACHE_MAX_AGE,
+        # Entries of another policy server are dropped when the file is opened.
+        source=backend_fingerprint(),
+    )
+
+# Optional persistent second tier so details survive restarts (and, with
+# ``SM_SHARED_CACHE``, is shared by the worker processes of one host).
+DETAIL_DISK_CACHE = _make_disk_cache()
+
+# Identifies this process in the shared login lock and invalidation journal.
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+DETAIL_CACHE_STATS = {
+    "memory_hits": 0,
+    "misses": 0,
+    "disk_hits": 0,
+    "stale_served": 0,
+    "background_refreshes": 0,
+    "revalidated": 0,
+    "fetches": 0,
+    "invalidations": 0,
+    "shared_invalidations": 0,
+}
+
+# Bumped on every invalidation; refreshes started under an older generation do
+# not store their result, so a write cannot be undone by an in-flight read.
+_cache_generation = 0
+
+# Last invalidation journal entry applied from other workers.
+_shared_seq: Optional[int] = None
+
+# Callbacks notified with the canonical class name whenever a class changes.
+_CLASS_INVALIDATION_LISTENERS: list[Callable[[str], None]] = []
+# Called with ``(cache key, json)`` for every freshly fetched object response.
+_FETCH_LISTENERS: list[Callable[[str, Any], None]] = []
+# Called with the object id whenever an object is invalidated as deleted.
+_DELETE_LISTENERS: list[Callable[[str], None]] = []
+
+# ``.../policy/v1/objects/<id>[/<view>]``
+_OBJECT_PATH_RE = re.compile(r"/policy/v1/objects/([^/?#]+)(?:/([^/?#]+))?/?$")
 
 # Cache the login token for 15 minutes to avoid frequent re-authentication.
-TOKEN_CACHE = TimedCache(ttl_seconds=900)
+# Each backend has its own token (see ``token_key``).
+TOKEN_TTL_SECONDS = 900
+TOKEN_CACHE = TimedCache(ttl_seconds=TOKEN_TTL_SECONDS)
+TOKEN_KEY = "bearer_token"
+
+# Only one login may be in flight; concurrent callers await the same one.
+_LOGIN_FLIGHT = SingleFlight()
+
+# Login counters: ``logins`` are POSTs to the token endpoint, ``refreshes``
+# are logins forced by a 401, ``proactive_refreshes`` are background renewals
+# before expiry and ``coalesced`` counts callers that awaited another login.
+# With a shared cache, ``shared_adopted`` counts tokens taken over from another
+# worker and ``shared_lock_waits`` logins that waited for another worker's.
+TOKEN_STATS = {
+    "logins": 0,
+    "login_failures": 0,
+    "refreshes": 0,
+    "proactive_refreshes": 0,
+    "coalesced": 0,
+    "shared_adopted": 0,
+    "shared_lock_waits": 0,
+}
+
+# Monotonic timestamp, per token key, of the last time a caller asked for the
+# token; the background refresher only renews tokens that are actually in use.
+_last_token_use: dict[str, float] = {}
+
+# Concurrent identical GETs share one upstream request.
+_GET_FLIGHT = SingleFlight()
+
+# At most one background stale-while-revalidate refresh per cache key.
+_REFRESH_FLIGHT = SingleFlight()
+
+# Strong references to fire-and-forget tasks so they are not garbage collected.
+_BACKGROUND_TASKS: set[asyncio.Task] = set()
 
 # Generic in-memory cache for arbitrary objects keyed by type.
 OBJECT_CACHE: dict[str, dict] = {}
 
 def get_siteminder_base_url() -> str:
-    """Return the base URL for the SiteMinder REST API, ensuring no trailing slash."""
-    base_url = config.SITE_MINDER_BASE_URL
-    if base_url:
-        return base_url.rstrip("/")
-    return ""
+    """Return the current backend's SiteMinder REST API base URL, without trailing slash."""
+    return current_backend().base_url
+
+def token_key() -> str:
+    """Return the token cache key of the current backend."""
+    backend = current_backend()
+    return TOKEN_KEY if backend.is_default else f"{TOKEN_KEY}:{backend.name}"
 
 def get_login_url() -> str:
     """Return the login URL for the SiteMinder REST API."""
@@ -59,31 +167,216 @@ def normalize_url(url: str) -> str:
         return normalized
     return url
 
-async def get_token() -> Optional[str]:
-    """Retrieve and cache a SiteMinder session token."""
-    cached_token = TOKEN_CACHE.get("bearer_token")
-    if cached_token:
-        return cached_token
-
+async def _login() -> Optional[str]:
+    """POST to the SiteMinder login endpoint and cache the returned session key."""
     login_url = get_login_url()
     if not login_url:
-        logger.error("SITE_MINDER_BASE_URL is not configured.")
+        logger.error(f"No base URL is configured for SiteMinder backend {current_backend().name!r}.")
         return None
 
     logger.debug(f"Attempting login to SiteMinder at {login_url}")
-    auth = httpx.BasicAuth(config.SITE_MINDER_USERNAME, config.SITE_MINDER_PASSWORD)
-    async with create_insecure_httpx_client() as client:
-        try:
-            resp = await client.post(login_url, auth=auth, timeout=15.0)
-            resp.raise_for_status()
-            session_key = resp.json().get("sessionkey")
-            if session_key:
-                TOKEN_CACHE.set("bearer_token", session_key)
-                logger.debug("Successfully retrieved SiteMinder session key.")
-            return session_key
-        except Exception:
-            logger.exception("Failed to retrieve SiteMinder session token")
-            return None
+    TOKEN_STATS["logins"] += 1
+    backend = current_backend()
+    auth = httpx.BasicAuth(backend.username or "", backend.password or "")
+    try:
+        resp = await _send("POST", login_url, auth=auth, timeout=15.0)
+        resp.raise_for_status()
+        session_key = resp.json().get("sessionkey")
+        if session_key:
+            TOKEN_CACHE.set(token_key(), session_key)
+            logger.debug("Successfully retrieved SiteMinder session key.")
+        else:
+            TOKEN_STATS["login_failures"] += 1
+        return session_key
+    except Exception:
+        TOKEN_STATS["login_failures"] += 1
+        logger.exception("Failed to retrieve SiteMinder session token")
+        return None
+
+async def _adopt_shared_token(shared: SharedCache, stale_token: Optional[str]) -> Optional[str]:
+    """Use the shared token if it is not ``stale_token`` and not close to expiry."""
+    found = await asyncio.to_thread(shared.get_token, token_key())
+    if found is None:
+        return None
+    token, remaining = found
+    if token == stale_token or remaining <= config.SM_TOKEN_REFRESH_MARGIN:
+        return None
+    TOKEN_CACHE.set(token_key(), token, ttl=remaining)
+    TOKEN_STATS["shared_adopted"] += 1
+    return token
+
+async def _acquire_token(stale_token: Optional[str] = None) -> Optional[str]:
+    """Log in; with a shared cache, at most one worker at a time logs in and the
+    others adopt its token.  The shared database is only used from threads."""
+    shared = get_shared_cache()
+    if shared is None:
+        return await _login()
+    key = token_key()
+    lease = config.SM_SHARED_LOCK_LEASE
+    deadline = time.monotonic() + lease
+    waited = False
+    try:
+        while True:
+            token = await _adopt_shared_token(shared, stale_token)
+            if token:
+                return token
+            if await asyncio.to_thread(shared.try_lock, f"login:{key}", WORKER_ID, lease):
+                try:
+                    token = await _adopt_shared_token(shared, stale_token) or await _login()
+                    if token:
+                        await asyncio.to_thread(shared.set_token, key, token, TOKEN_TTL_SECONDS)
+                    return token
+                finally:
+                    await asyncio.to_thread(shared.release_lock, f"login:{key}", WORKER_ID)
+            if not waited:
+                TOKEN_STATS["shared_lock_waits"] += 1
+                waited = True
+            if time.monotonic() > deadline:
+                logger.warning("Timed out waiting for another worker's SiteMinder login; logging in directly.")
+                return await _login()
+            await asyncio.sleep(0.05)
+    except sqlite3.Error:
+        logger.exception("Shared token store failed; logging in directly.")
+        return await _login()
+
+async def _single_flight_login(stale_token: Optional[str] = None) -> Optional[str]:
+    """Join the in-flight login, or start one if none is running."""
+    key = token_key()
+    if _LOGIN_FLIGHT.in_flight(key):
+        TOKEN_STATS["coalesced"] += 1
+    return await _LOGIN_FLIGHT.do(key, lambda: _acquire_token(stale_token))
+
+def _schedule_proactive_refresh() -> asyncio.Task:
+    """Start a background login unless one is already running; return its task."""
+    key = token_key()
+    if not _LOGIN_FLIGHT.in_flight(key):
+        TOKEN_STATS["proactive_refreshes"] += 1
+        logger.debug("SiteMinder token close to expiry; renewing in the background.")
+    task = _LOGIN_FLIGHT.start(key, _acquire_token)
+    _BACKGROUND_TASKS.add(task)
+    task.add_done_callback(_BACKGROUND_TASKS.discard)
+    return task
+
+async def get_token(force_refresh: bool = False, stale_token: Optional[str] = None) -> Optional[str]:
+    """Retrieve and cache a SiteMinder session token.
+
+    Concurrent callers share a single login.  When the cached token is within
+    ``SM_TOKEN_REFRESH_MARGIN`` seconds of expiry it is still returned, and a
+    renewal is started in the background.  Pass ``force_refresh=True`` with the
+    rejected ``stale_token`` after a 401; the cached token is only discarded if
+    it is still that stale token, so a burst of 401s causes one login.
+    """
+    key = token_key()
+    _last_token_use[key] = time.monotonic()
+
+    with tracing.span("get_token", force_refresh=force_refresh) as span:
+        if force_refresh:
+            current = TOKEN_CACHE.get(key)
+            if current and stale_token and current != stale_token:
+                span.set(cached=True)
+                return current
+            TOKEN_CACHE.pop(key)
+            shared = get_shared_cache()
+            if shared is not None and stale_token:
+                try:
+                    await asyncio.to_thread(shared.delete_token, key, stale_token)
+                except sqlite3.Error:
+                    logger.exception("Failed to drop the rejected token from the shared store")
+            if not _LOGIN_FLIGHT.in_flight(key):
+                TOKEN_STATS["refreshes"] += 1
+            span.set(cached=False)
+            return await _single_flight_login(stale_token)
+
+        cached_token = TOKEN_CACHE.get(key)
+        span.set(cached=bool(cached_token))
+        if cached_token:
+            remaining = TOKEN_CACHE.ttl_remaining(key)
+            if (
+                remaining is not None
+                and remaining <= config.SM_TOKEN_REFRESH_MARGIN
+                and not _LOGIN_FLIGHT.in_flight(key)
+            ):
+                _schedule_proactive_refresh()
+            return cached_token
+
+        return await _single_flight_login()
+
+async def run_token_refresher() -> None:
+    """Renew the current backend's session token shortly before it expires, for as long as it is in use."""
+    margin = config.SM_TOKEN_REFRESH_MARGIN
+    key = token_key()
+    while True:
+        remaining = TOKEN_CACHE.ttl_remaining(key)
+        if remaining is None:
+            # Nothing cached: the next caller logs in on demand.
+            await asyncio.sleep(max(margin, 1.0))
+        elif remaining > margin:
+            await asyncio.sleep(remaining - margin)
+        elif time.monotonic() - _last_token_use.get(key, 0.0) < TOKEN_TTL_SECONDS:
+            token = await asyncio.shield(_schedule_proactive_refresh())
+            if not token:
+                # Back off instead of hammering a failing login endpoint.
+                await asyncio.sleep(5.0)
+        else:
+            # Idle: let the token lapse rather than keeping a session alive.
+            await asyncio.sleep(remaining)
+
+@asynccontextmanager
+async def token_refresher_lifespan() -> AsyncIterator[None]:
+    """Run :func:`run_token_refresher` for every backend for the duration of the context."""
+    tasks = []
+    for name in backend_names():
+        with use_backend(name):
+            # The task copies the context, so it keeps refreshing this backend's token.
+            tasks.append(asyncio.create_task(run_token_refresher()))
+    try:
+        yield
+    finally:
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+def get_token_stats() -> dict[str, Any]:
+    """Return login counters and the current backend's token lifetime."""
+    key = token_key()
+    remaining = TOKEN_CACHE.ttl_remaining(key)
+    return {
+        **TOKEN_STATS,
+        "backend": current_backend().name,
+        "shared": get_shared_cache() is not None,
+        "login_in_flight": _LOGIN_FLIGHT.in_flight(key),
+        "token_ttl_remaining": round(remaining, 1) if remaining is not None else None,
+    }
+
+def get_coalescing_stats() -> dict[str, int]:
+    """Return how many GETs went upstream and how many were saved by coalescing."""
+    stats = _GET_FLIGHT.stats()
+    return {
+        "upstream_gets": stats["calls"],
+        "coalesced_gets": stats["shared"],
+        "in_flight_gets": stats["in_flight"],
+    }
+
+async def _send(method: str, url: str, **kwargs: Any) -> httpx.Response:
+    """Issue one request on the pooled client, recording metrics and a trace span."""
+    endpoint = metrics.endpoint_label(url)
+    metrics.UPSTREAM_IN_FLIGHT.inc()
+    start = time.perf_counter()
+    status = "error"
+    try:
+        with tracing.span(f"HTTP {method} {endpoint}", method=method, url=url) as span:
+            resp = await get_http_client(get_siteminder_base_url()).request(method, url, **kwargs)
+            status = str(resp.status_code)
+            span.set(status_code=resp.status_code)
+        return resp
+    finally:
+        metrics.UPSTREAM_IN_FLIGHT.dec()
+        metrics.UPSTREAM_LATENCY.observe(time.perf_counter() - start, method, endpoint)
+        metrics.UPSTREAM_RESPONSES.inc(method, endpoint, status)
 
 def get_headers(token: str) -> dict:
     """Construct common headers for authenticated requests."""
@@ -92,66 +385,170 @@ def get_headers(token: str) -> dict:
         "Accept": "application/json",
     }
 
+def coalescing_key(url: str) -> str:
+    """Return the key under which concurrent GETs of ``url`` are shared."""
+    parsed = urlparse(normalize_url(url))
+    return urlunparse(parsed._replace(scheme=parsed.scheme.lower(), netloc=parsed.netloc.lower()))
+
+def object_cache_key(url: str) -> str:
+    """Return the canonical cache key for an object endpoint URL.
+
+    ``.../objects/<id>`` maps to ``<id>|detail``, ``.../objects/<id>/children``
+    to ``<id>|children`` and ``?op=expanded`` to ``<id>|expanded``, with the id
+    percent-decoded so differently encoded hrefs share one entry.  Keys of
+    non-default backends carry their :func:`cache_namespace` prefix.  Other
+    URLs fall back to :func:`coalescing_key`, which already includes the host.
+    """
+    parsed = urlparse(url)
+    match = _OBJECT_PATH_RE.search(parsed.path)
+    if not match:
+        return coalescing_key(url)
+    view = match.group(2) or "detail"
+    op = parse_qs(parsed.query).get("op")
+    if op and view == "detail":
+        view = op[0]
+    return f"{cache_namespace()}{unquote(match.group(1))}|{view}"
+
+def object_id_from_key(key: str) -> str:
+    """Return the object id of an :func:`object_cache_key` (without namespace or view)."""
+    if key.startswith("@"):
+        key = key.split("/", 1)[-1]
+    return key.split("|", 1)[0]
+
+def canonical_class(class_name: str) -> str:
+    """Return the singular class name (``SmAgents`` -> ``SmAgent``, ``SmPolicies`` -> ``SmPolicy``)."""
+    name = class_name.rstrip("/").split("/")[-1]
+    if name.endswith("ies"):
+        return name[:-3] + "y"
+    if name.endswith("s"):
+        return name[:-1]
+    return name
+
+def collection_name(class_name: str) -> str:
+    """Return the collection of a class (``SmAgent`` -> ``SmAgents``, ``SmPolicy`` -> ``SmPolicies``)."""
+    name = canonical_class(class_name)
+    return name[:-1] + "ies" if name.endswith("y") else name + "s"
+
+def class_cache_key(class_name: str, view: str = "list") -> str:
+    """Return the cache key of a class listing (``list`` or ``search:<filter>``)."""
+    return f"{cache_namespace()}class:{canonical_class(class_name)}|{view}"
+
 async def http_get_with_token_refresh(
     url: str, token: Optional[str] = None, retries: int = 1
 ) -> Any:
-    """GET ``url`` using the provided token and retry on 401 responses."""
-    url = normalize_url(url)
+    """GET ``url`` using the provided token and retry on 401 responses.
+
+    Concurrent GETs of the same normalized URL share one upstream request and
+    one parsed JSON result (disable with ``SM_COALESCE_GETS=false``).  The
+    shared result must be treated as read-only by callers.
+    """
+    result = await http_get_with_validators(url, token, retries)
+    return result["json"] if result else None
+
+async def http_get_with_validators(
+    url: str,
+    token: Optional[str] = None,
+    retries: int = 1,
+    entry: Optional[CacheEntry] = None,
+) -> Optional[dict[str, Any]]:
+    """GET ``url``, conditionally on the validators of a cached ``entry``.
+
+    Returns ``{"status", "json", "etag", "last_modified"}`` (``json`` is
+    ``None`` for a 304) or ``None`` if the request failed.
+    """
+    conditional = entry.conditional_headers() if entry is not None else {}
+    if not config.SM_COALESCE_GETS:
+        return await _http_get(normalize_url(url), token, retries, conditional)
+    key = coalescing_key(url)
+    return await _GET_FLIGHT.do(
+        (key, *sorted(conditional.items())), lambda: _http_get(key, token, retries, conditional)
+    )
+
+async def _http_get(
+    url: str, token: Optional[str], retries: int, extra_headers: dict[str, str]
+) -> Optional[dict[str, Any]]:
+    """Issue the GET for :func:`http_get_with_validators`."""
     if not token:
         token = await get_token()
 
-    headers = get_headers(token)
-    async with create_insecure_httpx_client() as client:
-        for attempt in range(retries + 1):
-            try:
-                resp = await client.get(url, headers=headers, timeout=30.0)
-                if resp.status_code == 401 and attempt < retries:
-                    logger.warning("Token expired. Refreshing...")
-                    token = await get_token()
-                    headers = get_headers(token)
-                    continue
+    headers = {**get_headers(token), **extra_headers}
+    for attempt in range(retries + 1):
+        if attempt:
+            metrics.UPSTREAM_RETRIES.inc("GET", metrics.endpoint_label(url))
+        try:
+            resp = await _send("GET", url, headers=headers, timeout=30.0)
+            if resp.status_code == 401 and attempt < retries:
+                logger.warning("Token expired. Refreshing...")
+                token = await get_token(force_refresh=True, stale_token=token)
+                headers = {**get_headers(token), **extra_headers}
+                continue
+            if resp.status_code != 304:
                 resp.raise_for_status()
-                return resp.json()
-            except Exception:
-                logger.exception(f"HTTP GET failed for {url}")
-                if attempt == retries:
-                    return None
+            return {
+                "status": resp.status_code,
+                "json": resp.json() if resp.status_code != 304 else None,
+                "etag": resp.headers.get("ETag"),
+                "last_modified": resp.headers.get("Last-Modified"),
+            }
+        except Exception:
+            logger.exception(f"HTTP GET failed for {url}")
+            if attempt == retries:
+                return None
 
 async def http_post_with_token_refresh(
-    url: str, data: dict, token: Optional[str] = None, retries: int = 1
+    url: str, data: dict, token: Optional[str] = None, retries: int = 1, raise_errors: bool = False
 ) -> Any:
-    """POST ``data`` to ``url`` using the provided token and retry on 401 responses."""
+    """POST ``data`` to ``url`` using the provided token and retry on 401 responses.
+
+    Client errors other than 401 are not retried.  On failure ``None`` is
+    returned, or the last exception raised when ``raise_errors`` is set.
+    """
     url = normalize_url(url)
     if not token:
         token = await get_token()
 
     headers = get_headers(token)
-    async with create_insecure_httpx_client() as client:
-        for attempt in range(retries + 1):
-            try:
-                resp = await client.post(url, headers=headers, json=data, timeout=30.0)
-                if resp.status_code == 401 and attempt < retries:
-                    logger.warning("Token expired. Refreshing...")
-                    token = await get_token()
-                    headers = get_headers(token)
-                    continue
-                resp.raise_for_status()
-                return resp.json()
-            except Exception:
-                logger.exception(f"HTTP POST failed for {url}")
-                if attempt == retries:
-                    return None
+    for attempt in range(retries + 1):
+        if attempt:
+            metrics.UPSTREAM_RETRIES.inc("POST", metrics.endpoint_label(url))
+        try:
+            resp = await _send("POST", url, headers=headers, json=data, timeout=30.0)
+            if resp.status_code == 401 and attempt < retries:
+                logger.warning("Token expired. Refreshing...")
+                token = await get_token(force_refresh=True, stale_token=token)
+                headers = get_headers(token)
+                continue
+            resp.raise_for_status()
+            return resp.json()
+        except Exception as e:
+            logger.exception(f"HTTP POST failed for {url}")
+            rejected = isinstance(e, httpx.HTTPStatusError) and e.response.status_code < 500
+            if attempt == retries or rejected:
+                if raise_errors:
+                    raise
+                return None
 
-async def fetch_objects(class_name: str, token: Optional[str] = None) -> list[dict[str, Any]]:
+async def fetch_objects(
+    class_name: str, token: Optional[str] = None, use_cache: bool = True
+) -> list[dict[str, Any]]:
     """Return a list of objects for the given class."""
     url = f"{get_siteminder_base_url()}/ca/api/sso/services/policy/v1/{class_name}"
-    resp_json = await http_get_with_token_refresh(url, token, retries=1)
+    if use_cache:
+        resp_json, _, _ = await get_cached_with_age(url, class_cache_key(class_name), token)
+    else:
+        resp_json = await http_get_with_token_refresh(url, token, retries=1)
     return resp_json.get("data", []) if resp_json else []
 
-async def create_object(class_name: str, data: dict, token: Optional[str] = None) -> Optional[dict[str, Any]]:
-    """Create a new object of the given class."""
+async def create_object(
+    class_name: str, data: dict, token: Optional[str] = None, raise_errors: bool = False
+) -> Optional[dict[str, Any]]:
+    """Create a new object in collection ``class_name`` (``SmAgents``, or
+    ``SmDomains/<domain>/SmRealms`` for nested classes) and invalidate the
+    views it affects."""
     url = f"{get_siteminder_base_url()}/ca/api/sso/services/policy/v1/{class_name}"
-    resp_json = await http_post_with_token_refresh(url, data, token, retries=1)
+    resp_json = await http_post_with_token_refresh(url, data, token, retries=1, raise_errors=raise_errors)
+    if resp_json is not None:
+        await invalidate_after_write(class_name, data, resp_json)
     return resp_json
 
 async def search_objects(
@@ -161,31 +558,394 @@ async def search_objects(
     url = (
         f"{get_siteminder_base_url()}/ca/api/sso/services/policy/v1/{class_name}?filter={filter_expr}"
     )
-    resp_json = await http_get_with_token_refresh(url, token, retries=1)
+    resp_json, _, _ = await get_cached_with_age(
+        url, class_cache_key(class_name, f"search:{filter_expr}"), token
+    )
     return resp_json.get("data", []) if resp_json else []
 
+def get_detail_disk_cache() -> Optional[PersistentCache]:
+    """Return the persistent detail cache tier, or ``None`` when disabled."""
+    return DETAIL_DISK_CACHE
+
+def get_shared_cache() -> Optional[SharedCache]:
+    """Return the persistent tier when it is shared between workers, else ``None``."""
+    disk = get_detail_disk_cache()
+    return disk if isinstance(disk, SharedCache) else None
+
+def _read_invalidations(shared: SharedCache, seq: Optional[int]) -> tuple[int, list[tuple[str, str]], bool]:
+    if seq is None:
+        # Entries cached before this point were loaded from the shared tier.
+        return shared.last_invalidation(), [], False
+    return shared.invalidations_since(seq)
+
+async def sync_shared_invalidations() -> int:
+    """Apply invalidations other workers logged since the last sync.
+
+    The journal is read in a thread.  Returns the number of in-memory entries
+    dropped.
+    """
+    global _shared_seq, _cache_generation
+    shared = get_shared_cache()
+    if shared is None:
+        return 0
+    try:
+        _shared_seq, rows, gap = await asyncio.to_thread(_read_invalidations, shared, _shared_seq)
+    except sqlite3.Error:
+        logger.exception("Failed to read the shared invalidation journal")
+        return 0
+    prefixes = tuple(prefix for prefix, origin in rows if origin != WORKER_ID)
+    if gap:
+        # Journal entries were pruned before we saw them: drop everything.
+        prefixes = ("",)
+    if not prefixes:
+        return 0
+    _cache_generation += 1
+    DETAIL_CACHE_STATS["shared_invalidations"] += len(prefixes)
+    keys = [key for key in list(DETAIL_CACHE.keys()) if key.startswith(prefixes)]
+    for key in keys:
+        DETAIL_CACHE.pop(key, None)
+    for prefix in prefixes:
+        if prefix.startswith("class:"):
+            _notify_class_listeners(prefix[len("class:"):].rstrip("|"))
+    logger.debug(f"Applied {len(prefixes)} invalidations from other workers ({len(keys)} entries)")
+    return len(keys)
+
+async def run_shared_sync() -> None:
+    """Apply other workers' invalidations every ``SM_SHARED_SYNC_INTERVAL`` seconds."""
+    while True:
+        await asyncio.sleep(config.SM_SHARED_SYNC_INTERVAL)
+        try:
+            await sync_shared_invalidations()
+        except Exception:
+            logger.exception("Shared invalidation sync failed")
+
 async def get_object_details_from_href(
     href: str, token: Optional[str] = None
 ) -> dict[str, Any]:
     """Fetch object details for a direct href, using cache when possible."""
-    if href in DETAIL_CACHE:
-        return DETAIL_CACHE[href]
+    detail, _, _ = await get_object_details_with_age(href, token)
+    return detail
+
+async def get_object_details_with_age(
+    href: str, token: Optional[str] = None
+) -> tuple[dict[str, Any], float, bool]:
+    """Return ``(detail, age_seconds, stale)`` for ``href`` from the object cache."""
+    return await get_cached_with_age(href, object_cache_key(href), token)
 
-    resp_json = await http_get_with_token_refresh(href, token, retries=1)
-    if resp_json:
-        DETAIL_CACHE[href] = resp_json
-    return resp_json if resp_json else {}
+async def get_cached_with_age(
+    url: str, key: str, token: Optional[str] = None
+) -> tuple[dict[str, Any], float, bool]:
+    """Return ``(json, age_seconds, stale)`` for ``url`` cached under ``key``.
+
+    Lookups go to the in-memory ``DETAIL_CACHE`` first, then the persistent
+    tier.  Entries younger than ``SM_DETAIL_CACHE_TTL`` are served directly.
+    Within the following ``SM_DETAIL_STALE_GRACE`` seconds the stale entry is
+    returned immediately and exactly one background refresh is scheduled.
+    Older entries are revalidated inline, with a conditional GET when the
+    server sent an ETag or Last-Modified.  The persistent tier is read in a
+    thread so SQLite never blocks the event loop.
+    """
+    ttl = config.SM_DETAIL_CACHE_TTL
+    disk = get_detail_disk_cache()
+
+    with tracing.span("cache.lookup", key=key) as span:
+        tier = "memory"
+        entry = DETAIL_CACHE.get(key)
+        if entry is not None:
+            DETAIL_CACHE_STATS["memory_hits"] += 1
+        elif disk is not None:
+            tier = "disk"
+            generation = _cache_generation
+            entry = await asyncio.to_thread(disk.get, key)
+            if entry is not None:
+                DETAIL_CACHE_STATS["disk_hits"] += 1
+                # Do not promote an entry invalidated while it was being read.
+                if generation == _cache_generation:
+                    DETAIL_CACHE[key] = entry
+
+        if entry is not None:
+            age = entry.age
+            if age <= ttl:
+                span.set(result=f"{tier}_hit", age_seconds=round(age, 1))
+                return entry.value, age, False
+            if age <= ttl + config.SM_DETAIL_STALE_GRACE:
+                DETAIL_CACHE_STATS["stale_served"] += 1
+                span.set(result="stale", age_seconds=round(age, 1))
+                _schedule_detail_refresh(url, key, entry)
+                return entry.value, age, True
+
+        DETAIL_CACHE_STATS["misses"] += 1
+        span.set(result="miss" if entry is None else "expired")
+        entry = await _refresh_detail(url, key, entry, token)
+        if entry is None:
+            return {}, 0.0, False
+        age = entry.age
+        return entry.value, age, age > ttl
+
+async def _refresh_detail(
+    url: str, key: str, entry: Optional[CacheEntry], token: Optional[str]
+) -> Optional[CacheEntry]:
+    """Revalidate or refetch ``url`` and store the result in both tiers under ``key``."""
+    disk = get_detail_disk_cache()
+    generation = _cache_generation
+    result = await http_get_with_validators(url, token, entry=entry)
+
+    if result is None:
+        if entry is not None:
+            logger.warning(f"Serving stale detail for {url} ({entry.age:.0f}s old)")
+        return entry
+    # An invalidation happened while the request was in flight; return what we
+    # got but do not let it overwrite the invalidated entry.
+    store = generation == _cache_generation
+    if result["status"] == 304 and entry is not None:
+        DETAIL_CACHE_STATS["revalidated"] += 1
+        entry.stored_at = time.time()
+        if store:
+            DETAIL_CACHE[key] = entry
+            if disk is not None:
+                await asyncio.to_thread(disk.touch, key)
+        return entry
+
+    DETAIL_CACHE_STATS["fetches"] += 1
+    resp_json = result["json"]
+    if not resp_json:
+        return None
+    entry = CacheEntry(key, resp_json, result["etag"], result["last_modified"], time.time())
+    if store:
+        DETAIL_CACHE[key] = entry
+        if disk is not None:
+            await asyncio.to_thread(disk.set, key, resp_json, result["etag"], result["last_modified"])
+            if generation != _cache_generation:
+                # Invalidated while the row was being written.
+                await asyncio.to_thread(disk.delete, key)
+        # Listeners (the dependency graph) only index the default backend.
+        for listener in _FETCH_LISTENERS if not key.startswith("@") else ():
+            try:
+                listener(key, resp_json)
+            except Exception:
+                logger.exception(f"Fetch listener failed for {key}")
+    return entry
+
+def _schedule_detail_refresh(url: str, key: str, entry: CacheEntry) -> None:
+    """Start one background refresh of ``key`` unless one is already running."""
+    if _REFRESH_FLIGHT.in_flight(key):
+        return
+    DETAIL_CACHE_STATS["background_refreshes"] += 1
+    task = _REFRESH_FLIGHT.start(key, lambda: _refresh_detail(url, key, entry, None))
+    _BACKGROUND_TASKS.add(task)
+    task.add_done_callback(_BACKGROUND_TASKS.discard)
 
 async def get_object_by_id(obj_id: str, token: Optional[str] = None) -> dict[str, Any]:
     """Convenience wrapper to fetch details for a specific object id."""
-    url = build_object_id_url(obj_id)
-    resp_json = await http_get_with_token_refresh(url, token, retries=1)
-    return resp_json if resp_json else {}
+    return await get_object_details_from_href(build_object_id_url(obj_id), token)
+
+def _drop_memory(prefix: str) -> int:
+    global _cache_generation
+    _cache_generation += 1
+    keys = [key for key in list(DETAIL_CACHE.keys()) if key.startswith(prefix)]
+    for key in keys:
+        DETAIL_CACHE.pop(key, None)
+    return len(keys)
+
+def _drop_persisted(disk: PersistentCache, prefix: str) -> int:
+    removed = disk.delete_prefix(prefix)
+    if isinstance(disk, SharedCache):
+        disk.log_invalidation(prefix, WORKER_ID)
+    return removed
+
+async def invalidate_prefix(prefix: str) -> int:
+    """Drop every cache entry whose key starts with ``prefix`` from both tiers.
+
+    The persistent tier and the shared journal are written in a thread.
+    """
+    DETAIL_CACHE_STATS["invalidations"] += 1
+    removed = _drop_memory(prefix)
+    disk = get_detail_disk_cache()
+    if disk is not None:
+        removed = max(removed, await asyncio.to_thread(_drop_persisted, disk, prefix))
+        # A lookup may have promoted a row the thread had not deleted yet.
+        _drop_memory(prefix)
+    logger.debug(f"Invalidated {removed} cache entries with prefix {prefix!r}")
+    return removed
+
+async def invalidate_object(obj_id_or_url: str, deleted: bool = False) -> int:
+    """Drop every cached view (detail, children, usedby, ...) of one object.
+
+    With ``deleted``, delete listeners (the dependency graph) forget the object.
+    """
+    if obj_id_or_url.startswith("http"):
+        key = object_cache_key(obj_id_or_url)
+        if "|" not in key:
+            # Not an ``objects/<id>`` URL: drop the URL and its sub-endpoints.
+            return await invalidate_prefix(key)
+        obj_id_or_url = object_id_from_key(key)
+    removed = await invalidate_prefix(f"{cache_namespace()}{obj_id_or_url}|")
+    if deleted and current_backend().is_default:
+        for listener in _DELETE_LISTENERS:
+            try:
+                listener(obj_id_or_url)
+            except Exception:
+                logger.exception(f"Delete listener failed for {obj_id_or_url}")
+    return removed
+
+async def invalidate_class(class_name: str) -> int:
+    """Drop the cached listing and searches of ``class_name`` and notify listeners."""
+    canonical = canonical_class(class_name)
+    removed = await invalidate_prefix(class_cache_key(canonical, ""))
+    if current_backend().is_default:
+        _notify_class_listeners(canonical)
+    return removed
+
+def _notify_class_listeners(canonical: str) -> None:
+    for listener in _CLASS_INVALIDATION_LISTENERS:
+        try:
+            listener(canonical)
+        except Exception:
+            logger.exception(f"Class invalidation listener failed for {canonical}")
+
+def add_class_invalidation_listener(listener: Callable[[str], None]) -> None:
+    """Call ``listener(class_name)`` whenever a class listing is invalidated."""
+    _CLASS_INVALIDATION_LISTENERS.append(listener)
+
+def add_fetch_listener(listener: Callable[[str, Any], None]) -> None:
+    """Call ``listener(cache_key, json)`` whenever an object response is fetched and cached."""
+    _FETCH_LISTENERS.append(listener)
+
+def add_delete_listener(listener: Callable[[str], None]) -> None:
+    """Call ``listener(object_id)`` whenever an object is invalidated as deleted."""
+    _DELETE_LISTENERS.append(listener)
+
+def _referenced_objects(value: Any) -> Iterable[str]:
+    """Yield the ``id``/``href`` of every link found in a request payload."""
+    if isinstance(value, dict):
+        for key in ("id", "href"):
+            if isinstance(value.get(key), str):
+                yield value[key]
+        for item in value.values():
+            yield from _referenced_objects(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _referenced_objects(item)
+
+async def invalidate_after_write(class_name: str, payload: dict, response: Any) -> None:
+    """Invalidate what a create/update changes: the class listings, the
+    parent's views and the ``usedby`` views of every object the payload links to."""
+    await invalidate_class(class_name)
+    if isinstance(response, dict):
+        parent = response.get("parent")
+        if isinstance(parent, dict) and parent.get("id"):
+            await invalidate_object(parent["id"])
+        data = response.get("data")
+        if isinstance(data, dict) and isinstance(data.get("id"), str):
+            await invalidate_object(data["id"])
+    for ref in set(_referenced_objects(payload)):
+        await invalidate_object(ref)
 
 def show_detail_cache() -> list[str]:
-    """Return a list of cached hrefs."""
+    """Return the keys of the object cache."""
     return list(DETAIL_CACHE.keys())
 
-def clear_detail_cache() -> None:
-    """Clear all entries from the detail cache."""
-    DETAIL_CACHE.clear()
\ No newline at end of file
+async def get_detail_cache_stats() -> dict[str, Any]:
+    """Return hit counters and sizes for both detail cache tiers."""
+    disk = get_detail_disk_cache()
+    return {
+        **DETAIL_CACHE_STATS,
+        "shared": get_shared_cache() is not None,
+        "memory_size": len(DETAIL_CACHE),
+        "disk_size": await asyncio.to_thread(len, disk) if disk is not None else None,
+    }
+
+async def clear_detail_cache() -> None:
+    """Clear all entries from the detail cache (both tiers)."""
+    _drop_memory("")
+    disk = get_detail_disk_cache()
+    if disk is not None:
+        await asyncio.to_thread(_drop_persisted, disk, "")
+        _drop_memory("")
+
+async def warm_detail_cache() -> int:
+    """Load the most recently used, still-fresh persisted details into memory."""
+    disk = get_detail_disk_cache()
+    if disk is None:
+        return 0
+    entries = await asyncio.to_thread(
+        disk.recent, DETAIL_CACHE.maxsize, config.SM_DETAIL_CACHE_TTL + config.SM_DETAIL_STALE_GRACE
+    )
+    for entry in entries:
+        DETAIL_CACHE[entry.key] = entry
+    logger.info(f"Warmed detail cache with {len(entries)} persisted entries")
+    return len(entries)
+
+@asynccontextmanager
+async def detail_cache_lifespan() -> AsyncIterator[None]:
+    """Warm the detail cache from disk on entry, apply other workers'
+    invalidations in the background and close the database on exit."""
+    try:
+        await sync_shared_invalidations()
+        await warm_detail_cache()
+    except Exception:
+        logger.exception("Failed to warm detail cache from disk")
+    sync_task = asyncio.create_task(run_shared_sync()) if get_shared_cache() is not None else None
+    try:
+        yield
+    finally:
+        if sync_task is not None:
+            sync_task.cancel()
+            try:
+                await sync_task
+            except asyncio.CancelledError:
+                pass
+        disk = get_detail_disk_cache()
+        if disk is not None:
+            await asyncio.to_thread(disk.close)
+
+# --- Metrics: cache and token counters are read at scrape time ---
+
+def _cache_requests() -> dict[tuple, int]:
+    return {
+        ("detail", "memory_hit"): DETAIL_CACHE_STATS["memory_hits"],
+        ("detail", "disk_hit"): DETAIL_CACHE_STATS["disk_hits"],
+        ("detail", "miss"): DETAIL_CACHE_STATS["misses"],
+        ("token", "hit"): TOKEN_CACHE.hits,
+        ("token", "miss"): TOKEN_CACHE.misses,
+    }
+
+def _cache_evictions() -> dict[tuple, int]:
+    return {
+        ("detail", "size"): DETAIL_CACHE.evictions,
+        ("detail", "expired"): DETAIL_CACHE.expirations,
+        ("token", "expired_or_size"): TOKEN_CACHE.evictions,
+    }
+
+def _cache_entries() -> dict[tuple, Optional[int]]:
+    disk = get_detail_disk_cache()
+    return {
+        ("detail", "memory"): len(DETAIL_CACHE),
+        ("detail", "disk"): len(disk) if disk is not None else None,
+        ("token", "memory"): len(TOKEN_CACHE),
+    }
+
+metrics.REGISTRY.callback(
+    "sm_cache_requests_total", "Cache lookups by cache and result.",
+    ("cache", "result"), _cache_requests, kind="counter")
+metrics.REGISTRY.callback(
+    "sm_cache_evictions_total", "Cache entries evicted for size or expiry.",
+    ("cache", "reason"), _cache_evictions, kind="counter")
+metrics.REGISTRY.callback(
+    "sm_cache_entries", "Current number of cache entries.",
+    ("cache", "tier"), _cache_entries)
+metrics.REGISTRY.callback(
+    "sm_cache_events_total",
+    "Detail cache stale serves, background refreshes, 304 revalidations, fetches and invalidations.",
+    ("event",),
+    lambda: {(k,): v for k, v in DETAIL_CACHE_STATS.items()
+             if k not in ("memory_hits", "disk_hits", "misses")},
+    kind="counter")
+metrics.REGISTRY.callback(
+    "sm_token_events_total", "SiteMinder login counters.",
+    ("event",), lambda: {(k,): v for k, v in TOKEN_STATS.items()}, kind="counter")
+metrics.REGISTRY.callback(
+    "sm_upstream_gets_total", "GETs sent upstream vs. shared with an identical in-flight GET.",
+    ("result",),
+    lambda: {("upstream",): _GET_FLIGHT.stats()["calls"], ("coalesced",): _GET_FLIGHT.stats()["shared"]},
+    kind="counter")
@@ -0,0 +1,390 @@
+"""Content-hashed snapshots of a SiteMinder policy store and their diff.
+
+A snapshot records every object of the registry classes by *path*
+(``/SmDomains/D/SmRealms/R``), not by id, so snapshots of different policy
+stores line up.  Each object gets a content hash of its attributes with unset
+(``#...``) values dropped, as in ``format_json_detail``, and links reduced to
+the path they point to.  Hashes are rolled up Merkle-style: an object's tree
+hash covers its own hash and one rollup per child class (a domain's realms, a
+realm's rules), and the snapshot has one rollup per top-level class.
+
+Building a snapshot reads the class listings and then, for each object with
+children, ``?op=expanded`` once (its body carries the children's details), so
+leaves need no request of their own.  Reads bypass the object cache so a
+snapshot reflects the store at that moment.  Snapshots are kept in memory and
+saved as gzipped JSON under ``SM_SNAPSHOT_DIR``.  :func:`diff_snapshots`
+compares two snapshots locally and only descends into class rollups and
+subtrees whose hashes differ.
+"""
+
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any, Optional
+
+from ..core import config, tracing
+from ..core.json_render import is_unset
+from .backends import current_backend
+from .replica import body_key, parent_path
+from .siteminder_api import (
+    build_object_id_url,
+    fetch_objects,
+    get_siteminder_base_url,
+    http_get_with_token_refresh,
+)
+
+logger = logging.getLogger(__name__)
+
+_LABEL_RE = re.compile(r"[^A-Za-z0-9._-]+")
+_POLICY = "/ca/api/sso/services/policy/v1"
+
+
+def _is_link(value: Any) -> bool:
+    return isinstance(value, dict) and (
+        isinstance(value.get("href"), str) or (isinstance(value.get("id"), str) and "path" in value)
+    )
+
+
+def canonical_value(value: Any) -> Any:
+    """Return ``value`` without unset attributes and with links replaced by their path.
+
+    Ids and hrefs differ between policy stores, paths do not.  Lists made only
+    of links are sorted, since their order carries no meaning.
+    """
+
+    if _is_link(value):
+        return value.get("path") or value.get("id")
+    if isinstance(value, dict):
+        return {k: canonical_value(v) for k, v in value.items() if not is_unset(v)}
+    if isinstance(value, list):
+        items = [canonical_value(v) for v in value if not is_unset(v)]
+        if items and all(_is_link(v) for v in value):
+            items.sort()
+        return items
+    return value
+
+
+def content_hash(value: Any) -> str:
+    text = json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+class Snapshot:
+    """Objects of one policy store keyed by path, with content and rollup hashes.
+
+    ``objects[path]`` holds ``class``, ``id``, ``data`` (canonical attributes),
+    ``hash`` (of ``data``), ``children`` (child paths per class), ``groups``
+    (rollup hash per child class) and ``tree`` (hash of the whole subtree).
+    """
+
+    def __init__(self, label: str, environment: str, objects: dict[str, dict],
+                 created_at: Optional[float] = None, stats: Optional[dict[str, Any]] = None) -> None:
+        self.label = label
+        self.environment = environment
+        self.objects = objects
+        self.created_at = time.time() if created_at is None else created_at
+        self.stats = stats or {}
+        self.classes: dict[str, dict[str, Any]] = {}
+        self.root = ""
+        self.rollup()
+
+    def rollup(self) -> None:
+        """Compute the subtree, per-class and root hashes from the object hashes."""
+
+        for obj in self.objects.values():
+            obj["children"] = {}
+        top: dict[str, list[str]] = {}
+        for path, obj in self.objects.items():
+            parent = parent_path(path)
+            if parent in self.objects:
+                self.objects[parent]["children"].setdefault(obj["class"], []).append(path)
+            else:
+                top.setdefault(obj["class"], []).append(path)
+        # Deepest objects first, so children are hashed before their parents.
+        for path in sorted(self.objects, key=lambda p: p.count("/"), reverse=True):
+            obj = self.objects[path]
+            obj["groups"] = {
+                cls: self._group_hash(paths) for cls, paths in sorted(obj["children"].items())
+            }
+            obj["tree"] = content_hash([obj["hash"], obj["groups"]])
+        self.classes = {
+            cls: {"hash": self._group_hash(paths), "paths": sorted(paths)} for cls, paths in sorted(top.items())
+        }
+        self.root = content_hash({cls: group["hash"] for cls, group in self.classes.items()})
+
+    def _group_hash(self, paths: list[str]) -> str:
+        paths.sort()
+        return content_hash([[path, self.objects[path]["tree"]] for path in paths])
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "label": self.label,
+            "environment": self.environment,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.created_at)),
+            "objects": len(self.objects),
+            "root": self.root,
+            "classes": {cls: {"objects": len(group["paths"]), "hash": group["hash"]}
+                        for cls, group in self.classes.items()},
+            **self.stats,
+        }
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "label": self.label,
+            "environment": self.environment,
+            "created_at": self.created_at,
+            "stats": self.stats,
+            "objects": {
+                path: {k: obj[k] for k in ("class", "id", "hash", "data")} for path, obj in self.objects.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, raw: dict[str, Any]) -> "Snapshot":
+        return cls(raw["label"], raw["environment"], raw["objects"], raw["created_at"], raw.get("stats"))
+
+
+class SnapshotStore:
+    """Snapshots by label: the most recent ones in memory, all of them on disk.
+
+    ``save`` and ``get`` compress or parse whole snapshots; async callers run
+    them with ``asyncio.to_thread``.
+    """
+
+    def __init__(self, directory: str, keep: int = 4) -> None:
+        self.directory = directory
+        self.keep = keep
+        self._loaded: dict[str, Snapshot] = {}
+        self._lock = threading.Lock()
+
+    def _file(self, label: str) -> str:
+        return os.path.join(self.directory, f"{label}.json.gz")
+
+    def save(self, snapshot: Snapshot) -> None:
+        self._remember(snapshot)
+        if not self.directory:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        with gzip.open(self._file(snapshot.label), "wt", encoding="utf-8") as f:
+            json.dump(snapshot.to_dict(), f, separators=(",", ":"))
+
+    def get(self, label: str) -> Optional[Snapshot]:
+        """Return the snapshot called ``label``, loading it from disk if needed."""
+
+        if not label or _LABEL_RE.search(label):
+            return None
+        with self._lock:
+            snapshot = self._loaded.get(label)
+        if snapshot is None and self.directory and os.path.exists(self._file(label)):
+            with gzip.open(self._file(label), "rt", encoding="utf-8") as f:
+                snapshot = Snapshot.from_dict(json.load(f))
+            self._remember(snapshot)
+        return snapshot
+
+    def labels(self) -> list[str]:
+        with self._lock:
+            labels = set(self._loaded)
+        if self.directory and os.path.isdir(self.directory):
+            labels.update(name[:-len(".json.gz")] for name in os.listdir(self.directory)
+                          if name.endswith(".json.gz"))
+        return sorted(labels)
+
+    def _remember(self, snapshot: Snapshot) -> None:
+        with self._lock:
+            self._loaded.pop(snapshot.label, None)
+            self._loaded[snapshot.label] = snapshot
+            while len(self._loaded) > self.keep:
+                self._loaded.pop(next(iter(self._loaded)))
+
+
+SNAPSHOTS = SnapshotStore(config.SM_SNAPSHOT_DIR)
+
+
+def snapshot_label(label: str = "") -> str:
+    """Return ``label`` made safe as a file name, or ``<environment>-<UTC time>``."""
+
+    label = _LABEL_RE.sub("-", label.strip()).strip("-.")
+    return label or f"{current_backend().name}-{time.strftime('%Y%m%dT%H%M%SZ', time.gmtime())}"
+
+
+async def build_snapshot(class_names: list[str], label: str = "", token: Optional[str] = None,
+                         concurrency: Optional[int] = None) -> Snapshot:
+    """Snapshot every object of ``class_names`` in the current backend and save it."""
+
+    start = time.perf_counter()
+    semaphore = asyncio.Semaphore(max(1, concurrency or config.SM_SNAPSHOT_CONCURRENCY))
+    requests = len(class_names)
+    listings = await asyncio.gather(
+        *(fetch_objects(name, token, use_cache=False) for name in class_names), return_exceptions=True
+    )
+
+    links: dict[str, dict] = {}
+    errors = []
+    for class_name, objects in zip(class_names, listings):
+        if isinstance(objects, BaseException):
+            errors.append(f"{class_name}: {objects}")
+            continue
+        for obj in objects or []:
+            if not isinstance(obj, dict):
+                obj = {"path": str(obj)}
+            path = (obj.get("path") or "").rstrip("/")
+            if path:
+                links[path] = {"class": class_name, "id": obj.get("id") or "", "body": None}
+    by_key = {key: path for path, link in links.items() for key in (path, link["id"]) if key}
+    parents = {parent_path(path) for path in links} & links.keys()
+
+    async def get(url: str) -> Any:
+        nonlocal requests
+        async with semaphore:
+            requests += 1
+            return await http_get_with_token_refresh(url, token)
+
+    def url(path: str) -> str:
+        obj_id = links[path]["id"]
+        return build_object_id_url(obj_id) if obj_id else f"{get_siteminder_base_url()}{_POLICY}{path}"
+
+    async def read_expanded(path: str) -> None:
+        link = links[path]
+        body = await get(url(path) + "?op=expanded")
+        if not body:
+            return
+        link["body"] = body
+        for child in body.get("children") or []:
+            child_path = by_key.get(body_key(child) or "") if isinstance(child, dict) else None
+            if child_path and links[child_path]["body"] is None:
+                links[child_path]["body"] = child
+
+    async def read_detail(path: str) -> None:
+        links[path]["body"] = await get(url(path))
+
+    with tracing.span("snapshot.build", classes=len(class_names), objects=len(links)) as span:
+        # Parents first: their expanded bodies cover most leaves.
+        for batch, reader in ((sorted(parents), read_expanded), (None, read_detail)):
+            paths = batch if batch is not None else [p for p, link in links.items() if link["body"] is None]
+            results = await asyncio.gather(*(reader(path) for path in paths), return_exceptions=True)
+            for path, result in zip(paths, results):
+                if isinstance(result, BaseException):
+                    logger.warning(f"Snapshot read failed for {path}: {result}")
+        span.set(requests=requests)
+
+    objects: dict[str, dict] = {}
+    unread = 0
+    for path, link in links.items():
+        body = link["body"]
+        if not isinstance(body, dict) or not isinstance(body.get("data"), dict):
+            unread += 1
+            data: Any = {"_unread": True}
+        else:
+            data = canonical_value(body["data"])
+        objects[path] = {"class": link["class"], "id": link["id"], "hash": content_hash(data), "data": data}
+    if unread:
+        errors.append(f"{unread} objects could not be read")
+
+    stats = {
+        "requests": requests,
+        "seconds": round(time.perf_counter() - start, 3),
+        "errors": errors,
+    }
+    snapshot = Snapshot(snapshot_label(label), current_backend().name, objects, stats=stats)
+    await asyncio.to_thread(SNAPSHOTS.save, snapshot)
+    logger.info(
+        f"Snapshot {snapshot.label}: {len(objects)} objects from {snapshot.environment} "
+        f"with {requests} requests in {stats['seconds']:.2f}s"
+    )
+    return snapshot
+
+
+def _short(value: Any, width: int = 60) -> str:
+    text = json.dumps(value, ensure_ascii=False, default=str)
+    return text if len(text) <= width else text[:width - 3] + "..."
+
+
+def _attribute_changes(before: Any, after: Any) -> list[str]:
+    """Return ``Attr: old -> new`` for each top-level attribute that differs."""
+
+    if not isinstance(before, dict) or not isinstance(after, dict):
+        return [f"{_short(before)} -> {_short(after)}"]
+    changes = []
+    for key in sorted(before.keys() | after.keys()):
+        if before.get(key) != after.get(key):
+            old = _short(before[key]) if key in before else "(unset)"
+            new = _short(after[key]) if key in after else "(unset)"
+            changes.append(f"{key}: {old} -> {new}")
+    return changes
+
+
+def _subtree_size(snapshot: Snapshot, path: str) -> int:
+    children = snapshot.objects[path]["children"]
+    return 1 + sum(_subtree_size(snapshot, child) for paths in children.values() for child in paths)
+
+
+def diff_snapshots(before: Snapshot, after: Snapshot) -> tuple[list[dict[str, Any]], dict[str, Any]]:
+    """Return ``(changes, stats)`` turning ``before`` into ``after``.
+
+    Changes are ``{"op": "+"|"-"|"~", "path", "class", ...}``: added and
+    removed subtrees are reported once at their root with their ``objects``
+    count, changed objects with their ``attributes``.  Only class rollups and
+    subtrees whose hashes differ are visited; ``stats["compared"]`` counts the
+    objects looked at.
+    """
+
+    changes: list[dict[str, Any]] = []
+    compared = 0
+
+    def group(paths_before: list[str], paths_after: list[str]) -> None:
+        nonlocal compared
+        old, new = set(paths_before), set(paths_after)
+        for path in sorted(old | new):
+            if path not in new:
+                cls = before.objects[path]["class"]
+                changes.append({"op": "-", "path": path, "class": cls, "objects": _subtree_size(before, path)})
+            elif path not in old:
+                cls = after.objects[path]["class"]
+                changes.append({"op": "+", "path": path, "class": cls, "objects": _subtree_size(after, path)})
+            elif before.objects[path]["tree"] != after.objects[path]["tree"]:
+                node(path)
+            else:
+                compared += 1
+
+    def node(path: str) -> None:
+        nonlocal compared
+        compared += 1
+        a, b = before.objects[path], after.objects[path]
+        if a["hash"] != b["hash"]:
+            changes.append({"op": "~", "path": path, "class": b["class"],
+                            "attributes": _attribute_changes(a["data"], b["data"])})
+        for cls in sorted(a["groups"].keys() | b["groups"].keys()):
+            if a["groups"].get(cls) != b["groups"].get(cls):
+                group(a["children"].get(cls, []), b["children"].get(cls, []))
+
+    with tracing.span("snapshot.diff", before=before.label, after=after.label) as span:
+        if before.root != after.root:
+            for cls in sorted(before.classes.keys() | after.classes.keys()):
+                a, b = before.classes.get(cls), after.classes.get(cls)
+                if (a or {}).get("hash") != (b or {}).get("hash"):
+                    group((a or {}).get("paths", []), (b or {}).get("paths", []))
+        span.set(changes=len(changes), compared=compared)
+    stats = {
+        "identical": before.root == after.root,
+        "compared": compared,
+        "objects": {"before": len(before.objects), "after": len(after.objects)},
+        "changes": {op: sum(1 for c in changes if c["op"] == op) for op in ("+", "-", "~")},
+    }
+    return changes, stats
+
+
+def format_change(change: dict[str, Any]) -> str:
+    """Return one line per change (plus indented attribute lines for ``~``)."""
+
+    line = f"{change['op']} {change['class']} {change['path']}"
+    if change["op"] != "~":
+        extra = change["objects"] - 1
+        return line + (f" (and {extra} objects below)" if extra else "")
+    return "\n".join([line, *(f"    {attr}" for attr in change["attributes"])])
+
@@ -1,17 +1,33 @@
 """Helpers for constructing HTTPX clients with relaxed TLS settings."""
 
 import ssl
+from functools import lru_cache
+
 import httpx
 from ..core.config import VERIFY_SSL
 
-def create_insecure_httpx_client() -> httpx.AsyncClient:
-    """Return an ``AsyncClient`` that optionally disables SSL verification."""
+def build_ssl_context() -> ssl.SSLContext:
+    """Return a new ``SSLContext`` that optionally disables SSL verification."""
 
     ctx = ssl.create_default_context()
     ctx.set_ciphers("DEFAULT:@SECLEVEL=1")
     if not VERIFY_SSL:
         ctx.check_hostname = False
         ctx.verify_mode = ssl.CERT_NONE
+    return ctx
+
+@lru_cache(maxsize=1)
+def get_ssl_context() -> ssl.SSLContext:
+    """Return a process-wide ``SSLContext``; loading CA certs is not free."""
+
+    return build_ssl_context()
+
+def create_insecure_httpx_client() -> httpx.AsyncClient:
+    """Return a one-off ``AsyncClient`` that optionally disables SSL verification.
+
+    Prefer :func:`sm_mcp.api.http_pool.get_http_client`, which reuses
+    connections across calls.
+    """
 
-    transport = httpx.AsyncHTTPTransport(verify=ctx)
+    transport = httpx.AsyncHTTPTransport(verify=build_ssl_context())
     return httpx.AsyncClient(transport=transport)
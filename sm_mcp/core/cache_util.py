@@ -4,6 +4,34 @@ import time
 from typing import Any
 from collections import OrderedDict
 
+from cachetools import TTLCache
+
+
+class CountingTTLCache(TTLCache):
+    """``TTLCache`` that counts entries evicted for size (``evictions``) and
+    dropped on expiry (``expirations``) so they can be exported as metrics."""
+
+    def __init__(self, maxsize: int, ttl: float, **kwargs: Any) -> None:
+        super().__init__(maxsize, ttl, **kwargs)
+        self.evictions = 0
+        self.expirations = 0
+
+    def popitem(self):
+        item = super().popitem()
+        self.evictions += 1
+        return item
+
+    def expire(self, time=None):
+        expired = super().expire(time)
+        self.expirations += len(expired)
+        return expired
+
+    def clear(self) -> None:
+        # MutableMapping.clear() goes through popitem(); an explicit clear is not an eviction.
+        evictions = self.evictions
+        super().clear()
+        self.evictions = evictions
+
 class TimedCache:
     """A lightweight LRU cache where items expire after ``ttl_seconds``."""
 
@@ -12,6 +40,9 @@ class TimedCache:
         self.ttl = ttl_seconds
         # ``_store`` maps keys to ``(expiry_timestamp, value)`` tuples.
         self._store: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
 
     def get(self, key: str) -> Any | None:
         """Return a cached value if present and not expired."""
@@ -22,26 +53,48 @@ class TimedCache:
             if now < expiry:
                 # Move to end to mark as recently used
                 self._store.move_to_end(key)
+                self.hits += 1
                 return value
             # Entry expired -> remove it
             del self._store[key]
+            self.evictions += 1
+        self.misses += 1
         return None
 
-    def set(self, key: str, value: Any) -> None:
-        """Insert ``value`` into the cache under ``key``."""
+    def ttl_remaining(self, key: str) -> float | None:
+        """Return seconds until ``key`` expires, or ``None`` if absent/expired."""
+
+        entry = self._store.get(key)
+        if entry is None:
+            return None
+        remaining = entry[0] - time.time()
+        return remaining if remaining > 0 else None
+
+    def pop(self, key: str) -> Any | None:
+        """Remove ``key`` and return its value (expired or not)."""
+
+        entry = self._store.pop(key, None)
+        return entry[1] if entry else None
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        """Insert ``value`` into the cache under ``key`` (for ``ttl`` seconds, default ``ttl_seconds``)."""
 
         now = time.time()
-        self._store[key] = (now + self.ttl, value)
+        self._store[key] = (now + (self.ttl if ttl is None else ttl), value)
         self._store.move_to_end(key)
         # Remove least recently used item when exceeding ``max_size``
         if len(self._store) > self.max_size:
             self._store.popitem(last=False)
+            self.evictions += 1
 
     def clear(self) -> None:
         """Remove all cached entries."""
 
         self._store.clear()
 
+    def __len__(self) -> int:
+        return len(self._store)
+
 
 # Global instance for SiteMinder object detail caching.  These values can be
 # tuned as needed by the application.
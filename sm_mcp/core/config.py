@@ -9,8 +9,11 @@ logger = logging.getLogger(__name__)
 project_root = Path(__file__).parent.parent.parent
 env_path = project_root / ".env"
 
-# Load environment variables
-if env_path.exists():
+# Load environment variables.  SM_DOTENV=0 skips the .env file: the benchmarks
+# set it so a developer's .env cannot point them at a real policy server.
+if os.getenv("SM_DOTENV", "1").lower() in ("0", "false", "no"):
+    pass
+elif env_path.exists():
     load_dotenv(dotenv_path=env_path, override=True)
 else:
     load_dotenv(override=True)
@@ -20,6 +23,109 @@ SITE_MINDER_BASE_URL = os.getenv("SITE_MINDER_BASE_URL")
 SITE_MINDER_USERNAME = os.getenv("SITE_MINDER_USERNAME")
 SITE_MINDER_PASSWORD = os.getenv("SITE_MINDER_PASSWORD")
 VERIFY_SSL = os.getenv("VERIFY_SSL", "false").lower() == "true"
+# More SiteMinder environments in the same server: SM_BACKENDS=dev,staging,prod
+# with SM_BACKEND_<NAME>_BASE_URL / _USERNAME / _PASSWORD each.  The settings
+# above are the backend named SM_DEFAULT_BACKEND.  Fan-out calls
+# (environment="*") wait at most SM_FANOUT_TIMEOUT seconds per environment.
+SM_DEFAULT_BACKEND = os.getenv("SM_DEFAULT_BACKEND", "default")
+SM_BACKENDS = [b.strip() for b in os.getenv("SM_BACKENDS", "").split(",") if b.strip()]
+SM_FANOUT_TIMEOUT = float(os.getenv("SM_FANOUT_TIMEOUT", "60"))
+# Renew the SiteMinder session token this many seconds before it expires
+SM_TOKEN_REFRESH_MARGIN = float(os.getenv("SM_TOKEN_REFRESH_MARGIN", "60"))
+
+# Pooled HTTP client tuning (one keep-alive client per SiteMinder backend)
+SM_HTTP_MAX_CONNECTIONS = int(os.getenv("SM_HTTP_MAX_CONNECTIONS", "20"))
+SM_HTTP_MAX_KEEPALIVE = int(os.getenv("SM_HTTP_MAX_KEEPALIVE", "10"))
+SM_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("SM_HTTP_KEEPALIVE_EXPIRY", "30"))
+SM_HTTP2 = os.getenv("SM_HTTP2", "false").lower() == "true"
+# Share one upstream request between concurrent GETs of the same URL
+SM_COALESCE_GETS = os.getenv("SM_COALESCE_GETS", "true").lower() == "true"
+
+# Search detail enrichment: how many top hits to fetch, how many at once, and
+# the per-detail deadline in seconds
+SM_DETAIL_TOP_N = int(os.getenv("SM_DETAIL_TOP_N", "3"))
+SM_DETAIL_CONCURRENCY = int(os.getenv("SM_DETAIL_CONCURRENCY", "3"))
+SM_DETAIL_TIMEOUT = float(os.getenv("SM_DETAIL_TIMEOUT", "10"))
+# get_objects_by_ids: most objects per call and concurrent fetches
+SM_BATCH_MAX_IDS = int(os.getenv("SM_BATCH_MAX_IDS", "100"))
+SM_BATCH_CONCURRENCY = int(os.getenv("SM_BATCH_CONCURRENCY", "8"))
+# export_subtree: default depth and object limits, concurrent requests and the
+# approximate size of the nested document in characters
+SM_EXPORT_MAX_DEPTH = int(os.getenv("SM_EXPORT_MAX_DEPTH", "3"))
+SM_EXPORT_MAX_OBJECTS = int(os.getenv("SM_EXPORT_MAX_OBJECTS", "500"))
+SM_EXPORT_CONCURRENCY = int(os.getenv("SM_EXPORT_CONCURRENCY", "8"))
+SM_EXPORT_MAX_CHARS = int(os.getenv("SM_EXPORT_MAX_CHARS", "60000"))
+# bulk_create_objects: most payloads per call, concurrent POSTs and POSTs per
+# second (0 = no rate limit)
+SM_BULK_MAX_ITEMS = int(os.getenv("SM_BULK_MAX_ITEMS", "500"))
+SM_BULK_CONCURRENCY = int(os.getenv("SM_BULK_CONCURRENCY", "4"))
+SM_BULK_RATE = float(os.getenv("SM_BULK_RATE", "10"))
+# Default page size of list/search tools (0 returns every object)
+SM_LIST_PAGE_SIZE = int(os.getenv("SM_LIST_PAGE_SIZE", "50"))
+
+# JSON detail output: indent (0 = compact), approximate per-detail character
+# budget (0 = unlimited, ~4 characters per LLM token), encoder (auto uses
+# orjson when installed, or json) and how many rendered objects to memoize
+SM_JSON_INDENT = int(os.getenv("SM_JSON_INDENT", "2"))
+SM_DETAIL_MAX_CHARS = int(os.getenv("SM_DETAIL_MAX_CHARS", "20000"))
+SM_JSON_ENCODER = os.getenv("SM_JSON_ENCODER", "auto").lower()
+SM_JSON_MEMO_SIZE = int(os.getenv("SM_JSON_MEMO_SIZE", "256"))
+
+# Object detail cache: in-memory tier size/TTL and the optional persistent
+# SQLite tier (off by default; set a path to enable it; max age in seconds).
+# The file is emptied when the configured SiteMinder base URLs change.
+SM_DETAIL_CACHE_SIZE = int(os.getenv("SM_DETAIL_CACHE_SIZE", "100"))
+SM_DETAIL_CACHE_TTL = float(os.getenv("SM_DETAIL_CACHE_TTL", "300"))
+# After the TTL, serve the stale detail for this many seconds while one
+# background refresh runs (0 disables stale-while-revalidate)
+SM_DETAIL_STALE_GRACE = float(os.getenv("SM_DETAIL_STALE_GRACE", "120"))
+SM_DETAIL_DISK_CACHE_PATH = os.getenv("SM_DETAIL_DISK_CACHE_PATH", "")
+SM_DETAIL_DISK_CACHE_SIZE = int(os.getenv("SM_DETAIL_DISK_CACHE_SIZE", "10000"))
+SM_DETAIL_DISK_CACHE_MAX_AGE = float(os.getenv("SM_DETAIL_DISK_CACHE_MAX_AGE", "86400"))
+# Several workers on one host: "sqlite" shares the session token, a login lock
+# and cache invalidations through the persistent tier's database ("" = off).
+# A background task applies other workers' invalidations every SYNC_INTERVAL seconds;
+# a crashed worker's login lock expires after LOCK_LEASE seconds.
+SM_SHARED_CACHE = os.getenv("SM_SHARED_CACHE", "").lower()
+SM_SHARED_SYNC_INTERVAL = float(os.getenv("SM_SHARED_SYNC_INTERVAL", "0.5"))
+SM_SHARED_LOCK_LEASE = float(os.getenv("SM_SHARED_LOCK_LEASE", "30"))
+
+# Number of compiled search filter expressions kept in the LRU
+SM_FILTER_CACHE_SIZE = int(os.getenv("SM_FILTER_CACHE_SIZE", "256"))
+
+# Optional in-memory replica answering list/search tools locally
+SM_REPLICA_ENABLED = os.getenv("SM_REPLICA_ENABLED", "false").lower() == "true"
+SM_REPLICA_REFRESH_SECONDS = float(os.getenv("SM_REPLICA_REFRESH_SECONDS", "300"))
+SM_REPLICA_MAX_STALENESS = float(os.getenv("SM_REPLICA_MAX_STALENESS", "900"))
+
+# Dependency graph: background rebuild interval (0 = only on demand), how long
+# an object's indexed links are reused before its detail is re-read, and how
+# many details are fetched at once while building (seconds / count)
+SM_GRAPH_REFRESH_SECONDS = float(os.getenv("SM_GRAPH_REFRESH_SECONDS", "0"))
+SM_GRAPH_MAX_AGE = float(os.getenv("SM_GRAPH_MAX_AGE", "3600"))
+SM_GRAPH_CONCURRENCY = int(os.getenv("SM_GRAPH_CONCURRENCY", "8"))
+
+# Policy snapshots: directory of saved snapshots ("" keeps them in memory only)
+# and concurrent requests while taking one
+SM_SNAPSHOT_DIR = os.getenv("SM_SNAPSHOT_DIR", "cache_storage/snapshots")
+SM_SNAPSHOT_CONCURRENCY = int(os.getenv("SM_SNAPSHOT_CONCURRENCY", "16"))
+
+# Startup: log the per-phase cold-start profile at INFO, and load the skill
+# files and ACO index in the background instead of on first use
+SM_STARTUP_PROFILE = os.getenv("SM_STARTUP_PROFILE", "false").lower() == "true"
+SM_STARTUP_WARMUP = os.getenv("SM_STARTUP_WARMUP", "true").lower() == "true"
+# Seconds the OIDC discovery request at startup may take before startup fails
+SM_OIDC_DISCOVERY_TIMEOUT = int(os.getenv("SM_OIDC_DISCOVERY_TIMEOUT", "10"))
+
+# Expose Prometheus-format metrics at /metrics
+SM_METRICS_ENABLED = os.getenv("SM_METRICS_ENABLED", "true").lower() == "true"
+
+# Per-tool-call tracing: export "" (off), "jsonl" or "otlp"; fraction of tool
+# calls traced
+SM_TRACE_EXPORT = os.getenv("SM_TRACE_EXPORT", "")
+SM_TRACE_FILE = os.getenv("SM_TRACE_FILE", "traces/spans.jsonl")
+SM_TRACE_OTLP_ENDPOINT = os.getenv("SM_TRACE_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+SM_TRACE_SAMPLE_RATE = float(os.getenv("SM_TRACE_SAMPLE_RATE", "1.0"))
 
 # Logging & MCP Metadata
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
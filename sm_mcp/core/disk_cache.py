@@ -0,0 +1,367 @@
+"""SQLite-backed persistent cache used as a second tier behind in-memory caches.
+
+Entries are JSON values stored with the HTTP validators (``ETag`` /
+``Last-Modified``) of the response they came from, so an expired entry can be
+revalidated with a cheap conditional request instead of a full fetch.  The
+database is opened lazily on first use and runs in WAL mode.  All methods
+block, so async callers run them in a thread (``asyncio.to_thread``).
+
+:class:`SharedCache` extends the same file with what several worker
+processes on one host need to cooperate: a shared session token, a leased
+lock so only one worker logs in at a time, and a journal of invalidations
+that each worker applies to its own in-memory tier.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Access times of read entries are written in batches of this many reads, or
+# after this many seconds, instead of one UPDATE per read.
+ACCESS_FLUSH_SIZE = 256
+ACCESS_FLUSH_INTERVAL = 30.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    stored_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+)
+"""
+
+
+class CacheEntry:
+    """A cached value plus the metadata needed to revalidate it."""
+
+    __slots__ = ("key", "value", "etag", "last_modified", "stored_at")
+
+    def __init__(self, key: str, value: Any, etag: Optional[str],
+                 last_modified: Optional[str], stored_at: float) -> None:
+        self.key = key
+        self.value = value
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = stored_at
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.stored_at
+
+    def conditional_headers(self) -> dict[str, str]:
+        """Return ``If-None-Match`` / ``If-Modified-Since`` headers for this entry."""
+
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class PersistentCache:
+    """A size- and age-bounded key/value cache persisted to a SQLite file.
+
+    ``max_entries`` caps the number of rows (least recently accessed rows are
+    evicted first) and ``max_age`` drops entries that have not been stored or
+    revalidated for that many seconds.  Access times are only approximately
+    current: reads queue them and :meth:`flush_access` writes them in batches.
+
+    ``source`` identifies where the entries come from (e.g. the SiteMinder
+    base URLs).  It is stored in the database, and a file written for a
+    different source is emptied when opened.
+    """
+
+    schema = _SCHEMA
+
+    def __init__(self, path: str, max_entries: int = 10000, max_age: float = 86400,
+                 source: Optional[str] = None) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.source = source
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._writes_since_prune = 0
+        self._accessed: dict[str, float] = {}
+        self._last_flush = time.monotonic()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            # Other worker processes may hold the write lock briefly.
+            conn.execute("PRAGMA busy_timeout=5000")
+            conn.executescript(self.schema)
+            if self.source is not None:
+                self._check_source(conn)
+            self._conn = conn
+            logger.debug(f"Opened persistent cache at {self.path}")
+        return self._conn
+
+    def _check_source(self, conn: sqlite3.Connection) -> None:
+        """Empty the database if it was written for another ``source``."""
+
+        row = conn.execute("SELECT value FROM meta WHERE key = 'source'").fetchone()
+        if row is not None and row[0] == self.source:
+            return
+        if conn.execute("SELECT 1 FROM cache LIMIT 1").fetchone() is not None:
+            logger.warning(f"Persistent cache {self.path} was written for another SiteMinder server; clearing it")
+        self._drop_data(conn)
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('source', ?)", (self.source,))
+
+    def _drop_data(self, conn: sqlite3.Connection) -> None:
+        conn.execute("DELETE FROM cache")
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """Return the entry for ``key``, or ``None`` if absent or past ``max_age``."""
+
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT value, etag, last_modified, stored_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, etag, last_modified, stored_at = row
+            now = time.time()
+            if now - stored_at > self.max_age:
+                conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                return None
+            self._accessed[key] = now
+            if (len(self._accessed) >= ACCESS_FLUSH_SIZE
+                    or time.monotonic() - self._last_flush >= ACCESS_FLUSH_INTERVAL):
+                self._flush_access()
+        return CacheEntry(key, json.loads(value), etag, last_modified, stored_at)
+
+    def set(self, key: str, value: Any, etag: Optional[str] = None,
+            last_modified: Optional[str] = None) -> None:
+        """Store ``value`` with its HTTP validators."""
+
+        now = time.time()
+        with self._lock:
+            self._connect().execute(
+                "INSERT OR REPLACE INTO cache (key, value, etag, last_modified, stored_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, json.dumps(value), etag, last_modified, now, now),
+            )
+            self._writes_since_prune += 1
+            if self._writes_since_prune >= max(1, self.max_entries // 10):
+                self._prune()
+
+    def flush_access(self) -> None:
+        """Write the queued access times of read entries."""
+
+        with self._lock:
+            self._flush_access()
+
+    def _flush_access(self) -> None:
+        self._last_flush = time.monotonic()
+        if not self._accessed:
+            return
+        accessed, self._accessed = self._accessed, {}
+        self._connect().executemany(
+            "UPDATE cache SET accessed_at = ? WHERE key = ?",
+            [(at, key) for key, at in accessed.items()],
+        )
+
+    def touch(self, key: str) -> None:
+        """Mark ``key`` as freshly revalidated (e.g. after a 304)."""
+
+        now = time.time()
+        with self._lock:
+            self._connect().execute(
+                "UPDATE cache SET stored_at = ?, accessed_at = ? WHERE key = ?", (now, now, key)
+            )
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._connect().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def delete_prefix(self, prefix: str) -> int:
+        """Delete every entry whose key starts with ``prefix``; return the count."""
+
+        with self._lock:
+            cur = self._connect().execute(
+                "DELETE FROM cache WHERE substr(key, 1, ?) = ?", (len(prefix), prefix)
+            )
+            return cur.rowcount
+
+    def recent(self, limit: int, max_age: Optional[float] = None) -> list[CacheEntry]:
+        """Return up to ``limit`` most recently accessed entries younger than ``max_age``."""
+
+        cutoff = time.time() - (self.max_age if max_age is None else max_age)
+        with self._lock:
+            self._flush_access()
+            rows = self._connect().execute(
+                "SELECT key, value, etag, last_modified, stored_at FROM cache "
+                "WHERE stored_at >= ? ORDER BY accessed_at DESC LIMIT ?",
+                (cutoff, limit),
+            ).fetchall()
+        return [CacheEntry(k, json.loads(v), e, lm, s) for k, v, e, lm, s in rows]
+
+    def keys(self) -> list[str]:
+        with self._lock:
+            return [row[0] for row in self._connect().execute("SELECT key FROM cache")]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connect().execute("DELETE FROM cache")
+
+    def _prune(self) -> None:
+        """Drop expired rows and evict least recently accessed rows over ``max_entries``."""
+
+        self._flush_access()
+        conn = self._connect()
+        conn.execute("DELETE FROM cache WHERE stored_at < ?", (time.time() - self.max_age,))
+        conn.execute(
+            "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed_at DESC "
+            "LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+        self._writes_since_prune = 0
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                try:
+                    self._flush_access()
+                except sqlite3.Error:
+                    logger.exception("Failed to write cache access times")
+                self._conn.close()
+                self._conn = None
+
+
+_SHARED_SCHEMA = _SCHEMA + """;
+CREATE TABLE IF NOT EXISTS tokens (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS locks (
+    name TEXT PRIMARY KEY,
+    holder TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS invalidations (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    prefix TEXT NOT NULL,
+    origin TEXT NOT NULL,
+    at REAL NOT NULL
+)
+"""
+
+# Invalidation journal rows are kept this long; a worker that has not synced
+# for longer drops its whole in-memory tier instead.
+JOURNAL_RETENTION = 3600.0
+
+
+class SharedCache(PersistentCache):
+    """A :class:`PersistentCache` shared by the worker processes of one host.
+
+    Besides cached responses the database holds named tokens with their
+    expiry, leased locks (a crashed holder's lease simply runs out) and an
+    append-only journal of invalidated key prefixes.
+    """
+
+    schema = _SHARED_SCHEMA
+
+    def _drop_data(self, conn: sqlite3.Connection) -> None:
+        super()._drop_data(conn)
+        conn.execute("DELETE FROM tokens")
+
+    def get_token(self, name: str) -> Optional[tuple[str, float]]:
+        """Return ``(token, seconds remaining)`` for ``name``, or ``None`` if absent or expired."""
+
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT value, expires_at FROM tokens WHERE name = ?", (name,)
+            ).fetchone()
+        if row is None or row[1] <= time.time():
+            return None
+        return row[0], row[1] - time.time()
+
+    def set_token(self, name: str, value: str, ttl: float) -> None:
+        with self._lock:
+            self._connect().execute(
+                "INSERT OR REPLACE INTO tokens (name, value, expires_at) VALUES (?, ?, ?)",
+                (name, value, time.time() + ttl),
+            )
+
+    def delete_token(self, name: str, value: Optional[str] = None) -> None:
+        """Delete token ``name``; with ``value``, only if it is still that token."""
+
+        with self._lock:
+            if value is None:
+                self._connect().execute("DELETE FROM tokens WHERE name = ?", (name,))
+            else:
+                self._connect().execute("DELETE FROM tokens WHERE name = ? AND value = ?", (name, value))
+
+    def try_lock(self, name: str, holder: str, lease: float) -> bool:
+        """Take lock ``name`` for ``lease`` seconds unless another holder has it."""
+
+        now = time.time()
+        with self._lock:
+            cur = self._connect().execute(
+                "INSERT INTO locks (name, holder, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET holder = excluded.holder, expires_at = excluded.expires_at "
+                "WHERE locks.expires_at <= ? OR locks.holder = excluded.holder",
+                (name, holder, now + lease, now),
+            )
+            return cur.rowcount > 0
+
+    def release_lock(self, name: str, holder: str) -> None:
+        with self._lock:
+            self._connect().execute("DELETE FROM locks WHERE name = ? AND holder = ?", (name, holder))
+
+    def log_invalidation(self, prefix: str, origin: str) -> None:
+        """Record that keys starting with ``prefix`` were invalidated by worker ``origin``."""
+
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT INTO invalidations (prefix, origin, at) VALUES (?, ?, ?)", (prefix, origin, now)
+            )
+            conn.execute("DELETE FROM invalidations WHERE at < ?", (now - JOURNAL_RETENTION,))
+
+    def invalidations_since(self, seq: int) -> tuple[int, list[tuple[str, str]], bool]:
+        """Return ``(latest seq, [(prefix, origin), ...], gap)`` for journal rows after ``seq``.
+
+        ``gap`` is ``True`` when rows after ``seq`` were already pruned.
+        """
+
+        with self._lock:
+            conn = self._connect()
+            rows = conn.execute(
+                "SELECT seq, prefix, origin FROM invalidations WHERE seq > ? ORDER BY seq", (seq,)
+            ).fetchall()
+            oldest = conn.execute("SELECT MIN(seq) FROM invalidations").fetchone()[0]
+        gap = seq > 0 and oldest is not None and oldest > seq + 1
+        latest = rows[-1][0] if rows else seq
+        return latest, [(prefix, origin) for _, prefix, origin in rows], gap
+
+    def last_invalidation(self) -> int:
+        with self._lock:
+            row = self._connect().execute("SELECT MAX(seq) FROM invalidations").fetchone()
+        return row[0] or 0
@@ -0,0 +1,314 @@
+"""Parser and compiler for SiteMinder search filter expressions.
+
+The grammar is the one documented in each search tool's help text::
+
+    expr       := and_expr ("or" and_expr)*
+    and_expr   := term ("and" term)*
+    term       := "(" expr ")" | comparison
+    comparison := Attribute op value
+    op         := contains | = | != | > | >= | < | <=
+    value      := 'text' | "text" | number | true | false | null | bareword
+
+Expressions compile to plain Python predicates so that search can run against
+cached or replica data without a round-trip.  String comparisons are
+case-insensitive; values starting with ``#`` (SiteMinder's "unset" marker,
+see ``format_json_detail``) compare equal to ``null``.  Compiled predicates
+are kept in an LRU keyed by the expression text.
+"""
+
+import re
+from functools import lru_cache, reduce
+from typing import Any, Callable, Iterable, Optional
+
+from . import config
+
+Predicate = Callable[[dict], bool]
+
+_TOKEN_RE = re.compile(
+    r"""\s*(?:
+        (?P<lparen>\() | (?P<rparen>\)) |
+        (?P<op>!=|>=|<=|=|>|<) |
+        '(?P<squote>[^']*)' | "(?P<dquote>[^"]*)" |
+        (?P<number>-?\d+(?:\.\d+)?(?![\w.])) |
+        (?P<word>[^\s()'"=!<>]+)
+    )""",
+    re.VERBOSE,
+)
+
+_KEYWORDS = {"and", "or", "contains", "null", "true", "false"}
+
+# Link records (list/search results) carry lower-case ``name``/``desc`` keys.
+_LINK_ALIASES = {"Name": "name", "Desc": "desc"}
+
+
+class FilterExpressionError(ValueError):
+    """Raised when a filter expression is malformed or uses unknown attributes."""
+
+
+class CompiledFilter:
+    """A parsed filter expression and its compiled predicate."""
+
+    def __init__(self, expr: str, predicate: Predicate, attributes: frozenset[str],
+                 equality: Optional[tuple[str, str]] = None) -> None:
+        self.expr = expr
+        self.predicate = predicate
+        # Attribute names referenced by the expression.
+        self.attributes = attributes
+        # ``(attribute, lowered value)`` when the whole expression is ``Attr = 'x'``.
+        self.equality = equality
+
+    def __call__(self, obj: dict) -> bool:
+        return self.predicate(obj)
+
+    def validate(self, allowed: Iterable[str]) -> None:
+        """Raise :class:`FilterExpressionError` if an attribute is not in ``allowed``."""
+
+        allowed_lower = {a.lower() for a in allowed}
+        unknown = sorted(a for a in self.attributes if a.lower() not in allowed_lower)
+        if unknown:
+            raise FilterExpressionError(
+                f"Unknown attribute(s) {', '.join(unknown)}; supported: {', '.join(allowed)}"
+            )
+
+
+def _tokenize(expr: str) -> list[tuple[str, Any]]:
+    tokens: list[tuple[str, Any]] = []
+    pos = 0
+    text = expr.rstrip()
+    while pos < len(text):
+        match = _TOKEN_RE.match(text, pos)
+        if not match or match.end() == pos:
+            raise FilterExpressionError(f"Unexpected character at position {pos}: {text[pos:pos + 10]!r}")
+        pos = match.end()
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind in ("squote", "dquote"):
+            tokens.append(("string", value))
+        elif kind == "number":
+            tokens.append(("number", float(value) if "." in value else int(value)))
+        elif kind == "word" and value.lower() in _KEYWORDS:
+            tokens.append((value.lower(), value))
+        else:
+            tokens.append((kind, value))
+    return tokens
+
+
+def _getter(attr: str) -> Callable[[dict], Any]:
+    """Return a function reading ``attr`` from a detail, link record or flat dict."""
+
+    alias = _LINK_ALIASES.get(attr)
+
+    def get(obj: dict) -> Any:
+        data = obj.get("data")
+        if data.__class__ is dict:
+            obj = data
+        value = obj.get(attr)
+        if value is None and alias is not None:
+            return obj.get(alias)
+        return value
+
+    return get
+
+
+def _is_null(value: Any) -> bool:
+    return value is None or value == "" or (value.__class__ is str and value[0] == "#")
+
+
+def _as_number(value: Any) -> Optional[float]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return None
+
+
+def _as_bool(value: Any) -> Optional[bool]:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.lower() in ("true", "false"):
+        return value.lower() == "true"
+    return None
+
+
+def _comparison(attr: str, op: str, kind: str, value: Any) -> Predicate:
+    """Compile a single ``attr op value`` comparison."""
+
+    get = _getter(attr)
+
+    if kind == "null":
+        if op == "=":
+            return lambda obj: _is_null(get(obj))
+        if op == "!=":
+            return lambda obj: not _is_null(get(obj))
+        raise FilterExpressionError(f"Operator {op!r} cannot be used with null")
+
+    if op == "contains":
+        needle = str(value).lower()
+
+        def contains(obj: dict) -> bool:
+            actual = get(obj)
+            if actual.__class__ is str:
+                return actual[:1] != "#" and needle in actual.lower()
+            if _is_null(actual):
+                return False
+            if isinstance(actual, list):
+                return any(needle in str(item).lower() for item in actual)
+            return needle in str(actual).lower()
+
+        return contains
+
+    if kind in ("true", "false"):
+        if op not in ("=", "!="):
+            raise FilterExpressionError(f"Operator {op!r} cannot be used with a boolean")
+        want = kind == "true"
+        if op == "=":
+            return lambda obj: _as_bool(get(obj)) is want
+        return lambda obj: _as_bool(get(obj)) is not want
+
+    if kind == "number":
+        number = value
+        compare = {
+            "=": lambda a: a == number, "!=": lambda a: a != number,
+            ">": lambda a: a > number, ">=": lambda a: a >= number,
+            "<": lambda a: a < number, "<=": lambda a: a <= number,
+        }[op]
+
+        def numeric(obj: dict) -> bool:
+            actual = _as_number(get(obj))
+            if actual is None:
+                return op == "!="
+            return compare(actual)
+
+        return numeric
+
+    text = str(value).lower()
+    if op == "=":
+        def equals(obj: dict) -> bool:
+            actual = get(obj)
+            return not _is_null(actual) and str(actual).lower() == text
+
+        return equals
+    if op == "!=":
+        def differs(obj: dict) -> bool:
+            actual = get(obj)
+            return _is_null(actual) or str(actual).lower() != text
+
+        return differs
+    compare = {
+        ">": lambda a: a > text, ">=": lambda a: a >= text,
+        "<": lambda a: a < text, "<=": lambda a: a <= text,
+    }[op]
+
+    def ordered(obj: dict) -> bool:
+        actual = get(obj)
+        return not _is_null(actual) and compare(str(actual).lower())
+
+    return ordered
+
+
+def _both(left: Predicate, right: Predicate) -> Predicate:
+    return lambda obj: left(obj) and right(obj)
+
+
+def _either(left: Predicate, right: Predicate) -> Predicate:
+    return lambda obj: left(obj) or right(obj)
+
+
+class _Parser:
+    """Recursive-descent parser producing a predicate and the attributes it uses."""
+
+    def __init__(self, expr: str) -> None:
+        self.tokens = _tokenize(expr)
+        self.pos = 0
+        self.attributes: set[str] = set()
+        self.comparisons: list[tuple[str, str, str, Any]] = []
+
+    def peek(self) -> Optional[str]:
+        return self.tokens[self.pos][0] if self.pos < len(self.tokens) else None
+
+    def take(self) -> tuple[str, Any]:
+        if self.pos >= len(self.tokens):
+            raise FilterExpressionError("Unexpected end of filter expression")
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def parse(self) -> Predicate:
+        if not self.tokens:
+            raise FilterExpressionError("Filter expression is empty")
+        predicate = self.parse_or()
+        if self.pos != len(self.tokens):
+            raise FilterExpressionError(f"Unexpected token {self.tokens[self.pos][1]!r}")
+        return predicate
+
+    def parse_or(self) -> Predicate:
+        terms = [self.parse_and()]
+        while self.peek() == "or":
+            self.take()
+            terms.append(self.parse_and())
+        return reduce(_either, terms)
+
+    def parse_and(self) -> Predicate:
+        terms = [self.parse_term()]
+        while self.peek() == "and":
+            self.take()
+            terms.append(self.parse_term())
+        return reduce(_both, terms)
+
+    def parse_term(self) -> Predicate:
+        if self.peek() == "lparen":
+            self.take()
+            predicate = self.parse_or()
+            if self.take()[0] != "rparen":
+                raise FilterExpressionError("Missing closing parenthesis")
+            return predicate
+
+        kind, attr = self.take()
+        if kind != "word":
+            raise FilterExpressionError(f"Expected an attribute name, got {attr!r}")
+        kind, op = self.take()
+        if kind not in ("op", "contains"):
+            raise FilterExpressionError(f"Expected an operator after {attr!r}, got {op!r}")
+        op = op.lower()
+        kind, value = self.take()
+        if kind in ("lparen", "rparen", "op", "and", "or", "contains"):
+            raise FilterExpressionError(f"Expected a value after {attr} {op}, got {value!r}")
+        if kind == "word":
+            kind = "string"
+        self.attributes.add(attr)
+        self.comparisons.append((attr, op, kind, value))
+        return _comparison(attr, op, kind, value)
+
+
+@lru_cache(maxsize=config.SM_FILTER_CACHE_SIZE)
+def compile_filter(expr: str) -> CompiledFilter:
+    """Parse and compile ``expr``; results are memoized in an LRU."""
+
+    parser = _Parser(expr)
+    predicate = parser.parse()
+    equality = None
+    if len(parser.comparisons) == 1:
+        attr, op, kind, value = parser.comparisons[0]
+        if op == "=" and kind == "string":
+            equality = (attr, str(value).lower())
+    return CompiledFilter(expr, predicate, frozenset(parser.attributes), equality)
+
+
+def validate_filter(expr: str, allowed: Iterable[str]) -> CompiledFilter:
+    """Compile ``expr`` and check its attributes against ``allowed``."""
+
+    compiled = compile_filter(expr)
+    compiled.validate(allowed)
+    return compiled
+
+
+def filter_objects(objects: Iterable[dict], expr: str) -> list[dict]:
+    """Return the objects matching ``expr``."""
+
+    predicate = compile_filter(expr).predicate
+    return [obj for obj in objects if predicate(obj)]
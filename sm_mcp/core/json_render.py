@@ -0,0 +1,213 @@
+"""Fast, budget-aware JSON rendering of SiteMinder objects for tool output.
+
+SiteMinder marks unset attributes with values starting with ``#``; the
+built-in writer drops them while serializing (one pass, no pruned copy).
+With a character budget, output that fits is the same as without one.  Only
+larger objects are rewritten: scalar fields before nested sections so
+identifying attributes survive, and once the budget is spent the remaining
+members of each container are replaced by a one-line summary.  The output is
+deterministic for a given object and budget.
+
+Rendered text is memoized per object identity: cached details are shared,
+never mutated dictionaries (callers copy before annotating), so the same
+cached version is only serialized once.  When the optional ``orjson``
+package is installed, it does the unbudgeted encoding.
+"""
+
+import importlib.util
+import json
+import logging
+from collections import OrderedDict
+from json.encoder import encode_basestring
+from typing import Any
+
+from . import config
+
+logger = logging.getLogger(__name__)
+
+_orjson = None
+if config.SM_JSON_ENCODER in ("auto", "orjson"):
+    if importlib.util.find_spec("orjson") is not None:
+        import orjson as _orjson
+    elif config.SM_JSON_ENCODER == "orjson":
+        logger.warning("SM_JSON_ENCODER=orjson but 'orjson' is not installed; using the built-in encoder.")
+
+# (id(obj), indent, budget) -> (obj, text); holding ``obj`` keeps its id from being reused.
+_MEMO: "OrderedDict[tuple, tuple[Any, str]]" = OrderedDict()
+MEMO_STATS = {"hits": 0, "misses": 0}
+
+
+def is_unset(value: Any) -> bool:
+    """Return ``True`` for SiteMinder's ``#...`` placeholders of unset attributes."""
+
+    return isinstance(value, str) and value.startswith("#")
+
+
+def prune_unset(obj: Any) -> Any:
+    """Return ``obj`` without unset attributes (used for the ``orjson`` path)."""
+
+    if isinstance(obj, dict):
+        return {k: prune_unset(v) for k, v in obj.items() if not is_unset(v)}
+    if isinstance(obj, list):
+        return [prune_unset(v) for v in obj]
+    return obj
+
+
+def _scalar(value: Any) -> str:
+    if isinstance(value, str):
+        return encode_basestring(value)
+    if value is None:
+        return "null"
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    if isinstance(value, int):
+        return int.__repr__(value)
+    if isinstance(value, float):
+        return json.dumps(value)
+    return encode_basestring(str(value))
+
+
+def _write_plain(value: Any, out: list[str], indent: int, depth: int, key_sep: str) -> None:
+    """Append ``value`` (without unset attributes) to ``out``; the unbudgeted fast path."""
+
+    if isinstance(value, dict):
+        first = True
+        inner = "\n" + " " * (indent * (depth + 1)) if indent else ""
+        for key, item in value.items():
+            if isinstance(item, str):
+                if item.startswith("#"):
+                    continue
+                out.append(("{" if first else ",") + inner + encode_basestring(str(key)) + key_sep
+                           + encode_basestring(item))
+            else:
+                out.append(("{" if first else ",") + inner + encode_basestring(str(key)) + key_sep)
+                _write_plain(item, out, indent, depth + 1, key_sep)
+            first = False
+        out.append("{}" if first else ("\n" + " " * (indent * depth) if indent else "") + "}")
+    elif isinstance(value, (list, tuple)):
+        if not value:
+            out.append("[]")
+            return
+        inner = "\n" + " " * (indent * (depth + 1)) if indent else ""
+        for i, item in enumerate(value):
+            out.append(("[" if not i else ",") + inner)
+            _write_plain(item, out, indent, depth + 1, key_sep)
+        out.append(("\n" + " " * (indent * depth) if indent else "") + "]")
+    else:
+        out.append(_scalar(value))
+
+
+class _BudgetWriter:
+    """Writes JSON while tracking its length, summarizing whatever exceeds ``budget``."""
+
+    def __init__(self, indent: int, budget: int) -> None:
+        self.parts: list[str] = []
+        self.size = 0
+        self.indent = indent
+        self.budget = budget
+        self.key_sep = ": " if indent else ":"
+
+    def write(self, text: str) -> None:
+        self.parts.append(text)
+        self.size += len(text)
+
+    def newline(self, depth: int) -> str:
+        return "\n" + " " * (self.indent * depth) if self.indent else ""
+
+    def value(self, value: Any, depth: int) -> None:
+        if isinstance(value, dict):
+            self.mapping(value, depth)
+        elif isinstance(value, (list, tuple)):
+            self.sequence(value, depth)
+        else:
+            self.write(_scalar(value))
+
+    def mapping(self, obj: dict, depth: int) -> None:
+        items = [(k, v) for k, v in obj.items() if not is_unset(v)]
+        if not items:
+            self.write("{}")
+            return
+        # Scalars first, so names and ids are kept when nested sections are cut.
+        items.sort(key=lambda kv: isinstance(kv[1], (dict, list, tuple)))
+        self.write("{")
+        inner = self.newline(depth + 1)
+        for i, (key, value) in enumerate(items):
+            if i:
+                self.write(",")
+            if self.size >= self.budget:
+                rest = [str(k) for k, _ in items[i:]]
+                summary = f"{len(rest)} more keys omitted: {', '.join(rest[:8])}" + (", ..." if len(rest) > 8 else "")
+                self.write(inner + '"_truncated"' + self.key_sep + encode_basestring(summary))
+                break
+            self.write(inner + encode_basestring(str(key)) + self.key_sep)
+            self.value(value, depth + 1)
+        self.write(self.newline(depth) + "}")
+
+    def sequence(self, seq: list | tuple, depth: int) -> None:
+        if not seq:
+            self.write("[]")
+            return
+        self.write("[")
+        inner = self.newline(depth + 1)
+        for i, value in enumerate(seq):
+            if i:
+                self.write(",")
+            if self.size >= self.budget:
+                self.write(inner + encode_basestring(f"... {len(seq) - i} more items omitted"))
+                break
+            self.write(inner)
+            self.value(value, depth + 1)
+        self.write(self.newline(depth) + "]")
+
+
+def render_json(obj: Any, indent: int = 2, budget: int = 0) -> str:
+    """Serialize ``obj`` without unset attributes, truncating at about ``budget`` characters.
+
+    ``indent=0`` gives compact output.  Unless it is longer than ``budget``
+    the result matches ``json.dumps(pruned, indent=indent or None,
+    ensure_ascii=False)``.
+    """
+
+    text = _render_plain(obj, indent)
+    if budget <= 0 or len(text) <= budget:
+        return text
+    writer = _BudgetWriter(indent, budget)
+    writer.value(obj, 0)
+    return "".join(writer.parts)
+
+
+def _render_plain(obj: Any, indent: int) -> str:
+    if _orjson is not None and indent in (0, 2):
+        option = _orjson.OPT_INDENT_2 if indent else 0
+        try:
+            return _orjson.dumps(prune_unset(obj), option=option).decode()
+        except TypeError:
+            pass  # Non-JSON types or integers beyond 64 bits: use the writer.
+    out: list[str] = []
+    _write_plain(obj, out, indent, 0, ": " if indent else ":")
+    return "".join(out)
+
+
+def render_json_cached(obj: Any, indent: int = 2, budget: int = 0) -> str:
+    """:func:`render_json` memoized on the identity of ``obj`` (LRU of ``SM_JSON_MEMO_SIZE``)."""
+
+    if config.SM_JSON_MEMO_SIZE <= 0:
+        return render_json(obj, indent, budget)
+    key = (id(obj), indent, budget)
+    hit = _MEMO.get(key)
+    if hit is not None and hit[0] is obj:
+        _MEMO.move_to_end(key)
+        MEMO_STATS["hits"] += 1
+        return hit[1]
+    MEMO_STATS["misses"] += 1
+    text = render_json(obj, indent, budget)
+    _MEMO[key] = (obj, text)
+    if len(_MEMO) > config.SM_JSON_MEMO_SIZE:
+        _MEMO.popitem(last=False)
+    return text
+
+
+def clear_memo() -> None:
+    _MEMO.clear()
@@ -0,0 +1,204 @@
+"""Minimal in-process metrics registry rendered in the Prometheus text format.
+
+Counters, gauges and histograms are plain dictionaries keyed by label-value
+tuples, so recording a sample is a couple of dict operations and no locks
+(everything runs on the event loop).  Values that already live elsewhere
+(cache sizes, hit counters) are read lazily at scrape time through
+:class:`CallbackMetric` instead of being mirrored on every request.
+"""
+
+import re
+from bisect import bisect_left
+from typing import Callable, Iterable, Optional
+
+# Latency buckets in seconds, from a local cache hit up to a slow upstream call.
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labels: Iterable[str] = ()) -> None:
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}", *self.samples()]
+
+
+class Counter(_Metric):
+    """A monotonically increasing value per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: Iterable[str] = ()) -> None:
+        super().__init__(name, help_text, labels)
+        self.values: dict[tuple, float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def samples(self) -> Iterable[str]:
+        for key, value in self.values.items():
+            yield f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    """A value that can go up and down per label set."""
+
+    kind = "gauge"
+
+    def dec(self, *label_values: str, amount: float = 1) -> None:
+        self.values[label_values] = self.values.get(label_values, 0) - amount
+
+    def set(self, value: float, *label_values: str) -> None:
+        self.values[label_values] = value
+
+
+class Histogram(_Metric):
+    """Cumulative bucketed observations (e.g. latencies) per label set."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Iterable[str] = (),
+                 buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self.values: dict[tuple, list[float]] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        series = self.values.get(label_values)
+        if series is None:
+            series = self.values[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def samples(self) -> Iterable[str]:
+        for key, series in self.values.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), series):
+                cumulative += count
+                le = f'le="{_format_value(bound) if bound != float("inf") else "+Inf"}"'
+                yield f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}"
+            labels = _format_labels(self.label_names, key)
+            yield f"{self.name}_count{labels} {cumulative}"
+            yield f"{self.name}_sum{labels} {series[-1]:.6f}"
+
+
+class CallbackMetric(_Metric):
+    """A counter or gauge whose samples are produced by ``collect()`` at scrape time.
+
+    ``collect`` returns ``{label values tuple: value}``.
+    """
+
+    def __init__(self, name: str, help_text: str, labels: Iterable[str],
+                 collect: Callable[[], dict[tuple, Optional[float]]], kind: str = "gauge") -> None:
+        super().__init__(name, help_text, labels)
+        self.kind = kind
+        self.collect = collect
+
+    def samples(self) -> Iterable[str]:
+        for key, value in self.collect().items():
+            if value is not None:
+                yield f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+
+
+class Registry:
+    """Holds metrics by name and renders them for ``/metrics``."""
+
+    def __init__(self) -> None:
+        self.metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        return self.metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help_text: str, labels: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, help_text, labels))
+
+    def gauge(self, name: str, help_text: str, labels: Iterable[str] = ()) -> Gauge:
+        return self.register(Gauge(name, help_text, labels))
+
+    def histogram(self, name: str, help_text: str, labels: Iterable[str] = (),
+                  buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help_text, labels, buckets))
+
+    def callback(self, name: str, help_text: str, labels: Iterable[str],
+                 collect: Callable[[], dict[tuple, Optional[float]]], kind: str = "gauge") -> CallbackMetric:
+        return self.register(CallbackMetric(name, help_text, labels, collect, kind))
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# --- MCP side ---
+TOOL_CALLS = REGISTRY.counter(
+    "sm_mcp_tool_calls_total", "MCP tool calls by tool and outcome.", ("tool", "status"))
+TOOL_LATENCY = REGISTRY.histogram(
+    "sm_mcp_tool_duration_seconds", "MCP tool call latency.", ("tool",))
+TOOLS_IN_FLIGHT = REGISTRY.gauge(
+    "sm_mcp_tool_calls_in_flight", "MCP tool calls currently executing.")
+HTTP_IN_FLIGHT = REGISTRY.gauge(
+    "sm_mcp_http_requests_in_flight", "HTTP requests to this server currently being handled.")
+
+# --- SiteMinder side ---
+UPSTREAM_LATENCY = REGISTRY.histogram(
+    "sm_upstream_request_duration_seconds", "SiteMinder REST request latency per attempt.",
+    ("method", "endpoint"))
+UPSTREAM_RESPONSES = REGISTRY.counter(
+    "sm_upstream_responses_total",
+    "SiteMinder REST responses by status code ('error' for transport failures).",
+    ("method", "endpoint", "status"))
+UPSTREAM_RETRIES = REGISTRY.counter(
+    "sm_upstream_retries_total", "SiteMinder REST requests retried (401 refresh or error).",
+    ("method", "endpoint"))
+UPSTREAM_IN_FLIGHT = REGISTRY.gauge(
+    "sm_upstream_requests_in_flight", "SiteMinder REST requests currently outstanding.")
+
+_ID_SEGMENT = "{id}"
+_NAME_SEGMENT = "{name}"
+_POLICY_PREFIX = re.compile(r"^.*?/ca/api/sso/services/(?:policy/v1/)?")
+
+def endpoint_label(url: str) -> str:
+    """Return a low-cardinality endpoint template for a SiteMinder URL.
+
+    ``.../policy/v1/objects/CA.SM::Realm@06-1/children`` -> ``objects/{id}/children``,
+    ``.../policy/v1/SmDomains/D/SmRealms?filter=...`` -> ``SmDomains/{name}/SmRealms``.
+    """
+    path, _, query = url.partition("?")
+    segments = _POLICY_PREFIX.sub("", path).strip("/").split("/")
+    if segments and segments[0] == "login":
+        return "login"
+    for i in range(1, len(segments), 2):
+        segments[i] = _ID_SEGMENT if segments[0] == "objects" else _NAME_SEGMENT
+    label = "/".join(segments)
+    if query.startswith("op="):
+        label += "?" + query.split("&", 1)[0]
+    return label
+
+def render_metrics() -> str:
+    """Return every registered metric in the Prometheus text exposition format."""
+    return REGISTRY.render()
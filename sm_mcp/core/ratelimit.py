@@ -0,0 +1,25 @@
+"""Space async calls out to a maximum rate."""
+
+import asyncio
+import time
+
+
+class RateLimiter:
+    """Allow at most ``rate`` calls per second (``rate <= 0`` means no limit).
+
+    Calls are spaced evenly instead of being let through in bursts: each
+    caller reserves the next free slot and sleeps until it.
+    """
+
+    def __init__(self, rate: float) -> None:
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+
+    async def acquire(self) -> None:
+        if not self.interval:
+            return
+        now = time.monotonic()
+        slot = max(now, self._next)
+        self._next = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
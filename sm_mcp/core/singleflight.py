@@ -0,0 +1,56 @@
+"""Deduplicate concurrent async calls that share a key ("single flight")."""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+    """Run at most one in-flight call per key; concurrent callers share its result.
+
+    The shared work runs in its own task, so a caller being cancelled does not
+    cancel the call for everyone else waiting on it.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        # ``calls`` counts executed calls, ``shared`` counts callers that
+        # joined a call already in flight instead of starting their own.
+        self.calls = 0
+        self.shared = 0
+
+    def in_flight(self, key: Hashable) -> bool:
+        """Return ``True`` when a call for ``key`` is currently running."""
+
+        return key in self._inflight
+
+    def start(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """Return the in-flight task for ``key``, starting ``fn()`` if there is none."""
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.shared += 1
+            return task
+
+        self.calls += 1
+        task = asyncio.ensure_future(fn())
+        self._inflight[key] = task
+
+        def _done(t: asyncio.Task) -> None:
+            if self._inflight.get(key) is t:
+                del self._inflight[key]
+            # Mark the exception as retrieved even if every waiter went away.
+            if not t.cancelled():
+                t.exception()
+
+        task.add_done_callback(_done)
+        return task
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Await the shared result of ``fn()`` for ``key``."""
+
+        return await asyncio.shield(self.start(key, fn))
+
+    def stats(self) -> dict[str, int]:
+        """Return call counters."""
+
+        return {"calls": self.calls, "shared": self.shared, "in_flight": len(self._inflight)}
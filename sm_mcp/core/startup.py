@@ -0,0 +1,108 @@
+"""Cold-start profiling and background warm-up.
+
+``phase(name)`` times a block of import or initialization work; nested phases
+are recorded as ``outer/inner``.  ``warm_up`` runs deferred initialization
+(skill files, ACO index) on a daemon thread so it overlaps with the rest of
+startup, and records how long it took.  The report is logged
+once the app is ready (at INFO with ``SM_STARTUP_PROFILE=true``) and exported
+as ``sm_mcp_startup_seconds`` on ``/metrics``.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+from . import config, metrics
+
+logger = logging.getLogger(__name__)
+
+STARTED_AT = time.perf_counter()
+
+# (phase, seconds) in completion order; nested phases come before their parent.
+PHASES: list[tuple[str, float]] = []
+WARMUPS: dict[str, dict[str, Any]] = {}
+READY: dict[str, Optional[float]] = {"seconds": None}
+
+_stack: list[str] = []
+_lock = threading.Lock()
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Record how long the enclosed block takes."""
+
+    _stack.append(name)
+    full_name = "/".join(_stack)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _stack.pop()
+        PHASES.append((full_name, time.perf_counter() - start))
+
+
+def record(name: str, seconds: float) -> None:
+    """Record a phase that cannot be wrapped in :func:`phase` (e.g. across an ``async with``)."""
+
+    PHASES.append((name, seconds))
+
+
+def warm_up(name: str, fn: Callable[[], Any]) -> "Future[Any]":
+    """Run ``fn`` on a daemon thread; the returned future holds its result."""
+
+    future: "Future[Any]" = Future()
+    with _lock:
+        WARMUPS[name] = {"status": "running", "seconds": None}
+
+    def run() -> None:
+        start = time.perf_counter()
+        try:
+            result = fn()
+        except BaseException as exc:
+            WARMUPS[name] = {"status": f"failed: {exc}", "seconds": time.perf_counter() - start}
+            future.set_exception(exc)
+            return
+        WARMUPS[name] = {"status": "done", "seconds": time.perf_counter() - start}
+        future.set_result(result)
+
+    threading.Thread(target=run, name=f"warm-up-{name}", daemon=True).start()
+    return future
+
+
+def mark_ready() -> None:
+    """Record the time from this module's import until the app can serve, and log the report."""
+
+    READY["seconds"] = time.perf_counter() - STARTED_AT
+    logger.log(logging.INFO if config.SM_STARTUP_PROFILE else logging.DEBUG, format_report())
+
+
+def report() -> dict[str, Any]:
+    return {
+        "ready_seconds": READY["seconds"],
+        "phases": dict(PHASES),
+        "warm_up": {name: dict(state) for name, state in WARMUPS.items()},
+    }
+
+
+def format_report() -> str:
+    lines = [f"Startup profile (ready after {READY['seconds'] or 0:.3f}s):"]
+    for name, seconds in sorted(PHASES, key=lambda p: p[0]):
+        lines.append(f"  {name:<40} {seconds * 1000:8.1f} ms")
+    for name, state in WARMUPS.items():
+        took = f"{state['seconds'] * 1000:8.1f} ms" if state["seconds"] is not None else "     ..."
+        lines.append(f"  warm-up {name:<32} {took} ({state['status']})")
+    return "\n".join(lines)
+
+
+def _collect() -> dict[tuple, Optional[float]]:
+    samples: dict[tuple, Optional[float]] = {(name,): seconds for name, seconds in PHASES}
+    samples.update({(f"warm-up/{name}",): state["seconds"] for name, state in WARMUPS.items()})
+    samples[("ready",)] = READY["seconds"]
+    return samples
+
+
+metrics.REGISTRY.callback(
+    "sm_mcp_startup_seconds", "Time spent in each startup phase and background warm-up.", ("phase",), _collect)
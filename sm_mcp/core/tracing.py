@@ -0,0 +1,270 @@
+"""Lightweight tracing: nested spans per MCP tool call, exported as OTLP-shaped JSON.
+
+Spans are opened with :func:`span` (a context manager usable from sync and
+async code) and nest through a ``ContextVar``, so SiteMinder HTTP calls,
+token lookups and formatting made while a tool runs become children of the
+tool's root span.  When a root span ends, the finished trace is handed to the
+configured exporter:
+
+* ``SM_TRACE_EXPORT=jsonl`` appends one JSON object per span to
+  ``SM_TRACE_FILE``;
+* ``SM_TRACE_EXPORT=otlp`` POSTs OTLP/HTTP JSON to ``SM_TRACE_OTLP_ENDPOINT``
+  (an OpenTelemetry collector or any stand-in accepting ``/v1/traces``).
+
+With tracing disabled (the default) :func:`span` returns a shared no-op object
+without allocating a span.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator, Optional
+
+import httpx
+
+from . import config
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "siteminder-policy-mcp"
+
+
+class Span:
+    """A timed operation with attributes, linked to its parent and trace."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns",
+                 "attributes", "status", "error", "_root", "_trace")
+
+    def __init__(self, name: str, parent: Optional["Span"], attributes: dict[str, Any]) -> None:
+        self.name = name
+        self.span_id = f"{random.getrandbits(64):016x}"
+        if parent is None:
+            self.trace_id = f"{random.getrandbits(128):032x}"
+            self.parent_id = None
+            self._root = self
+        else:
+            self.trace_id = parent.trace_id
+            self.parent_id = parent.span_id
+            self._root = parent._root
+        # Finished spans of the trace, collected on the root until it ends.
+        self._trace: list[Span] = []
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.status = "ok"
+        self.error: Optional[str] = None
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the flat JSONL representation of the span."""
+
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_id,
+            "name": self.name,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """Returned when tracing is off or the trace is not sampled."""
+
+    __slots__ = ()
+
+    def set(self, **attributes: Any) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+# The innermost open span, ``NOOP_SPAN`` inside an unsampled trace, or ``None``.
+_current: ContextVar[Any] = ContextVar("sm_mcp_current_span", default=None)
+
+
+def _otlp_value(value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(spans: list[Span]) -> dict[str, Any]:
+    """Return an OTLP/HTTP JSON ``ExportTraceServiceRequest`` body for ``spans``."""
+
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [
+                {"key": "service.name", "value": {"stringValue": SERVICE_NAME}},
+            ]},
+            "scopeSpans": [{
+                "scope": {"name": "sm_mcp"},
+                "spans": [{
+                    "traceId": s.trace_id,
+                    "spanId": s.span_id,
+                    **({"parentSpanId": s.parent_id} if s.parent_id else {}),
+                    "name": s.name,
+                    "kind": 1,
+                    "startTimeUnixNano": str(s.start_ns),
+                    "endTimeUnixNano": str(s.end_ns),
+                    "attributes": [
+                        {"key": k, "value": _otlp_value(v)} for k, v in s.attributes.items() if v is not None
+                    ],
+                    "status": {"code": 2, "message": s.error or ""} if s.status == "error" else {"code": 1},
+                } for s in spans],
+            }],
+        }]
+    }
+
+
+class JsonlExporter:
+    """Append finished spans to a JSON Lines file, one trace per write."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def export(self, spans: list[Span]) -> None:
+        lines = "".join(json.dumps(s.to_dict(), default=str) + "\n" for s in spans)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+
+class OtlpHttpExporter:
+    """POST finished traces as OTLP/HTTP JSON without blocking the caller."""
+
+    def __init__(self, endpoint: str, timeout: float = 5.0) -> None:
+        self.endpoint = endpoint
+        self.timeout = timeout
+        self._client: Optional[httpx.AsyncClient] = None
+        self._tasks: set[asyncio.Task] = set()
+
+    def export(self, spans: list[Span]) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            logger.debug("No running event loop; dropping trace export")
+            return
+        task = loop.create_task(self._post(to_otlp(spans)))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _post(self, body: dict[str, Any]) -> None:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=self.timeout)
+        try:
+            resp = await self._client.post(self.endpoint, json=body)
+            resp.raise_for_status()
+        except Exception as e:
+            logger.warning(f"Trace export to {self.endpoint} failed: {e}")
+
+    async def aclose(self) -> None:
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def build_exporter(kind: str) -> Optional[Any]:
+    """Return the exporter for ``SM_TRACE_EXPORT`` (``jsonl``, ``otlp`` or empty)."""
+
+    kind = kind.lower()
+    if kind == "jsonl":
+        return JsonlExporter(config.SM_TRACE_FILE)
+    if kind == "otlp":
+        return OtlpHttpExporter(config.SM_TRACE_OTLP_ENDPOINT)
+    if kind:
+        logger.warning(f"Unknown SM_TRACE_EXPORT={kind!r}; tracing disabled")
+    return None
+
+
+EXPORTER = build_exporter(config.SM_TRACE_EXPORT)
+
+
+def tracing_enabled() -> bool:
+    return EXPORTER is not None
+
+
+def current_span() -> Any:
+    """Return the innermost open span (or ``NOOP_SPAN`` / ``None``)."""
+
+    return _current.get()
+
+
+@contextmanager
+def span(name: str, root: bool = False, **attributes: Any) -> Iterator[Any]:
+    """Open a child of the current span.
+
+    With ``root=True`` (used per tool call) a new trace is started when no span
+    is open, sampled with probability ``SM_TRACE_SAMPLE_RATE``; the whole trace
+    is exported when the root span closes.  Outside a trace, non-root spans are
+    no-ops, so background work is not traced on its own.
+    """
+
+    parent = _current.get()
+    if EXPORTER is None or parent is NOOP_SPAN or (parent is None and not root):
+        yield NOOP_SPAN
+        return
+    if parent is None and random.random() >= config.SM_TRACE_SAMPLE_RATE:
+        token = _current.set(NOOP_SPAN)
+        try:
+            yield NOOP_SPAN
+        finally:
+            _current.reset(token)
+        return
+
+    current = Span(name, parent, attributes)
+    token = _current.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.status = "error"
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current.reset(token)
+        current.end_ns = time.time_ns()
+        root = current._root
+        if root is current:
+            batch = [*root._trace, current]
+            root._trace = []
+        elif root.end_ns is not None:
+            # Outlived its root (e.g. a background refresh): export on its own.
+            batch = [current]
+        else:
+            root._trace.append(current)
+            batch = None
+        if batch:
+            try:
+                EXPORTER.export(batch)
+            except Exception:
+                logger.exception("Trace export failed")
+
+
+async def close_tracing() -> None:
+    """Flush pending asynchronous exports."""
+
+    if isinstance(EXPORTER, OtlpHttpExporter):
+        await EXPORTER.aclose()
@@ -0,0 +1,141 @@
+"""Ranked, load-once index over ``aco_parameters.json``.
+
+The dictionary is parsed on first use and re-read only when the file's
+modification time changes.  Parameter names are split into words
+(``FCCForceIsProtected`` -> ``fcc``, ``force``, ``is``, ``protected``) and,
+together with description words, put into an inverted index with a sorted
+vocabulary for prefix matches and ``difflib`` for typos.  Hits are scored so
+that name matches rank above description matches.
+"""
+
+import difflib
+import json
+import os
+import re
+import threading
+from bisect import bisect_left
+from typing import Any, Optional
+
+ACO_PARAMETERS_PATH = os.path.join(os.path.dirname(__file__), "aco_parameters.json")
+
+_WORD_RE = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+
+# Words too common in descriptions to say anything about a parameter.
+STOPWORDS = frozenset(
+    "a an and are as be by for from if in is it of on or see that the this to when which with".split()
+)
+
+# Score per matched query word, by field and match kind.
+NAME_WEIGHTS = {"exact": 20, "prefix": 12, "fuzzy": 6}
+DESC_WEIGHTS = {"exact": 4, "prefix": 2, "fuzzy": 1}
+
+
+def split_words(text: str) -> list[str]:
+    """Return the lowercase words of ``text``, splitting CamelCase and digits."""
+
+    return [w.lower() for w in _WORD_RE.findall(text)]
+
+
+class AcoIndex:
+    """In-memory search index over the ACO parameter dictionary."""
+
+    def __init__(self, path: str = ACO_PARAMETERS_PATH) -> None:
+        self.path = path
+        self.mtime: Optional[float] = None
+        self.params: list[dict[str, Any]] = []
+        self.by_name: dict[str, int] = {}
+        self.sorted_names: list[str] = []
+        self.name_index: dict[str, set[int]] = {}
+        self.desc_index: dict[str, set[int]] = {}
+        self.vocabulary: list[str] = []
+        self._lock = threading.Lock()
+
+    def ensure_loaded(self) -> None:
+        """(Re)build the index if the file changed since it was last read."""
+
+        mtime = os.stat(self.path).st_mtime
+        if mtime == self.mtime:
+            return
+        with self._lock:
+            if mtime == self.mtime:
+                return
+            with open(self.path, "r", encoding="utf-8") as f:
+                params = json.load(f)
+            by_name: dict[str, int] = {}
+            name_index: dict[str, set[int]] = {}
+            desc_index: dict[str, set[int]] = {}
+            for i, p in enumerate(params):
+                by_name[p["name"].lower()] = i
+                for word in split_words(p["name"]) + [p["name"].lower()]:
+                    name_index.setdefault(word, set()).add(i)
+                for word in split_words(p.get("description", "")):
+                    if word in STOPWORDS:
+                        continue
+                    desc_index.setdefault(word, set()).add(i)
+            self.params, self.by_name = params, by_name
+            self.sorted_names = sorted(by_name)
+            self.name_index, self.desc_index = name_index, desc_index
+            self.vocabulary = sorted(set(name_index) | set(desc_index))
+            self.mtime = mtime
+
+    def _expand(self, word: str) -> list[tuple[str, str]]:
+        """Return ``(vocabulary word, match kind)`` pairs for one query word."""
+
+        matches = [(word, "exact")] if word in self.name_index or word in self.desc_index else []
+        i = bisect_left(self.vocabulary, word)
+        while i < len(self.vocabulary) and self.vocabulary[i].startswith(word):
+            if self.vocabulary[i] != word:
+                matches.append((self.vocabulary[i], "prefix"))
+            i += 1
+        if not matches and len(word) >= 4:
+            matches = [(w, "fuzzy") for w in difflib.get_close_matches(word, self.vocabulary, n=3, cutoff=0.8)]
+        return matches
+
+    def search(self, query: str) -> list[tuple[float, dict[str, Any]]]:
+        """Return ``(score, parameter)`` pairs for ``query``, best first."""
+
+        self.ensure_loaded()
+        query = query.strip()
+        if not query:
+            return []
+        scores: dict[int, float] = {}
+        q = query.lower()
+        exact = self.by_name.get(q)
+        if exact is not None:
+            scores[exact] = 100.0
+        # Whole-name prefix (``AgentN`` -> ``AgentName``) from the sorted name list.
+        i = bisect_left(self.sorted_names, q)
+        while i < len(self.sorted_names) and self.sorted_names[i].startswith(q):
+            index = self.by_name[self.sorted_names[i]]
+            if index != exact:
+                scores[index] = 60.0
+            i += 1
+        for word in dict.fromkeys(split_words(query) or [q]):
+            if word in STOPWORDS and word not in self.name_index:
+                continue
+            best: dict[int, float] = {}
+            for term, kind in self._expand(word):
+                for index, weights in ((self.name_index, NAME_WEIGHTS), (self.desc_index, DESC_WEIGHTS)):
+                    for i in index.get(term, ()):
+                        best[i] = max(best.get(i, 0), weights[kind])
+            for i, score in best.items():
+                scores[i] = scores.get(i, 0) + score
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], self.params[item[0]]["name"].lower()))
+        return [(score, self.params[i]) for i, score in ranked]
+
+    def get(self, name: str) -> Optional[dict[str, Any]]:
+        """Return the parameter named ``name`` (case-insensitive)."""
+
+        self.ensure_loaded()
+        i = self.by_name.get(name.strip().lower())
+        return self.params[i] if i is not None else None
+
+    def suggest(self, name: str, n: int = 3) -> list[str]:
+        """Return the names closest to a misspelled parameter ``name``."""
+
+        self.ensure_loaded()
+        return [self.params[self.by_name[m]]["name"]
+                for m in difflib.get_close_matches(name.strip().lower(), list(self.by_name), n=n, cutoff=0.6)]
+
+
+ACO_INDEX = AcoIndex()
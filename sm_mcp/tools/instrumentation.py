@@ -0,0 +1,35 @@
+"""FastMCP middleware recording per-tool call metrics and trace spans."""
+
+import time
+
+from fastmcp.server.middleware import Middleware
+
+from ..core import metrics, tracing
+
+
+class ToolMetricsMiddleware(Middleware):
+    """Count tool calls by outcome, observe their latency and track in-flight calls."""
+
+    async def on_call_tool(self, context, call_next):
+        tool = context.message.name
+        metrics.TOOLS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        status = "error"
+        try:
+            result = await call_next(context)
+            status = "ok"
+            return result
+        finally:
+            metrics.TOOLS_IN_FLIGHT.dec()
+            metrics.TOOL_LATENCY.observe(time.perf_counter() - start, tool)
+            metrics.TOOL_CALLS.inc(tool, status)
+
+
+class ToolTracingMiddleware(Middleware):
+    """Open a root trace span per tool call; SiteMinder calls nest beneath it."""
+
+    async def on_call_tool(self, context, call_next):
+        tool = context.message.name
+        arguments = sorted((context.message.arguments or {}).keys())
+        with tracing.span(f"tool {tool}", root=True, tool=tool, arguments=",".join(arguments)):
+            return await call_next(context)
@@ -0,0 +1,97 @@
+"""In-memory cache of the Agent Skill files served to clients.
+
+``SKILL.md``, ``REFERENCE.md`` and ``ACO_REFERENCE.md`` are read and hashed
+once, and re-read only when a file's mtime or size changes.  The hashes let
+clients that already hold the current files get a small "not modified"
+answer, and the few most recent previous versions of each file are kept so a
+client holding one of them can be sent a unified diff instead of the full
+text.
+"""
+
+import difflib
+import hashlib
+import os
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+SKILL_FILES = ("SKILL.md", "REFERENCE.md", "ACO_REFERENCE.md")
+
+# Previous versions kept per file for delta delivery.
+HISTORY_SIZE = 5
+
+
+@dataclass
+class SkillFile:
+    name: str
+    content: str
+    hash: str
+    mtime: float
+    size: int
+
+
+class SkillFileCache:
+    """mtime-validated contents and md5 hashes of the skill files."""
+
+    def __init__(self, names: tuple[str, ...] = SKILL_FILES) -> None:
+        self.names = names
+        self._files: dict[str, SkillFile] = {}
+        # name -> {hash: content} of earlier versions, oldest first.
+        self._history: dict[str, dict[str, str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> SkillFile:
+        """Return ``name``, re-reading it only if it changed on disk."""
+
+        st = os.stat(name)
+        cached = self._files.get(name)
+        if cached is not None and cached.mtime == st.st_mtime and cached.size == st.st_size:
+            return cached
+        with self._lock:
+            with open(name, "r", encoding="utf-8") as f:
+                content = f.read()
+            file_hash = hashlib.md5(content.encode()).hexdigest()
+            if cached is not None and cached.hash != file_hash:
+                history = self._history.setdefault(name, {})
+                history[cached.hash] = cached.content
+                while len(history) > HISTORY_SIZE:
+                    history.pop(next(iter(history)))
+            entry = SkillFile(name, content, file_hash, st.st_mtime, st.st_size)
+            self._files[name] = entry
+            return entry
+
+    def all(self) -> list[SkillFile]:
+        return [self.get(name) for name in self.names]
+
+    def package_hash(self) -> str:
+        """Return one hash covering every skill file."""
+
+        return hashlib.md5("".join(f.hash for f in self.all()).encode()).hexdigest()
+
+    def delta(self, name: str, known_hash: str) -> Optional[str]:
+        """Return a unified diff from the version ``known_hash`` to the current one.
+
+        ``None`` when that version is unknown or the diff would not be smaller.
+        """
+
+        old = self._history.get(name, {}).get(known_hash)
+        if old is None:
+            return None
+        current = self.get(name).content
+        diff = "".join(difflib.unified_diff(
+            old.splitlines(keepends=True), current.splitlines(keepends=True),
+            fromfile=f"{name}@{known_hash[:8]}", tofile=f"{name}@{self.get(name).hash[:8]}",
+        ))
+        return diff if len(diff) < len(current) else None
+
+
+def skill_version(content: str) -> str:
+    """Return the ``version:`` field of the SKILL.md front matter."""
+
+    for line in content.split("\n"):
+        if line.startswith("version:"):
+            return line.split(":")[1].strip()
+    return "unknown"
+
+
+SKILL_CACHE = SkillFileCache()
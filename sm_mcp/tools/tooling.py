@@ -1,46 +1,104 @@
 """Tool registration for interacting with SiteMinder via FastMCP."""
 
+import asyncio
+import base64
+import heapq
 import json
 import logging
 import urllib.parse
-from typing import Optional
+from typing import Any, Awaitable, Callable, Iterable, Iterator, Optional
 
 from fastmcp import FastMCP, Context
 from fastmcp.server.auth import require_scopes
-from fastmcp.server.auth.providers.jwt import StaticTokenVerifier, JWTVerifier
-from fastmcp.server.auth.oidc_proxy import OIDCProxy
-from key_value.aio.stores.disk.store import DiskStore
+from sm_mcp.api.backends import BACKENDS, FAN_OUT, backend_names, current_backend, resolve_backend, use_backend
 from sm_mcp.api.siteminder_api import (
     get_token,
     fetch_objects,
     search_objects,
     get_object_details_from_href,
+    get_object_details_with_age,
     get_object_by_id,
     build_object_id_url,
+    object_cache_key,
+    object_id_from_key,
     show_detail_cache,
     clear_detail_cache,
     create_object,
+    get_token_stats,
+    get_coalescing_stats,
+    get_detail_cache_stats,
+)
+from sm_mcp.api.replica import REPLICA, name_from_path
+from sm_mcp.api.bulk import bulk_create
+from sm_mcp.api.dependency_graph import GRAPH
+from sm_mcp.api.snapshot import SNAPSHOTS, Snapshot, build_snapshot, diff_snapshots, format_change
+from sm_mcp.api.subtree import compact_tree, walk_subtree
+from sm_mcp.core import json_render, startup, tracing
+from sm_mcp.core.auth import build_auth_provider
+from sm_mcp.core.filter_expr import FilterExpressionError, validate_filter
+from sm_mcp.core.json_render import render_json, render_json_cached
+from sm_mcp.core.config import (
+    MCP_AUTH_DISABLED,
+    SM_BATCH_CONCURRENCY,
+    SM_BATCH_MAX_IDS,
+    SM_BULK_CONCURRENCY,
+    SM_BULK_MAX_ITEMS,
+    SM_BULK_RATE,
+    SM_DETAIL_CONCURRENCY,
+    SM_DETAIL_MAX_CHARS,
+    SM_DETAIL_TIMEOUT,
+    SM_DETAIL_TOP_N,
+    SM_EXPORT_MAX_CHARS,
+    SM_EXPORT_MAX_DEPTH,
+    SM_EXPORT_MAX_OBJECTS,
+    SM_FANOUT_TIMEOUT,
+    SM_JSON_INDENT,
+    SM_LIST_PAGE_SIZE,
+    SM_STARTUP_WARMUP,
 )
-from sm_mcp.core.config import MCP_AUTH_DISABLED
 import os
+from .aco_index import ACO_INDEX
+from .instrumentation import ToolMetricsMiddleware, ToolTracingMiddleware
+from .skill_files import SKILL_CACHE, skill_version
 from .sm_utils import default_formatter, extract_core_fields
 
+# FastMCP cannot take the auth provider lazily: OIDCProxy fetches the
+# discovery document in its constructor, and http_app() builds the OAuth
+# routes and the bearer middleware from the finished provider.  So it is
+# built here, synchronously; discovery is bounded by SM_OIDC_DISCOVERY_TIMEOUT.
+if MCP_AUTH_DISABLED:
+    logging.getLogger(__name__).info("MCP Authentication is DISABLED via MCP_AUTH_DISABLED flag")
+    auth = None
+else:
+    with startup.phase("auth"):
+        auth = build_auth_provider()
+
 # Load object classes from JSON
 registry_path = os.path.join(os.path.dirname(__file__), 'sm_registry.json')
-with open(registry_path, 'r') as f:
+with startup.phase("registry"), open(registry_path, 'r') as f:
     OBJECT_CLASSES = json.load(f)
 
+def filter_examples(obj: dict) -> list[str]:
+    """Return filter examples that only use the class's own attributes."""
+
+    examples = ["Name contains 'login'", "Desc != null"]
+    types = obj.get("attribute_types", {})
+    boolean = [attr for attr in obj["attributes"] if types.get(attr) == "boolean"]
+    numeric = [attr for attr in obj["attributes"] if types.get(attr) == "integer"]
+    if boolean:
+        examples.append(f"{boolean[0]} = true")
+    if numeric:
+        examples.append(f"{numeric[0]} > 100")
+    return examples
+
 # Attach a default formatter and help text to each object type entry.
 for name, obj in OBJECT_CLASSES.items():
     obj["formatter"] = default_formatter
     obj["help"] = (
-        f"Search SiteMinder {name} objects using a filter expression.\n\n"
+        f"Search SiteMinder {name} objects using a filter expression "
+        "(an empty filter lists every object).\n\n"
         f"Supported attributes:\n- " + "\n- ".join(obj["attributes"]) + "\n\n"
-        "Examples:\n"
-        "- Name contains 'login'\n"
-        "- Desc != null\n"
-        "- IsEnabled = true\n"
-        "- Level > 500\n"
+        "Examples:\n" + "".join(f"- {example}\n" for example in filter_examples(obj))
     )
     if "examples" in obj:
         obj["help"] += "\n" + "\n".join(obj["examples"])
@@ -48,86 +106,12 @@ for name, obj in OBJECT_CLASSES.items():
     if name == "SmAgentConfig":
         obj["help"] += "\n\nExamples:\n- Name contains 'aco_test'\n- Desc contains 'test'"
 
-# Configure authentication
-# Priority: DISABLED > IDSP (OIDC) > IDSP (JWT) > Local (Static Token) > None
-auth = None
-
-if MCP_AUTH_DISABLED:
-    logging.getLogger(__name__).info("MCP Authentication is DISABLED via MCP_AUTH_DISABLED flag")
-else:
-    idsp_oidc_url = os.getenv("IDSP_OIDC_URL")
-    idsp_jwks_uri = os.getenv("IDSP_JWKS_URI")
-    auth_token = os.getenv("MCP_AUTH_TOKEN")
-
-    if idsp_oidc_url:
-        # Use OIDCProxy for full OAuth/OIDC support
-        # This enables the MCP server to act as an OAuth Client to Broadcom IDSP
-        config_url = f"{idsp_oidc_url}/.well-known/openid-configuration"
-        # If the URL already ends with .well-known..., use it as is
-        if idsp_oidc_url.endswith("openid-configuration"):
-            config_url = idsp_oidc_url
-            
-        logging.debug(f"Initializing OIDCProxy with Config URL: {config_url}")
-        logging.debug(f"Client ID: {os.getenv('IDSP_CLIENT_ID')}")
-        logging.debug(f"Base URL: {os.getenv('MCP_BASE_URL')}")
-        
-        # Scopes to request from IDSP (Authorization)
-        requested_scopes = os.getenv("IDSP_SCOPES", "openid").split()
-        
-        # Scopes to require for Token Validation (Access)
-        # We remove 'offline_access' because it's a mechanism for getting refresh tokens,
-        # not necessarily a permission claim present in the Access Token itself.
-        validation_scopes = [s for s in requested_scopes if s != "offline_access"]
-        
-        callback_path = "/callback"
-        
-        # Public Client Configuration (PKCE)
-        # 1. token_endpoint_auth_method='none' indicates a public client
-        # 2. client_secret is required by the constructor but ignored by IDSP for public clients
-        # 3. We provide an explicit jwt_signing_key because the default is derived from the secret
-        
-        auth = OIDCProxy(
-            config_url=config_url,
-            client_id=os.getenv("IDSP_CLIENT_ID"),
-            client_secret="public-pkce-client", # Hardcoded because FastMCP requires a non-empty string
-            base_url=os.getenv("MCP_BASE_URL", "http://localhost:3123"),
-            required_scopes=validation_scopes,
-            extra_authorize_params={"scope": " ".join(requested_scopes)}, # Explicitly ask for full scopes
-            audience=os.getenv("IDSP_AUDIENCE"),
-            redirect_path=callback_path,
-            client_storage=DiskStore(directory="oauth_storage"),
-            token_endpoint_auth_method="none",
-            jwt_signing_key=os.getenv("JWT_SIGNING_KEY", "change-me-in-production"),
-            require_authorization_consent=False # For dev/automated flow
-        )
-        full_callback = f"{os.getenv('MCP_BASE_URL', 'http://localhost:3123')}{callback_path}"
-        logging.getLogger(__name__).info(f"Configured IDSP OIDC Public Client (PKCE). Callback URL: {full_callback}")
-        logging.debug(f"Requested Scopes: {requested_scopes}")
-        logging.debug(f"Validation Scopes: {validation_scopes}")
-
-    elif idsp_jwks_uri:
-        auth = JWTVerifier(
-            jwks_uri=idsp_jwks_uri,
-            issuer=os.getenv("IDSP_ISSUER"),
-            audience=os.getenv("IDSP_AUDIENCE")
-        )
-        logging.getLogger(__name__).info("Configured IDSP JWT Authentication")
-    elif auth_token:
-        auth = StaticTokenVerifier(
-            tokens={
-                auth_token: {
-                    "client_id": "cursor-client",
-                    "scopes": ["all"]
-                }
-            }
-        )
-        logging.getLogger(__name__).info("Configured Static Token Authentication")
-
-
 mcp = FastMCP(
     "siteminder-policy-assistant",
     auth=auth
 )
+mcp.add_middleware(ToolMetricsMiddleware())
+mcp.add_middleware(ToolTracingMiddleware())
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
@@ -168,31 +152,258 @@ def normalize_name(obj: dict) -> dict:
             obj["name"] = "(unknown)"
     return obj
 
-def format_json_detail(detail: dict) -> str:
-    """Return the detail dictionary formatted as a fenced JSON block."""
+def format_json_detail(detail: dict, max_chars: int = SM_DETAIL_MAX_CHARS) -> str:
+    """Return the detail dictionary formatted as a fenced JSON block.
 
-    # Recursively remove any dict entries where the value starts with #
-    def remove_unset_values(obj):
-        if isinstance(obj, dict):
-            return {k: remove_unset_values(v) for k, v in obj.items() if not (isinstance(v, str) and v.startswith("#"))}
-        elif isinstance(obj, list):
-            return [remove_unset_values(elem) for elem in obj]
-        else:
-            return obj
+    Unset (``#...``) attributes are dropped and output beyond about
+    ``max_chars`` characters is summarized (0 = unlimited).  The rendering of
+    a cached detail is memoized, so repeated calls do not re-serialize it.
+    """
+
+    with tracing.span("format_json_detail") as span:
+        text = "```json\n" + render_json_cached(detail, SM_JSON_INDENT, max(0, max_chars)) + "\n```"
+        span.set(bytes=len(text))
+    return text
 
-    return "```json\n" + json.dumps(remove_unset_values(detail), indent=2) + "\n```"
+async def fetch_and_cache_details(
+    hrefs: list[str],
+    token: str,
+    output: list[str],
+    top_n: int = SM_DETAIL_TOP_N,
+    concurrency: int = SM_DETAIL_CONCURRENCY,
+    timeout: float = SM_DETAIL_TIMEOUT,
+    on_progress: Optional[Callable[[int, int], Awaitable[None]]] = None,
+) -> None:
+    """Fetch details for the first ``top_n`` hrefs concurrently and append to ``output``.
 
-async def fetch_and_cache_details(hrefs: list[str], token: str, output: list[str]) -> None:
-    """Fetch details for the first few hrefs and append to ``output``."""
+    At most ``concurrency`` fetches run at once and each one must finish within
+    ``timeout`` seconds of starting; slow details are skipped with a note so the rest are
+    still returned.  Details are appended in the same order as ``hrefs``.
+    ``on_progress(done, total)`` is awaited as each fetch completes.
+    """
 
-    for href in hrefs[:3]:  # Only top 3 to keep responses concise
+    selected = hrefs[:top_n]  # Only the top few to keep responses concise
+    if not selected:
+        return
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    done = 0
+
+    async def fetch_one(href: str) -> tuple[dict, float, bool]:
+        nonlocal done
         try:
-            detail = await get_object_details_from_href(href, token)
-            if detail:
+            async with semaphore:
+                # The deadline starts once a slot is free, so queued hrefs do not time out
+                return await asyncio.wait_for(get_object_details_with_age(href, token), timeout)
+        finally:
+            done += 1
+            if on_progress is not None:
+                await on_progress(done, len(selected))
+
+    with tracing.span("fetch_details", count=len(selected), concurrency=concurrency):
+        results = await asyncio.gather(*(fetch_one(href) for href in selected), return_exceptions=True)
+    for href, detail in zip(selected, results):
+        if isinstance(detail, asyncio.TimeoutError):
+            logger.warning(f"Detail fetch timed out after {timeout}s for href: {href}")
+            output.append(f"\n Detail skipped (timed out after {timeout:g}s): {href}")
+        elif isinstance(detail, BaseException):
+            logger.warning(f"Failed to fetch detail for href: {href}, error: {detail}")
+        elif detail[0]:
+            detail, age, stale = detail
+            if stale:
+                output.append(f"\n Detail (stale, {age:.0f}s old; refreshing in background):")
+            elif age >= 1:
+                output.append(f"\n Detail (cached {age:.0f}s ago):")
+            else:
                 output.append("\n Detail:")
-                output.append(format_json_detail(detail))
-        except Exception as e:
-            logger.warning(f"Failed to fetch detail for href: {href}, error: {e}")
+            output.append(format_json_detail(detail))
+
+# --- Paging ---
+
+def record_sort_key(record: Any) -> tuple[str, str]:
+    """Return the ``(name, id)`` key list and search results are ordered by."""
+
+    if not isinstance(record, dict):
+        return (name_from_path(str(record)).casefold(), str(record))
+    path = record.get("path")
+    name = name_from_path(path) if path else str(record.get("name", ""))
+    return (name.casefold(), str(record.get("id") or path or ""))
+
+def encode_cursor(key: tuple[str, str]) -> str:
+    """Return an opaque cursor pointing just after the record with sort ``key``."""
+
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple[str, str]:
+    """Inverse of :func:`encode_cursor`; raises ``ValueError`` for malformed cursors."""
+
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except Exception as exc:
+        raise ValueError(f"malformed cursor {cursor!r}") from exc
+    if not (isinstance(key, list) and len(key) == 2 and all(isinstance(k, str) for k in key)):
+        raise ValueError(f"malformed cursor {cursor!r}")
+    return key[0], key[1]
+
+def paginate(records: Iterable[Any], limit: int, cursor: str = "") -> tuple[list[Any], Optional[str], int]:
+    """Return one page of ``records`` in name order, the next cursor and the total count.
+
+    The cursor encodes the sort key of the last returned record, so pages stay
+    consistent when objects are added or removed between calls.  Only the page
+    is sorted (a bounded heap), not the whole class.  ``limit <= 0`` returns
+    every record after the cursor.
+    """
+
+    after = decode_cursor(cursor) if cursor else None
+    keyed = [(record_sort_key(r), i, r) for i, r in enumerate(records)]
+    total = len(keyed)
+    if after is not None:
+        keyed = [item for item in keyed if item[0] > after]
+    if limit <= 0 or len(keyed) <= limit:
+        page = sorted(keyed, key=lambda item: item[:2])
+        return [r for _, _, r in page], None, total
+    page = heapq.nsmallest(limit, keyed, key=lambda item: item[:2])
+    return [r for _, _, r in page], encode_cursor(page[-1][0]), total
+
+def format_records(records: Iterable[Any], formatter: Callable[[dict], str]) -> Iterator[str]:
+    """Yield each record formatted, normalizing a copy (records may be cached or shared)."""
+
+    for r in records:
+        # SiteMinder 12.9 may return strings instead of dicts.
+        yield formatter(normalize_name(dict(r) if isinstance(r, dict) else {"name": str(r), "path": str(r)}))
+
+def page_note(obj_type: str, shown: int, total: int, next_cursor: Optional[str], offset_hint: str = "") -> str:
+    """Return the footer describing the page and how to request the next one."""
+
+    note = f"Showing {shown} of {total} {obj_type} objects{offset_hint} (sorted by name)."
+    if next_cursor:
+        note += f' More results: call again with cursor="{next_cursor}".'
+    return note
+
+async def report_progress(ctx: Optional[Context], progress: float, total: float, message: str) -> None:
+    """Send a progress notification, ignoring clients that cannot receive it."""
+
+    if ctx is None:
+        return
+    try:
+        await ctx.report_progress(progress, total, message)
+    except Exception as e:
+        logger.debug(f"Progress notification failed: {e}")
+
+# --- Environments ---
+
+ENVIRONMENT_DOC = (
+    "\nSet `environment` to run against another configured SiteMinder backend "
+    "(see list_environments); empty means the default one."
+)
+FAN_OUT_DOC = ' environment="*" queries every backend concurrently and merges the results.'
+
+def is_fan_out(environment: str) -> bool:
+    return environment.strip() in FAN_OUT
+
+def replica_fresh(obj_type: str) -> bool:
+    """Return ``True`` when the replica (which mirrors the default backend) can serve ``obj_type``."""
+
+    return current_backend().is_default and REPLICA.is_fresh(obj_type)
+
+async def in_environment(
+    environment: str,
+    fn: Callable[[], Awaitable[Any]],
+    on_error: Callable[[str], Any] = lambda message: f" {message}",
+) -> Any:
+    """Await ``fn()`` against backend ``environment``; unknown names return ``on_error(message)``."""
+
+    try:
+        backend = resolve_backend(environment)
+    except ValueError as e:
+        return on_error(str(e))
+    with use_backend(backend.name):
+        return await fn()
+
+def raise_value_error(message: str) -> Any:
+    """``on_error`` for :func:`in_environment` callers that want an exception."""
+
+    raise ValueError(message)
+
+async def fan_out(fn: Callable[[], Awaitable[Any]]) -> list[tuple[str, Any]]:
+    """Await ``fn()`` against every backend concurrently.
+
+    Each call is bounded by ``SM_FANOUT_TIMEOUT``; failures are returned in
+    place of the result so one unreachable environment does not hide the
+    others.
+    """
+
+    async def run(name: str) -> Any:
+        with use_backend(name):
+            return await asyncio.wait_for(fn(), SM_FANOUT_TIMEOUT)
+
+    names = backend_names()
+    with tracing.span("fan_out", backends=len(names)):
+        results = await asyncio.gather(*(run(name) for name in names), return_exceptions=True)
+    return list(zip(names, results))
+
+def fan_out_error(error: BaseException) -> str:
+    if isinstance(error, asyncio.TimeoutError):
+        return f"timed out after {SM_FANOUT_TIMEOUT:g}s"
+    return str(error) or type(error).__name__
+
+def merge_environments(results: list[tuple[str, Any]]) -> tuple[list[Any], dict[int, list[str]], list[str]]:
+    """Merge per-backend record lists on the object path (or name).
+
+    Returns the merged records (the first backend's copy of each object), the
+    backends each one was found in keyed by ``id(record)``, and one status
+    line per backend.
+    """
+
+    merged: dict[str, Any] = {}
+    found: dict[str, list[str]] = {}
+    status = []
+    for name, records in results:
+        if isinstance(records, BaseException):
+            status.append(f"{name}: ERROR {fan_out_error(records)}")
+            continue
+        records = records or []
+        status.append(f"{name}: {len(records)}")
+        for record in records:
+            path = record.get("path") if isinstance(record, dict) else None
+            key = str(path).casefold() if path else record_sort_key(record)[0]
+            merged.setdefault(key, record)
+            if name not in found.setdefault(key, []):
+                found[key].append(name)
+    return list(merged.values()), {id(merged[key]): names for key, names in found.items()}, status
+
+def format_fan_out(
+    obj_type: str,
+    results: list[tuple[str, Any]],
+    formatter: Callable[[dict], str],
+    limit: int,
+    cursor: str,
+) -> str:
+    """Return one page of merged fan-out results, each tagged with its environments."""
+
+    records, found, status = merge_environments(results)
+    queried = [name for name, result in results if not isinstance(result, BaseException)]
+    header = f"{obj_type} objects per environment: " + "; ".join(status)
+    if not records:
+        return f"{header}\n\nNo {obj_type} objects found."
+    page, next_cursor, total = paginate(records, limit, cursor)
+    output = [header]
+    for record, text in zip(page, format_records(page, formatter)):
+        names = found[id(record)]
+        text += "\nENVIRONMENTS: " + ", ".join(names)
+        missing = [name for name in queried if name not in names]
+        if missing:
+            text += f" (missing from: {', '.join(missing)})"
+        output.append(text)
+    output.append(page_note(obj_type, len(page), total, next_cursor))
+    return "\n\n".join(output)
+
+async def fetch_with_token(fetch: Callable[[str], Awaitable[Any]]) -> Any:
+    """Await ``fetch(token)`` with the current backend's session token."""
+
+    token = await ensure_token()
+    if not token:
+        raise RuntimeError("Failed to get session token.")
+    return await fetch(token)
 
 # --- Tool Registration ---
 
@@ -206,56 +417,127 @@ def register_object_tools(obj_type: str) -> None:
     if obj_type == "SmAgentConfig":
         help_text = help_text.replace("Agent Configuration Object", "Agent Configuration Object (ACO)")
 
-    list_doc = f"Show a summary of all SiteMinder {obj_type} objects."
+    paging_doc = (
+        f"\n\nResults are sorted by name and paged: at most `limit` objects are returned "
+        f"(default {SM_LIST_PAGE_SIZE}, 0 for all); pass the returned `cursor` to get the next page."
+        "\nSet live=true to bypass the local replica (when enabled) and query SiteMinder directly."
+        + ENVIRONMENT_DOC + FAN_OUT_DOC
+    )
+    list_doc = f"Show a summary of all SiteMinder {obj_type} objects." + paging_doc
+    help_text += paging_doc + " Details are only fetched for a single environment."
 
-    async def list_tool() -> str:
-        token = await ensure_token()
-        if not token:
-            return " Failed to get session token."
+    async def list_tool(
+        ctx: Context,
+        live: bool = False,
+        limit: int = SM_LIST_PAGE_SIZE,
+        cursor: str = "",
+        environment: str = "",
+    ) -> str:
         try:
-            results = await fetch_objects(obj_type, token)
-            if not results:
-                return f"No {obj_type} objects found."
-            
-            # SiteMinder 12.9 may return strings instead of dicts. 
-            # We normalize them into dicts before formatting.
-            processed = [
-                normalize_name(r if isinstance(r, dict) else {"name": str(r), "path": str(r)})
-                for r in results
-            ]
-            return "\n\n".join(formatter(o) for o in processed)
-        except Exception as e:
-            logger.exception("List operation failed")
-            return f" Error fetching {obj_type} objects: {e}"
+            if cursor:
+                decode_cursor(cursor)
+        except ValueError as e:
+            return f" Invalid cursor: {e}"
+
+        if is_fan_out(environment):
+            await report_progress(ctx, 0, 1, f"Fetching {obj_type} objects from {len(BACKENDS)} environments")
+            results = await fan_out(lambda: fetch_with_token(lambda token: fetch_objects(obj_type, token)))
+            return format_fan_out(obj_type, results, formatter, limit, cursor)
+        return await in_environment(environment, lambda: list_one(ctx, live, limit, cursor))
+
+    async def list_one(ctx: Context, live: bool, limit: int, cursor: str) -> str:
+        note = None
+        if not live and replica_fresh(obj_type):
+            results = REPLICA.list_objects(obj_type)
+            note = REPLICA.staleness_note()
+        else:
+            token = await ensure_token()
+            if not token:
+                return " Failed to get session token."
+            try:
+                await report_progress(ctx, 0, 2, f"Fetching {obj_type} objects")
+                results = await fetch_objects(obj_type, token)
+            except Exception as e:
+                logger.exception("List operation failed")
+                return f" Error fetching {obj_type} objects: {e}"
+        if not results:
+            return "\n".join(filter(None, [f"No {obj_type} objects found.", note]))
+
+        await report_progress(ctx, 1, 2, f"Formatting {obj_type} objects")
+        page, next_cursor, total = paginate(results, limit, cursor)
+        output = list(format_records(page, formatter))
+        output.append(page_note(obj_type, len(page), total, next_cursor))
+        if note:
+            output.append(note)
+        await report_progress(ctx, 2, 2, f"Returned {len(page)} of {total} {obj_type} objects")
+        return "\n\n".join(output)
 
     mcp.tool(
         name=f"list_{obj_type.lower()}_summary",
         description=list_doc
     )(list_tool)
 
-    async def search_tool(filter_expression: str, ctx: Context) -> str:
+    async def search_tool(
+        filter_expression: str,
+        ctx: Context,
+        live: bool = False,
+        limit: int = SM_LIST_PAGE_SIZE,
+        cursor: str = "",
+        environment: str = "",
+    ) -> str:
+        # Reject malformed filters and cursors before any network call.
+        # An empty filter is a plain listing, as the REST API treats it.
+        filter_expression = filter_expression.strip()
+        try:
+            if filter_expression:
+                validate_filter(filter_expression, config["attributes"])
+        except FilterExpressionError as e:
+            return f" Invalid filter for {obj_type}: {e}"
+        try:
+            if cursor:
+                decode_cursor(cursor)
+        except ValueError as e:
+            return f" Invalid cursor: {e}"
+
+        if is_fan_out(environment):
+            await ctx.info(f"Searching {obj_type} in {len(BACKENDS)} environments with filter: {filter_expression}")
+            results = await fan_out(
+                lambda: fetch_with_token(lambda token: search_objects(obj_type, token, filter_expression))
+            )
+            return format_fan_out(obj_type, results, formatter, limit, cursor)
+        return await in_environment(environment, lambda: search_one(filter_expression, ctx, live, limit, cursor))
+
+    async def search_one(filter_expression: str, ctx: Context, live: bool, limit: int, cursor: str) -> str:
         token = await ensure_token()
         if not token:
             return " Failed to get session token."
         try:
             await ctx.info(f"Searching {obj_type} with filter: {filter_expression}")
-            raw_results = await search_objects(obj_type, token, filter_expression) or []
+            local_results = None
+            if not live and replica_fresh(obj_type):
+                local_results = REPLICA.search(obj_type, filter_expression)
+            if local_results is not None:
+                raw_results = local_results
+            else:
+                await report_progress(ctx, 0, 1, f"Searching {obj_type}")
+                raw_results = await search_objects(obj_type, token, filter_expression) or []
             if not raw_results:
                 return f"No {obj_type} objects matched this filter."
-            
-            await ctx.info(f"Found {len(raw_results)} results. Fetching details...")
-            
-            processed = [
-                normalize_name(r if isinstance(r, dict) else {"name": str(r), "path": str(r)})
-                for r in raw_results
-            ]
 
-            output = [formatter(r) for r in processed]
-            hrefs = [r.get("href") for r in processed if r.get("href")]
-            
-            # Progress reporting could be granular here, but for now just logging
-            await fetch_and_cache_details(hrefs, token, output)
-            
+            page, next_cursor, total = paginate(raw_results, limit, cursor)
+            await ctx.info(f"Found {total} results. Fetching details...")
+
+            output = list(format_records(page, formatter))
+            output.append(page_note(obj_type, len(page), total, next_cursor))
+            hrefs = [r.get("href") for r in page if isinstance(r, dict) and r.get("href")]
+
+            async def detail_progress(done: int, count: int) -> None:
+                await report_progress(ctx, done, count, f"Fetched {done} of {count} details")
+
+            await fetch_and_cache_details(hrefs, token, output, on_progress=detail_progress)
+
+            if local_results is not None:
+                output.append(REPLICA.staleness_note())
             logger.debug(f"output returned: {output}")
             return "\n\n".join(output)
         except Exception as e:
@@ -267,33 +549,210 @@ def register_object_tools(obj_type: str) -> None:
         description=help_text
     )(search_tool)
 
-@mcp.tool(name="get_object_by_id", description="Fetch a SiteMinder object by its ID and return full detail.")
-async def get_object_by_id_tool(id: str) -> str:
+@mcp.tool(
+    name="get_object_by_id",
+    description=(
+        "Fetch a SiteMinder object by its ID and return full detail. "
+        f"Output beyond max_chars characters (default {SM_DETAIL_MAX_CHARS}, 0 for unlimited) "
+        "is summarized." + ENVIRONMENT_DOC + ' environment="*" returns the object from every backend.'
+    ),
+)
+async def get_object_by_id_tool(id: str, max_chars: int = SM_DETAIL_MAX_CHARS, environment: str = "") -> str:
     """Return the raw JSON for a SiteMinder object by id."""
 
+    if is_fan_out(environment):
+        results = await fan_out(lambda: fetch_with_token(lambda token: get_object_by_id(id, token)))
+        sections = []
+        for name, detail in results:
+            if isinstance(detail, BaseException):
+                sections.append(f"## {name}\n ERROR: {fan_out_error(detail)}")
+            elif detail:
+                sections.append(f"## {name}\n" + format_json_detail(detail, max_chars))
+            else:
+                sections.append(f"## {name}\n No object found with ID: {id}")
+        found = sum(1 for _, detail in results if detail and not isinstance(detail, BaseException))
+        return "\n\n".join([f"Found {id} in {found} of {len(results)} environments.", *sections])
+    return await in_environment(environment, lambda: get_one_object(id, max_chars))
+
+async def get_one_object(id: str, max_chars: int) -> str:
     token = await ensure_token()
     if not token:
         return " Failed to get session token."
     try:
         detail = await get_object_by_id(id, token)
         if detail:
-            return format_json_detail(detail)
+            return format_json_detail(detail, max_chars)
         else:
             return f" No object found with ID: {id}"
     except Exception as e:
         logger.exception("Error retrieving object by ID")
         return f" Error retrieving object with ID {id}: {e}"
 
+@mcp.tool(
+    name="get_objects_by_ids",
+    description=(
+        "Fetch several SiteMinder objects at once by ID or href and return them as compact JSON. "
+        f"Duplicates are removed, cached objects are served from cache and at most {SM_BATCH_MAX_IDS} "
+        "objects are fetched per call; failures are reported per item. "
+        "Prefer this over repeated get_object_by_id calls." + ENVIRONMENT_DOC
+    ),
+)
+async def get_objects_by_ids_tool(
+    ids: list[str],
+    ctx: Context,
+    max_chars_per_object: int = SM_DETAIL_MAX_CHARS,
+    environment: str = "",
+) -> str:
+    """Return the details of many objects in one response."""
+
+    return await in_environment(environment, lambda: get_objects(ids, ctx, max_chars_per_object))
+
+async def get_objects(ids: list[str], ctx: Context, max_chars_per_object: int) -> str:
+    # Dedupe on the canonical cache key, so an id and its href count once.
+    unique: dict[str, str] = {}
+    for item in ids:
+        item = item.strip()
+        if not item:
+            continue
+        href = item if item.startswith("http") else build_object_id_url(item)
+        unique.setdefault(object_cache_key(href), href)
+    if not unique:
+        return " No object IDs given."
+    if len(unique) > SM_BATCH_MAX_IDS:
+        return f" Too many objects ({len(unique)}); at most {SM_BATCH_MAX_IDS} per call."
+
+    token = await ensure_token()
+    if not token:
+        return " Failed to get session token."
+
+    semaphore = asyncio.Semaphore(max(1, SM_BATCH_CONCURRENCY))
+    done = 0
+
+    async def fetch_one(href: str) -> dict:
+        nonlocal done
+        try:
+            async with semaphore:
+                return await asyncio.wait_for(get_object_details_from_href(href, token), SM_DETAIL_TIMEOUT)
+        finally:
+            done += 1
+            await report_progress(ctx, done, len(unique), f"Fetched {done} of {len(unique)} objects")
+
+    with tracing.span("fetch_batch", count=len(unique), concurrency=SM_BATCH_CONCURRENCY):
+        results = await asyncio.gather(*(fetch_one(href) for href in unique.values()), return_exceptions=True)
+
+    sections = []
+    failed = 0
+    for (key, href), detail in zip(unique.items(), results):
+        label = object_id_from_key(key)
+        if isinstance(detail, asyncio.TimeoutError):
+            error = f"timed out after {SM_DETAIL_TIMEOUT:g}s"
+        elif isinstance(detail, BaseException):
+            error = str(detail) or type(detail).__name__
+        elif not detail:
+            error = "not found or could not be fetched"
+        else:
+            sections.append(f"## {label}\n" + render_json_cached(detail, 0, max(0, max_chars_per_object)))
+            continue
+        failed += 1
+        logger.warning(f"Batch fetch failed for {href}: {error}")
+        sections.append(f"## {label}\n ERROR: {error}")
+
+    duplicates = len([i for i in ids if i.strip()]) - len(unique)
+    summary = f"Fetched {len(unique) - failed} of {len(unique)} objects"
+    if duplicates:
+        summary += f" ({duplicates} duplicates removed)"
+    if failed:
+        summary += f", {failed} failed"
+    return "\n\n".join([summary + ".", *sections])
+
+@mcp.tool(
+    name="export_subtree",
+    description=(
+        "Export a SiteMinder object and everything below it (e.g. domain -> realms -> rules, "
+        "policies, responses) in one call, fetched level by level in parallel. "
+        f"max_depth (default {SM_EXPORT_MAX_DEPTH}) and max_objects (default {SM_EXPORT_MAX_OBJECTS}) "
+        "bound the walk; include_details=false returns only the tree of names and ids. "
+        "By default a compact nested JSON document is returned; set page_size > 0 to get the "
+        "objects as flat JSON lines (with parent ids), one page at a time." + ENVIRONMENT_DOC
+    ),
+)
+async def export_subtree_tool(
+    root_id: str,
+    ctx: Context,
+    max_depth: int = SM_EXPORT_MAX_DEPTH,
+    max_objects: int = SM_EXPORT_MAX_OBJECTS,
+    include_details: bool = True,
+    page: int = 0,
+    page_size: int = 0,
+    max_chars: int = SM_EXPORT_MAX_CHARS,
+    environment: str = "",
+) -> str:
+    """Return the subtree below ``root_id`` as nested JSON or paged JSON lines."""
+
+    return await in_environment(environment, lambda: export_subtree(
+        root_id, ctx, max_depth, max_objects, include_details, page, page_size, max_chars
+    ))
+
+async def export_subtree(
+    root_id: str,
+    ctx: Context,
+    max_depth: int,
+    max_objects: int,
+    include_details: bool,
+    page: int,
+    page_size: int,
+    max_chars: int,
+) -> str:
+    token = await ensure_token()
+    if not token:
+        return " Failed to get session token."
+    if root_id.startswith("http"):
+        root_id = object_id_from_key(object_cache_key(root_id))
+
+    async def level_progress(depth: int, count: int) -> None:
+        await report_progress(ctx, depth + 1, max(0, max_depth) + 1, f"Exported {count} objects to depth {depth}")
+
+    try:
+        root, nodes, stats = await walk_subtree(
+            root_id, max(0, max_depth), max(1, max_objects), include_details, token=token, on_level=level_progress
+        )
+    except Exception as e:
+        logger.exception("Subtree export failed")
+        return f" Error exporting subtree of {root_id}: {e}"
+    if root["data"] is None and not root["children"] and include_details:
+        return f" No object found with ID: {root_id}"
+
+    summary = (
+        f"Subtree of {root['class']} '{root['name']}': {stats['objects']} objects, "
+        f"{stats['requests']} requests ({stats['expanded_hits']} details from ?op=expanded)"
+    )
+    if stats["truncated"]:
+        summary += f"; stopped at max_objects={max_objects}"
+    if stats["errors"]:
+        summary += f"; {stats['errors']} objects could not be fetched"
+
+    if page_size > 0:
+        pages = (len(nodes) + page_size - 1) // page_size
+        chunk = nodes[page * page_size:(page + 1) * page_size]
+        lines = [
+            render_json({k: v for k, v in node.items() if k != "children" and v is not None}, 0)
+            for node in chunk
+        ]
+        more = f' Next: page={page + 1}.' if page + 1 < pages else ""
+        return f"{summary}. Page {page} of {pages} (0-based).{more}\n" + "\n".join(lines)
+    return f"{summary}.\n```json\n" + render_json(compact_tree(root), 0, max(0, max_chars)) + "\n```"
+
 @mcp.tool(
     name="create_sm_agent", 
-    description="Create a new SiteMinder Web Agent.",
+    description="Create a new SiteMinder Web Agent." + ENVIRONMENT_DOC,
     auth=require_scopes("siteminder:write")
 )
 async def create_sm_agent_tool(
     name: str,
     agent_type_href: str,
     description: str = "",
-    realm_hint_attr_id: int = 0
+    realm_hint_attr_id: int = 0,
+    environment: str = "",
 ) -> str:
     """Create a new SmAgent object.
     
@@ -302,7 +761,13 @@ async def create_sm_agent_tool(
         agent_type_href: The full href link to the AgentType (e.g., .../SmAgentTypes/Web+Agent).
         description: Optional description of the agent.
         realm_hint_attr_id: RADIUS attribute ID (default 0 for standard web agents).
+        environment: SiteMinder backend to create it in (default: the default backend).
     """
+    return await in_environment(
+        environment, lambda: create_agent(name, agent_type_href, description, realm_hint_attr_id)
+    )
+
+async def create_agent(name: str, agent_type_href: str, description: str, realm_hint_attr_id: int) -> str:
     token = await ensure_token()
     if not token:
         return " Failed to get session token."
@@ -324,6 +789,70 @@ async def create_sm_agent_tool(
         logger.exception("Create agent operation failed")
         return f" Error creating Web Agent: {e}"
 
+@mcp.tool(
+    name="bulk_create_objects",
+    description=(
+        "Create many SiteMinder objects of one registry class (e.g. SmAgent, SmRealm) in one call. "
+        "`items` is a list of attribute payloads ({\"Name\": ..., ...}). Every payload is first "
+        "validated locally against the class's classinfo schema, existing names and the rest of the "
+        "batch; invalid items are reported and never sent. Nested classes (realms, rules, policies) "
+        "need `parent` (path, id or href of the container), or `_parent` per item. "
+        f"Valid items are POSTed {SM_BULK_CONCURRENCY} at a time and at most {SM_BULK_RATE:g} per second; "
+        f"one item failing does not stop the others. At most {SM_BULK_MAX_ITEMS} items per call. "
+        "Set dry_run=true to only validate." + ENVIRONMENT_DOC
+    ),
+    auth=require_scopes("siteminder:write"),
+)
+async def bulk_create_objects_tool(
+    class_name: str,
+    items: list[dict],
+    ctx: Context,
+    parent: str = "",
+    dry_run: bool = False,
+    environment: str = "",
+) -> str:
+    """Validate and create many objects, reporting the outcome per item."""
+
+    if class_name not in OBJECT_CLASSES:
+        return f" Unknown class {class_name!r}; expected one of: {', '.join(OBJECT_CLASSES)}"
+    if not items:
+        return " No items given."
+    if len(items) > SM_BULK_MAX_ITEMS:
+        return f" Too many items ({len(items)}); at most {SM_BULK_MAX_ITEMS} per call."
+    return await in_environment(environment, lambda: bulk_create_report(class_name, items, ctx, parent, dry_run))
+
+async def bulk_create_report(class_name: str, items: list[dict], ctx: Context, parent: str, dry_run: bool) -> str:
+    token = await ensure_token()
+    if not token:
+        return " Failed to get session token."
+
+    async def post_progress(done: int, total: int) -> None:
+        await report_progress(ctx, done, total, f"Created {done} of {total} {class_name} objects")
+
+    try:
+        report, summary = await bulk_create(class_name, items, parent, dry_run, token, on_progress=post_progress,
+                                            parent_class=OBJECT_CLASSES[class_name].get("parent", ""))
+    except Exception as e:
+        logger.exception("Bulk create failed")
+        return f" Error creating {class_name} objects: {e}"
+
+    counts = ", ".join(f"{summary[status]} {status}" for status in ("created", "would create", "failed", "invalid")
+                       if summary.get(status))
+    lines = [f"Bulk create {class_name}{' (dry run)' if dry_run else ''}: {counts} of {len(items)} items "
+             f"in {summary['seconds']:g}s."]
+    lines.extend(f"Note: {note}" for note in summary["notes"])
+    for entry in report:
+        label = f"#{entry['index']} {entry['name'] or '(no name)'}"
+        if entry["status"] == "invalid":
+            lines.append(f"{label}: INVALID: {'; '.join(entry['errors'])}")
+        elif entry["status"] == "failed":
+            lines.append(f"{label}: FAILED: {entry['error']}")
+        elif entry["status"] == "created":
+            lines.append(f"{label}: created {entry.get('path') or entry.get('id') or ''}".rstrip())
+        else:
+            lines.append(f"{label}: would create in {entry['collection']}")
+    return "\n".join(lines)
+
 # Register tools for all object types
 for obj_type in OBJECT_CLASSES:
     register_object_tools(obj_type)
@@ -339,7 +868,10 @@ def register_object_link_tool(
     The tool accepts object ID or ObjectIDURL as input.
     """
     
-    async def tool(id_or_url: str):
+    async def tool(id_or_url: str, environment: str = ""):
+        return await in_environment(environment, lambda: fetch_link(id_or_url), lambda message: {"error": message})
+
+    async def fetch_link(id_or_url: str):
         token = await ensure_token()
         if not token:
             return {"error": "Failed to get session token."}
@@ -360,16 +892,22 @@ def register_object_link_tool(
             url = base_url
 
         try:
-            result = await get_object_details_from_href(url, token)
+            result, age, stale = await get_object_details_with_age(url, token)
             # Normalize name if possible
             if isinstance(result, dict):
+                # Copy before annotating so nothing leaks into the shared object cache.
+                result = dict(result)
+                if result:
+                    result["_cache"] = {"age_seconds": round(age), "stale": stale}
                 normalize_name(result)
                 if "data" in result and isinstance(result["data"], dict):
-                    normalize_name(result["data"])
+                    result["data"] = normalize_name(dict(result["data"]))
                 # If the endpoint returns a list (e.g., children), normalize each item
                 if "data" in result and isinstance(result["data"], list):
-                    for obj in result["data"]:
-                        normalize_name(obj)
+                    result["data"] = [
+                        normalize_name(dict(obj)) if isinstance(obj, dict) else obj
+                        for obj in result["data"]
+                    ]
             return result
         except Exception as e:
             return {"error": f"Failed to fetch detail for url: {url}, error: {e}"}
@@ -379,8 +917,9 @@ def register_object_link_tool(
         description=(
             f"{description}\n\n"
             "Input: the object ID (e.g., 'CA.SM::Domain@03-...') **or** the full object detail URL.\n"
-            "Output: JSON response from the requested endpoint.\n"
-            "This tool will construct the proper URL automatically."
+            "Output: JSON response from the requested endpoint. `_cache.age_seconds` tells how old "
+            "the data is; `_cache.stale` means it is being refreshed in the background.\n"
+            "This tool will construct the proper URL automatically." + ENVIRONMENT_DOC
         )
     )(tool)
 
@@ -416,9 +955,15 @@ register_object_link_tool(
     description="Fetches the edit information for the given SiteMinder object ID."
 )
 
-@mcp.tool(name="get_parent_of_object", description="Fetches the full detail of the parent object for the given SiteMinder object ID.")
-async def get_parent_of_object_tool(id: str) -> str:
+@mcp.tool(
+    name="get_parent_of_object",
+    description="Fetches the full detail of the parent object for the given SiteMinder object ID." + ENVIRONMENT_DOC,
+)
+async def get_parent_of_object_tool(id: str, environment: str = "") -> str:
     """Retrieves the parent object by first fetching the child and then following the 'parent' link."""
+    return await in_environment(environment, lambda: get_parent(id))
+
+async def get_parent(id: str) -> str:
     token = await ensure_token()
     if not token:
         return " Failed to get session token."
@@ -447,17 +992,203 @@ async def get_parent_of_object_tool(id: str) -> str:
         logger.exception("Error retrieving parent object")
         return f" Error retrieving parent for {id}: {e}"
 
-@mcp.tool(name="show_detail_cache", description="Show the keys of the SiteMinder object detail cache.")
+@mcp.tool(
+    name="list_environments",
+    description="List the SiteMinder backends (environments) this server can query, for the `environment` argument.",
+)
+async def list_environments_tool() -> str:
+    """Return the configured backends without their credentials."""
+
+    environments = [
+        {
+            "name": backend.name,
+            "base_url": backend.base_url,
+            "default": backend.is_default,
+            "credentials": bool(backend.username and backend.password),
+        }
+        for backend in BACKENDS.values()
+    ]
+    return "Environments:\n" + json.dumps(environments, indent=2) + '\n\nUse environment="*" to query all of them.'
+
+@mcp.tool(name="show_detail_cache", description="Show the keys (<object id>|<view>) of the SiteMinder object cache.")
 async def show_detail_cache_tool() -> str:
     """Return the current keys stored in the detail cache."""
 
-    return "DETAIL_CACHE keys:\n" + json.dumps(show_detail_cache(), indent=2)
+    return (
+        "DETAIL_CACHE keys:\n" + json.dumps(show_detail_cache(), indent=2)
+        + "\n\nDetail cache stats:\n" + json.dumps(await get_detail_cache_stats(), indent=2)
+        + "\n\nRendered JSON memo:\n" + json.dumps(json_render.MEMO_STATS, indent=2)
+    )
+
+@mcp.tool(name="show_token_stats", description="Show SiteMinder login counters (logins, refreshes, coalesced waits).")
+async def show_token_stats_tool() -> str:
+    """Return the SiteMinder session token counters."""
+
+    return "TOKEN_STATS:\n" + json.dumps(get_token_stats(), indent=2)
+
+@mcp.tool(name="show_coalescing_stats", description="Show how many SiteMinder GETs were shared between concurrent identical requests.")
+async def show_coalescing_stats_tool() -> str:
+    """Return upstream vs. coalesced GET counters."""
+
+    return "GET coalescing:\n" + json.dumps(get_coalescing_stats(), indent=2)
+
+@mcp.tool(name="show_replica_status", description="Show size and freshness of the local SiteMinder policy replica.")
+async def show_replica_status_tool() -> str:
+    """Return replica status (enabled, age, object counts per class)."""
+
+    return "Replica status:\n" + json.dumps(REPLICA.status(), indent=2)
+
+@mcp.tool(
+    name="build_dependency_graph",
+    description=(
+        "Index parent links and references of every registry object class into the local "
+        "dependency graph used by get_dependency_impact. Objects indexed recently are reused, "
+        "so repeated builds are incremental. Set full=true to re-read every object."
+    ),
+)
+async def build_dependency_graph_tool(ctx: Context, full: bool = False) -> str:
+    """Build (or incrementally update) the dependency graph."""
+
+    token = await ensure_token()
+    if not token:
+        return " Failed to get session token."
+    await ctx.info("Building dependency graph...")
+    status = await GRAPH.build(list(OBJECT_CLASSES), max_age=0 if full else None)
+    return "Dependency graph:\n" + json.dumps(status, indent=2)
+
+@mcp.tool(
+    name="get_dependency_impact",
+    description=(
+        "Answer transitive dependency questions from the local dependency graph. "
+        "direction='usedby' lists everything that directly or indirectly uses the object "
+        "(what is affected if it changes); direction='dependson' lists everything it needs. "
+        "Each hit shows the path of links from the object. Run build_dependency_graph first."
+    ),
+)
+async def get_dependency_impact_tool(
+    id_or_url: str,
+    direction: str = "usedby",
+    max_depth: int = 3,
+    max_results: int = 100,
+) -> str:
+    """Return the transitive used-by or depends-on closure of an object."""
+
+    if direction not in ("usedby", "dependson"):
+        return " direction must be 'usedby' or 'dependson'."
+    if not GRAPH.nodes:
+        return " The dependency graph is empty; run build_dependency_graph first."
+    obj_id = GRAPH.resolve(id_or_url)
+    if obj_id not in GRAPH.nodes:
+        return f" {id_or_url} is not in the dependency graph; run build_dependency_graph to index it."
+
+    found, truncated = GRAPH.traverse(obj_id, direction, max(1, max_depth), max(1, max_results))
+    arrow = "<-[{}]-" if direction == "usedby" else "-[{}]->"
+    verb = "is used by" if direction == "usedby" else "depends on"
+    lines = [f"{GRAPH.describe(obj_id)} {verb} {len(found)}{'+' if truncated else ''} objects (max depth {max_depth}):"]
+    for node_id, path in found:
+        hops = " ".join(f"{arrow.format(label)} {GRAPH.nodes[hop]['name']}" for label, hop in path)
+        lines.append(f"- depth {len(path)}: {GRAPH.describe(node_id)}\n  {GRAPH.nodes[obj_id]['name']} {hops}")
+    if truncated:
+        lines.append(f"(Stopped after {max_results} results; raise max_results or lower max_depth.)")
+    status = GRAPH.status()
+    lines.append(f"(Graph: {status['nodes']} nodes, {status['edges']} edges, built {status['built_at'] or 'incrementally from fetched objects'}.)")
+    return "\n".join(lines)
+
+async def take_snapshot(label: str = "", ctx: Optional[Context] = None) -> Snapshot:
+    """Snapshot the current backend (see ``in_environment``)."""
+
+    token = await ensure_token()
+    if not token:
+        raise RuntimeError("Failed to get session token.")
+    if ctx is not None:
+        await ctx.info(f"Taking a snapshot of {current_backend().name}...")
+    return await build_snapshot(list(OBJECT_CLASSES), label, token)
+
+@mcp.tool(
+    name="create_snapshot",
+    description=(
+        "Take a content-hashed snapshot of every registry object in a SiteMinder environment and "
+        "save it under `label` (default <environment>-<time>) for diff_snapshots. Unset (#) values "
+        "are ignored and objects are matched by path, so snapshots of different environments compare."
+        + ENVIRONMENT_DOC
+    ),
+)
+async def create_snapshot_tool(ctx: Context, label: str = "", environment: str = "") -> str:
+    """Build and save a snapshot; return its per-class rollup hashes."""
+
+    try:
+        snapshot = await in_environment(environment, lambda: take_snapshot(label, ctx), raise_value_error)
+    except ValueError as e:
+        return f" {e}"
+    except Exception as e:
+        logger.exception("Snapshot failed")
+        return f" Error taking snapshot: {e}"
+    return "Snapshot:\n" + json.dumps(snapshot.summary(), indent=2)
+
+@mcp.tool(name="list_snapshots", description="List the saved policy snapshots usable with diff_snapshots.")
+async def list_snapshots_tool() -> str:
+    """Return the labels of saved snapshots."""
+
+    labels = await asyncio.to_thread(SNAPSHOTS.labels)
+    if not labels:
+        return "No snapshots yet; take one with create_snapshot."
+    return "Snapshots:\n" + "\n".join(f"- {label}" for label in labels)
+
+@mcp.tool(
+    name="diff_snapshots",
+    description=(
+        "Compare two policy snapshots and list what was added (+), removed (-) or changed (~), "
+        "with the changed attributes. `before` and `after` are snapshot labels, or '@<environment>' "
+        "('@' for the default one) to snapshot that environment now, e.g. before='@staging', "
+        "after='@prod', or before='pre-change' after='@'. Only subtrees whose hashes differ are "
+        "examined; at most `limit` changes are listed."
+    ),
+)
+async def diff_snapshots_tool(before: str, after: str, ctx: Context, limit: int = 200) -> str:
+    """Diff two saved or freshly taken snapshots."""
+
+    async def resolve(ref: str) -> Snapshot:
+        ref = ref.strip()
+        if ref.startswith("@"):
+            return await in_environment(ref[1:], lambda: take_snapshot("", ctx), raise_value_error)
+        snapshot = await asyncio.to_thread(SNAPSHOTS.get, ref)
+        if snapshot is None:
+            raise ValueError(f"No snapshot called {ref!r}; see list_snapshots.")
+        return snapshot
+
+    try:
+        old, new = await asyncio.gather(resolve(before), resolve(after))
+    except ValueError as e:
+        return f" {e}"
+    except Exception as e:
+        logger.exception("Snapshot diff failed")
+        return f" Error preparing snapshots: {e}"
+    changes, stats = diff_snapshots(old, new)
+    header = (
+        f"Diff {old.label} ({old.environment}, {len(old.objects)} objects) -> "
+        f"{new.label} ({new.environment}, {len(new.objects)} objects): "
+    )
+    if stats["identical"]:
+        return header + "identical."
+    counts = stats["changes"]
+    lines = [
+        header + f"{counts['+']} added, {counts['-']} removed, {counts['~']} changed "
+        f"({stats['compared']} objects compared)."
+    ]
+    for snapshot in (old, new):
+        if snapshot.stats.get("errors"):
+            lines.append(f"Warning: {snapshot.label} is incomplete: {'; '.join(snapshot.stats['errors'])}")
+    shown = changes[:limit] if limit > 0 else changes
+    lines.extend(format_change(change) for change in shown)
+    if len(shown) < len(changes):
+        lines.append(f"(Showing {len(shown)} of {len(changes)} changes; raise limit to see more.)")
+    return "\n".join(lines)
 
 @mcp.tool(name="clear_detail_cache", description="Clear the SiteMinder object detail cache.")
 async def clear_detail_cache_tool() -> str:
     """Remove all entries from the detail cache."""
 
-    clear_detail_cache()
+    await clear_detail_cache()
     return "DETAIL_CACHE cleared."
 
 @mcp.resource("siteminder://objects/{obj_id}")
@@ -476,88 +1207,150 @@ async def get_object_resource(obj_id: str) -> str:
 @mcp.resource("siteminder://skills/sm-policy-management/SKILL.md")
 async def get_skill_main_resource() -> str:
     """Read the main SKILL.md file for the SiteMinder Agent Skill."""
-    with open("SKILL.md", "r", encoding="utf-8") as f:
-        return f.read()
+    return SKILL_CACHE.get("SKILL.md").content
 
 @mcp.resource("siteminder://skills/sm-policy-management/REFERENCE.md")
 async def get_skill_reference_resource() -> str:
     """Read the REFERENCE.md file for the SiteMinder Agent Skill."""
-    with open("REFERENCE.md", "r", encoding="utf-8") as f:
-        return f.read()
+    return SKILL_CACHE.get("REFERENCE.md").content
 
 @mcp.resource("siteminder://skills/sm-policy-management/ACO_REFERENCE.md")
 async def get_skill_aco_reference_resource() -> str:
     """Read the ACO_REFERENCE.md file for the SiteMinder Agent Skill."""
-    with open("ACO_REFERENCE.md", "r", encoding="utf-8") as f:
-        return f.read()
+    return SKILL_CACHE.get("ACO_REFERENCE.md").content
 
-@mcp.tool(name="get_skill_info", description="Returns the latest version and metadata for the SiteMinder Agent Skill.")
-async def get_skill_info_tool() -> dict:
+@mcp.tool(
+    name="get_skill_info",
+    description=(
+        "Returns the latest version and metadata for the SiteMinder Agent Skill. "
+        "Pass the hash you already have as known_hash to get a short 'not_modified' answer when nothing changed."
+    ),
+)
+async def get_skill_info_tool(known_hash: str = "") -> dict:
     """Provides version and hash info for the skill files."""
-    import hashlib
     try:
-        with open("SKILL.md", "r", encoding="utf-8") as f:
-            content = f.read()
-            # Simple version extraction from YAML
-            version = "unknown"
-            for line in content.split("\n"):
-                if line.startswith("version:"):
-                    version = line.split(":")[1].strip()
-                    break
-            file_hash = hashlib.md5(content.encode()).hexdigest()
-            
+        skill = SKILL_CACHE.get("SKILL.md")
+        if known_hash and known_hash == skill.hash:
+            return {"status": "not_modified", "hash": skill.hash}
         return {
             "name": "siteminder-policy-management",
-            "version": version,
-            "hash": file_hash,
+            "version": skill_version(skill.content),
+            "hash": skill.hash,
+            "package_hash": SKILL_CACHE.package_hash(),
+            "file_hashes": {f.name: f.hash for f in SKILL_CACHE.all()},
             "last_updated": "2026-02-25"
         }
     except Exception as e:
         return {"error": str(e)}
 
-@mcp.tool(name="get_skill_sync_package", description="Returns the latest Agent Skill files and instructions on where the client should save them locally.")
-async def get_skill_sync_package_tool() -> dict:
+@mcp.tool(
+    name="get_skill_sync_package",
+    description=(
+        "Returns the latest Agent Skill files and instructions on where the client should save them locally. "
+        "Pass known_package_hash (from get_skill_info) to get 'not_modified' when nothing changed, and "
+        "known_hashes ({file name: hash}) to receive only changed files, as a unified diff when possible."
+    ),
+)
+async def get_skill_sync_package_tool(
+    known_package_hash: str = "",
+    known_hashes: Optional[dict[str, str]] = None,
+) -> dict:
     """Provides the SKILL.md, REFERENCE.md, and ACO_REFERENCE.md content for local installation."""
     try:
-        with open("SKILL.md", "r", encoding="utf-8") as f:
-            skill_md = f.read()
-        with open("REFERENCE.md", "r", encoding="utf-8") as f:
-            ref_md = f.read()
-        with open("ACO_REFERENCE.md", "r", encoding="utf-8") as f:
-            aco_md = f.read()
-        
-        return {
+        package_hash = SKILL_CACHE.package_hash()
+        if known_package_hash and known_package_hash == package_hash:
+            return {"status": "not_modified", "package_hash": package_hash}
+
+        known_hashes = known_hashes or {}
+        files, deltas, unchanged = {}, {}, []
+        for f in SKILL_CACHE.all():
+            known = known_hashes.get(f.name)
+            if known == f.hash:
+                unchanged.append(f.name)
+                continue
+            delta = SKILL_CACHE.delta(f.name, known) if known else None
+            if delta is not None:
+                deltas[f.name] = delta
+            else:
+                files[f.name] = f.content
+
+        result = {
             "status": "success",
             "instructions": "Please save these files into your local agent skills directory (e.g., .cursor/skills/siteminder-policy/ or similar).",
-            "files": {
-                "SKILL.md": skill_md,
-                "REFERENCE.md": ref_md,
-                "ACO_REFERENCE.md": aco_md
-            }
+            "package_hash": package_hash,
+            "file_hashes": {f.name: f.hash for f in SKILL_CACHE.all()},
+            "files": files,
         }
+        if deltas:
+            result["deltas"] = deltas
+            result["instructions"] += " Apply each entry of 'deltas' to your copy of that file as a unified diff."
+        if unchanged:
+            result["unchanged"] = unchanged
+        return result
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
-@mcp.tool(name="lookup_aco_parameter", description="Search the full dictionary of SiteMinder ACO parameters for specific names or keywords.")
-async def lookup_aco_parameter_tool(query: str) -> str:
+def format_aco_parameter(p: dict) -> str:
+    return f"### {p['name']}\n- **Default:** {p['default']}\n- **Description:** {p['description']}"
+
+@mcp.tool(
+    name="lookup_aco_parameter",
+    description=(
+        "Search the full dictionary of SiteMinder ACO parameters for specific names or keywords. "
+        "Matches on parameter names rank above description matches; partial words and small typos "
+        "are tolerated. Results are paged with limit/offset."
+    ),
+)
+async def lookup_aco_parameter_tool(query: str, limit: int = 10, offset: int = 0) -> str:
     """Searches the local aco_parameters.json database for the given query."""
-    import json
-    import os
-    
-    json_path = os.path.join(os.path.dirname(__file__), 'aco_parameters.json')
     try:
-        with open(json_path, 'r') as f:
-            params = json.load(f)
-            
-        matches = [p for p in params if query.lower() in p['name'].lower() or query.lower() in p['description'].lower()]
-        
-        if not matches:
-            return f"No parameters found matching '{query}'."
-            
-        output = []
-        for p in matches:
-            output.append(f"### {p['name']}\n- **Default:** {p['default']}\n- **Description:** {p['description']}")
-            
-        return "\n\n".join(output)
+        matches = ACO_INDEX.search(query)
+    except Exception as e:
+        return f"Error reading parameter database: {e}"
+
+    if not matches:
+        return f"No parameters found matching '{query}'."
+
+    offset = max(0, offset)
+    page = matches[offset:offset + limit] if limit > 0 else matches[offset:]
+    output = [format_aco_parameter(p) for _, p in page]
+    footer = f"Showing {offset + 1}-{offset + len(page)} of {len(matches)} matches for '{query}' (best first)."
+    if offset + len(page) < len(matches):
+        footer += f" Next page: offset={offset + len(page)}."
+    output.append(footer)
+    return "\n\n".join(output)
+
+@mcp.tool(
+    name="lookup_aco_parameters_batch",
+    description=(
+        "Look up many ACO parameter names at once (e.g. every parameter set in an Agent "
+        "Configuration Object, for an audit). Names are matched case-insensitively; unknown "
+        "names are reported with the closest known names."
+    ),
+)
+async def lookup_aco_parameters_batch_tool(names: list[str]) -> str:
+    """Return the dictionary entry of every name in ``names``."""
+    try:
+        found, unknown = [], []
+        unique = {n.strip().lower(): n.strip() for n in reversed(names) if n.strip()}
+        for name in reversed(unique.values()):
+            p = ACO_INDEX.get(name)
+            if p is not None:
+                found.append(format_aco_parameter(p))
+            else:
+                suggestions = ACO_INDEX.suggest(name)
+                hint = f" (did you mean: {', '.join(suggestions)}?)" if suggestions else ""
+                unknown.append(f"- {name}{hint}")
     except Exception as e:
         return f"Error reading parameter database: {e}"
+
+    output = [f"Found {len(found)} of {len(found) + len(unknown)} parameters.", *found]
+    if unknown:
+        output.append("### Not in the ACO dictionary\n" + "\n".join(unknown))
+    return "\n\n".join(output)
+
+
+# Skill files and the ACO index otherwise load on first use.
+if SM_STARTUP_WARMUP:
+    startup.warm_up("skill files", SKILL_CACHE.all)
+    startup.warm_up("aco index", ACO_INDEX.ensure_loaded)
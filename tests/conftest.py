@@ -0,0 +1,58 @@
+"""Shared test setup.
+
+The server is configured here, before anything imports ``sm_mcp``: the
+project's ``.env`` is skipped (``SM_DOTENV=0``) so tests never reach a real
+policy server, and the optional tiers (disk cache, replica, extra backends)
+are off.  Tests that need upstream behaviour use the ``fake_siteminder``
+fixture, which serves ``benchmarks/fake_siteminder.py`` on the configured URL.
+"""
+
+import os
+import socket
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+# SiteMinder points at this port; tests that need upstream behaviour start the
+# fake from benchmarks/fake_siteminder.py on it.
+FAKE_PORT = free_port()
+
+os.environ.update({
+    "SM_DOTENV": "0",
+    "MCP_AUTH_DISABLED": "true",
+    "SITE_MINDER_BASE_URL": f"http://127.0.0.1:{FAKE_PORT}",
+    "SITE_MINDER_USERNAME": "test",
+    "SITE_MINDER_PASSWORD": "test",
+    "SM_BACKENDS": "",
+    "SM_DETAIL_DISK_CACHE_PATH": "",
+    "SM_SHARED_CACHE": "",
+    "SM_REPLICA_ENABLED": "false",
+    "SM_STARTUP_WARMUP": "false",
+    "SM_SNAPSHOT_DIR": tempfile.mkdtemp(prefix="sm-mcp-tests-"),
+    "LOG_LEVEL": "WARNING",
+})
+
+
+@pytest.fixture(scope="session")
+def fake_siteminder():
+    """Start the fake SiteMinder with a small generated dataset; yield the dataset."""
+
+    from benchmarks.fake_siteminder import FaultConfig, build_dataset, create_app
+    from benchmarks.load_test import start_server
+
+    dataset = build_dataset(300, seed=7)
+    server = start_server(create_app(dataset, FaultConfig(), href_style="id", seed=7), FAKE_PORT)
+    yield dataset
+    server.should_exit = True
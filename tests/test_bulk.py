@@ -0,0 +1,169 @@
+import asyncio
+
+import pytest
+
+from sm_mcp.api.bulk import ClassSchema, bulk_create, parse_classinfo, validate_payload
+
+SCHEMA = ClassSchema(
+    properties={
+        "Name": {"type": "string", "maxLength": 8},
+        "Desc": {"type": "string"},
+        "IdleTimeout": {"type": "integer"},
+        "ProtectAll": {"type": "boolean"},
+        "SessionType": {"type": "string", "enum": ["Non-peristent", "Peristent"]},
+        "AgentLink": {"$ref": "#/definitions/link"},
+        "Tags": {"type": "array", "items": {"type": "string"}},
+    },
+    required={"Name", "IdleTimeout", "ProtectAll"},
+)
+VALID = {"Name": "realm", "IdleTimeout": 600, "ProtectAll": True}
+
+
+def test_parse_classinfo_mapping_form():
+    schema = parse_classinfo({"responseType": "classinfo", "data": {
+        "className": "SmAgent", "required": ["Name"], "properties": {"Name": {"type": "string"}, "Desc": None}}})
+    assert schema.properties == {"Name": {"type": "string"}, "Desc": {}}
+    assert schema.required == {"Name"}
+
+
+def test_parse_classinfo_list_form_lowers_keys_and_collects_required():
+    schema = parse_classinfo({"data": {"Properties": [
+        {"Name": "Name", "Type": "string", "Required": True},
+        {"name": "IdleTimeout", "Type": "integer", "MaxLength": 4},
+        {"Type": "string"},
+        "junk",
+    ]}})
+    assert schema.properties["IdleTimeout"] == {"name": "IdleTimeout", "type": "integer", "maxLength": 4}
+    assert set(schema.properties) == {"Name", "IdleTimeout"}
+    assert schema.required == {"Name"}
+
+
+@pytest.mark.parametrize("body", [None, [], {"data": "x"}, {"data": {"properties": {}}}])
+def test_parse_classinfo_without_properties(body):
+    assert parse_classinfo(body) is None
+
+
+def test_valid_payload_and_unset_optional_values():
+    assert validate_payload(SCHEMA, VALID) == []
+    assert validate_payload(SCHEMA, {**VALID, "Desc": "#", "AgentLink": {"id": "CA.SM::Agent@1"}}) == []
+
+
+@pytest.mark.parametrize("change, error", [
+    ({"Name": "  "}, "Name is required"),
+    ({"IdleTimeout": "#"}, "missing required attribute(s): IdleTimeout"),
+    ({"IdelTimeout": 5}, "unknown attribute IdelTimeout (did you mean IdleTimeout?)"),
+    ({"Zzz": 5}, "unknown attribute Zzz"),
+    ({"IdleTimeout": "600"}, "IdleTimeout must be of type integer, not str"),
+    ({"IdleTimeout": True}, "IdleTimeout must be of type integer, not bool"),
+    ({"SessionType": "Sticky"}, "SessionType must be one of: Non-peristent, Peristent"),
+    ({"Name": "much-too-long"}, "Name is longer than 8 characters"),
+    ({"AgentLink": "CA.SM::Agent@1"}, "AgentLink must be a link object with an id or href"),
+    ({"Tags": ["a", 1]}, "Tags[1] must be of type string, not int"),
+])
+def test_invalid_payloads(change, error):
+    assert validate_payload(SCHEMA, {**VALID, **change}) == [error]
+
+
+def test_without_schema_only_name_is_checked():
+    assert validate_payload(None, {"Name": "x", "Anything": 1}) == []
+    assert validate_payload(None, {}) == ["Name is required"]
+    assert validate_payload(SCHEMA, ["not", "a", "dict"]) == ["payload must be a JSON object"]
+
+
+def agent(dataset, name: str, **extra) -> dict:
+    return {"Name": name, "AgentTypeLink": {"id": dataset.by_class["SmAgentType"][0].id},
+            "RealmHintAttrId": 0, **extra}
+
+
+def test_bulk_create_against_fake(fake_siteminder):
+    from sm_mcp.api.siteminder_api import fetch_objects, get_token
+
+    existing = fake_siteminder.by_class["SmAgent"][0].name
+    items = [
+        agent(fake_siteminder, "bulk-a"),
+        agent(fake_siteminder, "bulk-b", Desc="second"),
+        agent(fake_siteminder, "BULK-A"),
+        agent(fake_siteminder, existing),
+        {"Name": "bulk-c", "AgentTypeLink": "x"},
+    ]
+
+    async def run():
+        token = await get_token()
+        dry = await bulk_create("SmAgent", items, dry_run=True, token=token)
+        real = await bulk_create("SmAgent", items, token=token)
+        names = {obj["path"] for obj in await fetch_objects("SmAgent", token, use_cache=False)}
+        return dry, real, names
+
+    (dry, dry_summary), (real, summary), paths = asyncio.run(run())
+    assert [entry["status"] for entry in dry] == ["would create", "would create", "invalid", "invalid", "invalid"]
+    assert dry[2]["errors"] == ["duplicate of item 0"]
+    assert dry[3]["errors"] == [f"SmAgent {existing!r} already exists"]
+    assert "missing required attribute(s): RealmHintAttrId" in dry[4]["errors"]
+    assert dry_summary["dry_run"] and not dry_summary["notes"]
+
+    assert [entry["status"] for entry in real[:2]] == ["created", "created"]
+    assert real[0]["collection"] == "SmAgents" and real[0]["path"] == "/SmAgents/bulk-a"
+    assert summary["created"] == 2 and summary["invalid"] == 3
+    assert {"/SmAgents/bulk-a", "/SmAgents/bulk-b"} <= paths
+
+
+def test_bulk_create_sees_objects_missing_from_a_cached_listing(fake_siteminder):
+    from sm_mcp.api.siteminder_api import fetch_objects, get_token
+
+    async def run():
+        token = await get_token()
+        await fetch_objects("SmAgent", token)
+        # Created behind the server's back: the cached listing does not have it.
+        fake_siteminder.add("SmAgent", "bulk-elsewhere", None)
+        cached = {obj["path"] for obj in await fetch_objects("SmAgent", token)}
+        report, _ = await bulk_create("SmAgent", [agent(fake_siteminder, "bulk-elsewhere")], dry_run=True,
+                                      token=token)
+        return cached, report
+
+    cached, report = asyncio.run(run())
+    assert "/SmAgents/bulk-elsewhere" not in cached
+    assert report[0]["status"] == "invalid"
+    assert report[0]["errors"] == ["SmAgent 'bulk-elsewhere' already exists"]
+
+
+def realm(name: str, **extra) -> dict:
+    return {"Name": name, "ProcessAuthEvents": False, "ProcessAzEvents": False, "ProtectAll": True,
+            "SessionType": "Non-peristent", "SyncAudit": False, "IdleTimeout": 600, "MaxTimeout": 3600,
+            "SessionDrift": 0, **extra}
+
+
+def test_nested_class_needs_a_parent_of_the_registry_class(fake_siteminder):
+    from sm_mcp.api.siteminder_api import get_token
+
+    # A domain without realms: nothing in the listing shows that realms are nested.
+    domain = fake_siteminder.add("SmDomain", "bulk-empty-domain", None)
+    agent_path = fake_siteminder.by_class["SmAgent"][0].path
+    items = [
+        realm("bulk-realm", _parent=domain.path),
+        realm("bulk-orphan"),
+        realm("bulk-misplaced", _parent=agent_path),
+    ]
+
+    async def run():
+        token = await get_token()
+        realms = await bulk_create("SmRealm", items, token=token, parent_class="SmDomain")
+        agents = await bulk_create("SmAgent", [agent(fake_siteminder, "bulk-nested", _parent=domain.path)],
+                                   dry_run=True, token=token)
+        return realms, agents
+
+    (report, summary), (agents, _) = asyncio.run(run())
+    assert report[0]["status"] == "created" and report[0]["path"] == f"{domain.path}/SmRealms/bulk-realm"
+    assert report[1]["errors"] == ["SmRealm objects live under a SmDomain; set parent or _parent"]
+    assert report[2]["errors"] == [f"parent {agent_path!r} is not a SmDomain"]
+    assert agents[0]["errors"] == ["SmAgent objects are not nested; drop parent"]
+    assert not summary["notes"]
+
+
+def test_registry_records_the_container_class_of_nested_classes():
+    from benchmarks.fake_siteminder import load_spec
+    from sm_mcp.tools.tooling import OBJECT_CLASSES
+
+    spec = load_spec()
+    assert {name: obj.get("parent", "") for name, obj in OBJECT_CLASSES.items()} == {
+        name: spec[name].parent or "" for name in OBJECT_CLASSES
+    }
@@ -0,0 +1,90 @@
+import asyncio
+
+from sm_mcp.api.dependency_graph import PARENT, REFERENCE, DependencyGraph
+
+
+def link(obj_id: str, path: str = "") -> dict:
+    return {"id": obj_id, "path": path} if path else {"id": obj_id}
+
+
+def realm(scheme: str) -> dict:
+    return {"path": "/SmDomains/d/SmRealms/r", "parent": link("CA.SM::Domain@d", "/SmDomains/d"),
+            "data": {"Name": "r", "AuthSchemeLink": link(scheme), "Desc": "#"}}
+
+
+def used_by(graph: DependencyGraph, obj_id: str) -> set[str]:
+    return {node for node, _ in graph.traverse(obj_id, "usedby", max_depth=1)[0]}
+
+
+def test_detail_replaces_the_outgoing_edges():
+    graph = DependencyGraph()
+    graph.ingest_detail("CA.SM::Realm@r", realm("CA.SM::AuthScheme@basic"))
+    assert graph.out_edges["CA.SM::Realm@r"] == {
+        "CA.SM::Domain@d": {PARENT}, "CA.SM::AuthScheme@basic": {"AuthSchemeLink"}}
+
+    graph.ingest_detail("CA.SM::Realm@r", realm("CA.SM::AuthScheme@forms"))
+    assert used_by(graph, "CA.SM::AuthScheme@basic") == set()
+    assert used_by(graph, "CA.SM::AuthScheme@forms") == {"CA.SM::Realm@r"}
+
+
+def test_usedby_and_children_replace_what_they_reported_before():
+    graph = DependencyGraph()
+    graph.ingest_detail("CA.SM::Realm@r", realm("CA.SM::AuthScheme@basic"))
+    graph.ingest_usedby("CA.SM::AuthScheme@basic", [link("CA.SM::Realm@r"), link("CA.SM::Realm@old")])
+    assert used_by(graph, "CA.SM::AuthScheme@basic") == {"CA.SM::Realm@r", "CA.SM::Realm@old"}
+
+    graph.ingest_usedby("CA.SM::AuthScheme@basic", [])
+    # The edge read from the realm's own detail stays; the reference-only one goes.
+    assert used_by(graph, "CA.SM::AuthScheme@basic") == {"CA.SM::Realm@r"}
+    assert graph.out_edges["CA.SM::Realm@r"]["CA.SM::AuthScheme@basic"] == {"AuthSchemeLink"}
+    assert "CA.SM::AuthScheme@basic" not in graph.out_edges["CA.SM::Realm@old"]
+
+    graph.ingest_children("CA.SM::Domain@d", [link("CA.SM::Realm@x")])
+    assert used_by(graph, "CA.SM::Domain@d") == {"CA.SM::Realm@x"}
+    assert REFERENCE not in str(graph.out_edges["CA.SM::Realm@x"])
+
+
+def test_remove_node_drops_every_edge_and_index():
+    graph = DependencyGraph()
+    graph.ingest_detail("CA.SM::Realm@r", realm("CA.SM::AuthScheme@basic"))
+    graph.remove_node("CA.SM::Realm@r")
+    assert "CA.SM::Realm@r" not in graph.nodes and "/SmDomains/d/SmRealms/r" not in graph.by_path
+    assert graph.edge_count() == 0 and used_by(graph, "CA.SM::Domain@d") == set()
+    assert "CA.SM::Realm@r" not in graph.indexed
+
+
+def test_invalidating_a_deleted_object_removes_it_from_the_graph():
+    from sm_mcp.api.dependency_graph import GRAPH
+    from sm_mcp.api.siteminder_api import invalidate_object
+
+    GRAPH.ingest_detail("CA.SM::Realm@gone", realm("CA.SM::AuthScheme@basic"))
+    asyncio.run(invalidate_object("CA.SM::Realm@gone"))
+    assert "CA.SM::Realm@gone" in GRAPH.nodes
+    asyncio.run(invalidate_object("CA.SM::Realm@gone", deleted=True))
+    assert "CA.SM::Realm@gone" not in GRAPH.nodes
+    assert "CA.SM::Realm@gone" not in used_by(GRAPH, "CA.SM::AuthScheme@basic")
+
+
+def test_build_prunes_objects_deleted_upstream(fake_siteminder):
+    from sm_mcp.api.siteminder_api import invalidate_class
+
+    graph = DependencyGraph()
+    realm_record = next(r for r in fake_siteminder.by_class["SmRealm"] if r.refs)
+    target = fake_siteminder.by_id[next(iter(realm_record.refs.values()))[0]]
+
+    async def run():
+        await graph.build(["SmDomain", "SmRealm"], max_age=0)
+        before = used_by(graph, target.id)
+        # Delete the realm behind the server's back and drop the cached listing.
+        fake_siteminder.by_class["SmRealm"].remove(realm_record)
+        del fake_siteminder.by_id[realm_record.id], fake_siteminder.by_path[realm_record.path]
+        fake_siteminder.children[realm_record.parent.id].remove(realm_record)
+        await invalidate_class("SmRealm")
+        status = await graph.build(["SmDomain", "SmRealm"])
+        return before, status
+
+    before, status = asyncio.run(run())
+    assert realm_record.id in before
+    assert status["nodes_pruned"] == 1 and not status["last_error"]
+    assert realm_record.id not in graph.nodes
+    assert realm_record.id not in used_by(graph, target.id)
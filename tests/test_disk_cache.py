@@ -0,0 +1,103 @@
+import sqlite3
+import time
+
+from sm_mcp.core import disk_cache
+from sm_mcp.core.disk_cache import CacheEntry, PersistentCache, SharedCache
+
+
+def accessed_at(path: str, key: str) -> float:
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT accessed_at FROM cache WHERE key = ?", (key,)).fetchone()[0]
+
+
+def test_reads_queue_access_times_until_flushed(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = PersistentCache(path)
+    cache.set("a", {"n": 1}, etag='"1"')
+    cache.set("b", {"n": 2})
+    stored = accessed_at(path, "a")
+    time.sleep(0.01)
+
+    entry = cache.get("a")
+    assert entry.value == {"n": 1} and entry.etag == '"1"'
+    assert accessed_at(path, "a") == stored
+    # Reading the recency order writes the queued times first.
+    assert [e.key for e in cache.recent(2)] == ["a", "b"]
+    assert accessed_at(path, "a") > stored
+    cache.close()
+
+
+def test_queue_is_flushed_when_full_and_on_close(tmp_path, monkeypatch):
+    monkeypatch.setattr(disk_cache, "ACCESS_FLUSH_SIZE", 2)
+    path = str(tmp_path / "cache.db")
+    cache = PersistentCache(path)
+    for key in "abc":
+        cache.set(key, key)
+    stored = {key: accessed_at(path, key) for key in "abc"}
+    time.sleep(0.01)
+
+    cache.get("a")
+    cache.get("b")
+    assert accessed_at(path, "a") > stored["a"] and accessed_at(path, "b") > stored["b"]
+    cache.get("c")
+    assert accessed_at(path, "c") == stored["c"]
+    cache.close()
+    assert accessed_at(path, "c") > stored["c"]
+
+
+def test_eviction_keeps_recently_read_entries(tmp_path):
+    cache = PersistentCache(str(tmp_path / "cache.db"), max_entries=10)
+    for i in range(10):
+        cache.set(f"k{i}", i)
+    time.sleep(0.01)
+    cache.get("k0")
+    cache.set("k10", 10)
+    assert "k0" in cache.keys() and "k1" not in cache.keys() and len(cache) == 10
+    cache.close()
+
+
+def test_cache_written_for_another_server_is_cleared(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = PersistentCache(path, source='{"default": "https://dev"}')
+    cache.set("detail", "from dev")
+    cache.close()
+
+    same = PersistentCache(path, source='{"default": "https://dev"}')
+    assert same.get("detail").value == "from dev"
+    same.close()
+
+    repointed = PersistentCache(path, source='{"default": "https://prod"}')
+    assert repointed.get("detail") is None and len(repointed) == 0
+    repointed.set("detail", "from prod")
+    repointed.close()
+    assert PersistentCache(path, source='{"default": "https://prod"}').get("detail").value == "from prod"
+
+
+def test_shared_cache_drops_tokens_of_another_server(tmp_path):
+    path = str(tmp_path / "shared.db")
+    cache = SharedCache(path, source="dev")
+    cache.set_token("default", "dev-session", ttl=600)
+    cache.close()
+
+    assert SharedCache(path, source="dev").get_token("default")[0] == "dev-session"
+    assert SharedCache(path, source="prod").get_token("default") is None
+
+
+def test_backend_fingerprint_follows_the_base_url(monkeypatch):
+    from dataclasses import replace
+
+    from sm_mcp.api import backends
+
+    before = backends.backend_fingerprint()
+    default = backends.BACKENDS["default"]
+    monkeypatch.setitem(backends.BACKENDS, "default", replace(default, base_url="https://elsewhere.example"))
+    assert backends.backend_fingerprint() != before
+
+
+def test_conditional_headers_carry_the_stored_validators():
+    entry = CacheEntry("k", {}, '"v1"', "Tue, 01 Oct 2024 10:00:00 GMT", time.time())
+    assert entry.conditional_headers() == {
+        "If-None-Match": '"v1"',
+        "If-Modified-Since": "Tue, 01 Oct 2024 10:00:00 GMT",
+    }
+    assert CacheEntry("k", {}, None, None, time.time()).conditional_headers() == {}
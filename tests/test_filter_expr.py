@@ -0,0 +1,84 @@
+import pytest
+
+from sm_mcp.core.filter_expr import FilterExpressionError, compile_filter, filter_objects, validate_filter
+
+REALMS = [
+    {"data": {"Name": "login-realm", "Desc": "Login pages", "ProtectAll": True, "IdleTimeout": 3600}},
+    {"data": {"Name": "admin", "Desc": "#", "ProtectAll": False, "IdleTimeout": 600}},
+    {"data": {"Name": "Billing", "Desc": "", "ProtectAll": "true", "IdleTimeout": "7200"}},
+]
+
+
+def names(expr: str, objects: list = REALMS) -> list[str]:
+    return [obj["data"]["Name"] for obj in filter_objects(objects, expr)]
+
+
+@pytest.mark.parametrize("expr, expected", [
+    ("Name contains 'LOGIN'", ["login-realm"]),
+    ("Name = 'billing'", ["Billing"]),
+    ("Name != 'admin'", ["login-realm", "Billing"]),
+    ("Desc = null", ["admin", "Billing"]),
+    ("Desc != null", ["login-realm"]),
+    ("ProtectAll = true", ["login-realm", "Billing"]),
+    ("ProtectAll != true", ["admin"]),
+    ("IdleTimeout > 1000", ["login-realm", "Billing"]),
+    ("IdleTimeout <= 600", ["admin"]),
+    ("Name contains 'a' and IdleTimeout < 5000", ["login-realm", "admin"]),
+    ("Name = admin or IdleTimeout >= 7200", ["admin", "Billing"]),
+    ("(Name = admin or Name = Billing) and ProtectAll = true", ["Billing"]),
+])
+def test_filter_semantics(expr, expected):
+    assert names(expr) == expected
+
+
+def test_link_records_use_lower_case_name_and_desc():
+    links = [{"name": "agent-1", "desc": "web"}, {"name": "agent-2", "desc": "#"}]
+    assert filter_objects(links, "Name contains '1'") == [links[0]]
+    assert filter_objects(links, "Desc = null") == [links[1]]
+
+
+def test_contains_matches_list_items():
+    rules = [{"data": {"Name": "r", "Actions": ["GET", "POST"]}}]
+    assert filter_objects(rules, "Actions contains 'post'") == rules
+
+
+@pytest.mark.parametrize("expr", [
+    "",
+    "Name",
+    "Name =",
+    "Name contains",
+    "(Name = 'a'",
+    "Name = 'a' Desc = 'b'",
+    "IdleTimeout > true",
+    "Name > null",
+    "= 'a'",
+])
+def test_malformed_expressions_raise(expr):
+    with pytest.raises(FilterExpressionError):
+        compile_filter(expr)
+
+
+def test_validate_filter_rejects_unknown_attributes():
+    with pytest.raises(FilterExpressionError, match="Unknown attribute"):
+        validate_filter("IsEnabled = true", ["Name", "Desc"])
+    assert validate_filter("name contains 'x'", ["Name", "Desc"]).attributes == {"name"}
+
+
+def test_single_equality_is_exposed_for_index_lookups():
+    assert compile_filter("Name = 'Login'").equality == ("Name", "login")
+    assert compile_filter("Name = 'a' and Desc = 'b'").equality is None
+    assert compile_filter("IdleTimeout = 5").equality is None
+
+
+def test_compiled_filters_are_memoized():
+    assert compile_filter("Name contains 'memo'") is compile_filter("Name contains 'memo'")
+
+
+def test_search_help_examples_are_valid_for_their_class():
+    from sm_mcp.tools.tooling import OBJECT_CLASSES
+
+    for name, obj in OBJECT_CLASSES.items():
+        examples = [line[2:] for line in obj["help"].split("Examples:")[1].splitlines() if line.startswith("- ")]
+        assert examples, name
+        for example in examples:
+            validate_filter(example, obj["attributes"])
@@ -0,0 +1,27 @@
+import json
+
+from sm_mcp.core.json_render import render_json
+
+DETAIL = {
+    "path": "/SmAgents/web",
+    "data": {"Name": "web", "Desc": "#", "Tags": ["a", "b"], "AgentTypeLink": {"id": "t", "path": "/SmAgentTypes/x"}},
+    "responseType": "object",
+}
+PRUNED = {**DETAIL, "data": {k: v for k, v in DETAIL["data"].items() if v != "#"}}
+
+
+def test_matches_json_dumps_without_unset_values():
+    assert render_json(DETAIL) == json.dumps(PRUNED, indent=2, ensure_ascii=False)
+    assert render_json(DETAIL, indent=0) == json.dumps(PRUNED, separators=(",", ":"), ensure_ascii=False)
+
+
+def test_output_under_budget_keeps_key_order():
+    assert render_json(DETAIL, budget=10_000) == render_json(DETAIL)
+
+
+def test_output_over_budget_puts_scalars_first_and_summarizes():
+    big = {"data": {"Rules": [{"Name": f"rule-{i}", "Actions": ["GET"]} for i in range(200)]}, "path": "/SmDomains/d"}
+    text = render_json(big, budget=300)
+    assert text.index('"path"') < text.index('"data"')
+    assert "more items omitted" in text
+    assert len(text) < len(render_json(big)) // 10
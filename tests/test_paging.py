@@ -0,0 +1,76 @@
+import random
+
+import pytest
+
+from sm_mcp.tools.tooling import decode_cursor, encode_cursor, page_note, paginate, record_sort_key
+
+
+def link(name: str, obj_id: str) -> dict:
+    return {"id": obj_id, "path": f"/SmAgents/{name}"}
+
+
+def all_pages(records: list, limit: int) -> list[list]:
+    pages, cursor = [], ""
+    while True:
+        page, cursor, _ = paginate(records, limit, cursor)
+        pages.append(page)
+        if not cursor:
+            return pages
+
+
+@pytest.mark.parametrize("key", [("agent-1", "CA.SM::Agent@0e-1"), ("", ""), ("ünïcode ✓", "a/b+c=?")])
+def test_cursor_round_trip(key):
+    cursor = encode_cursor(key)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == key
+
+
+@pytest.mark.parametrize("cursor", ["not base64!", "bm90IGpzb24", encode_cursor(("a", "b"))[:-3], "WzEsIDJd"])
+def test_malformed_cursor_raises(cursor):
+    with pytest.raises(ValueError, match="malformed cursor"):
+        decode_cursor(cursor)
+
+
+def test_pages_are_name_ordered_and_complete():
+    records = [link(f"agent-{i}", f"id-{i}") for i in range(23)]
+    random.Random(3).shuffle(records)
+    pages = all_pages(records, 5)
+    assert [len(page) for page in pages] == [5, 5, 5, 5, 3]
+    flat = [record for page in pages for record in page]
+    assert flat == sorted(records, key=record_sort_key)
+
+
+def test_same_names_are_ordered_by_id():
+    records = [link("dup", "id-2"), link("dup", "id-1"), link("dup", "id-3")]
+    assert [r["id"] for page in all_pages(records, 1) for r in page] == ["id-1", "id-2", "id-3"]
+
+
+def test_cursor_survives_inserts_and_deletes():
+    records = [link(name, name) for name in ("a", "c", "e", "g")]
+    first, cursor, total = paginate(records, 2)
+    assert [r["id"] for r in first] == ["a", "c"] and total == 4
+    # "b" sorts before the cursor and "c" is gone: the next page is unaffected.
+    changed = [link(name, name) for name in ("a", "b", "e", "f", "g")]
+    second, cursor, total = paginate(changed, 2, cursor)
+    assert [r["id"] for r in second] == ["e", "f"] and total == 5
+    third, cursor, _ = paginate(changed, 2, cursor)
+    assert [r["id"] for r in third] == ["g"] and cursor is None
+
+
+def test_non_positive_limit_returns_everything_after_the_cursor():
+    records = [link(name, name) for name in ("b", "a", "c")]
+    page, cursor, total = paginate(records, 0)
+    assert [r["id"] for r in page] == ["a", "b", "c"] and cursor is None and total == 3
+
+
+def test_sort_key_is_case_insensitive_and_handles_plain_records():
+    assert record_sort_key(link("Zeta", "1")) > record_sort_key(link("alpha", "2"))
+    assert record_sort_key({"name": "Bob", "id": "9"}) == ("bob", "9")
+    assert record_sort_key("/SmAgents/Web+Agent") == ("web agent", "/SmAgents/Web+Agent")
+
+
+def test_page_note_mentions_the_next_cursor():
+    assert page_note("SmAgent", 5, 9, "abc") == (
+        'Showing 5 of 9 SmAgent objects (sorted by name). More results: call again with cursor="abc".'
+    )
+    assert "cursor" not in page_note("SmAgent", 9, 9, None)
@@ -0,0 +1,58 @@
+import asyncio
+
+from sm_mcp.api import replica
+from sm_mcp.api.replica import PolicyReplica, name_from_path, parent_path
+
+AGENTS = [{"id": "a1", "path": "/SmAgents/web+agent"}, {"id": "a2", "path": "/SmAgents/api"}]
+REALMS = [{"id": "r1", "path": "/SmDomains/d/SmRealms/login"}]
+
+
+def serve(monkeypatch, listings: dict, during_fetch=None):
+    async def fetch_objects(class_name, token=None, use_cache=True):
+        await asyncio.sleep(0)
+        if during_fetch is not None:
+            during_fetch(class_name)
+        result = listings[class_name]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    monkeypatch.setattr(replica, "fetch_objects", fetch_objects)
+
+
+def test_refresh_builds_the_indexes(monkeypatch):
+    serve(monkeypatch, {"SmAgent": AGENTS, "SmRealm": REALMS})
+    rep = PolicyReplica()
+    asyncio.run(rep.refresh(["SmAgent", "SmRealm"]))
+    assert rep.get("a1")["name"] == "web agent"
+    assert [r["id"] for r in rep.search("SmAgent", "Name = 'API'")] == ["a2"]
+    assert [r["id"] for r in rep.children("/SmDomains/d/")] == ["r1"]
+    assert len(rep.search("SmAgent", "")) == 2
+
+
+def test_write_during_refresh_keeps_the_class_dirty(monkeypatch):
+    rep = PolicyReplica()
+    rep.mark_dirty("SmAgent")
+    rep.mark_dirty("SmRealm")
+    # SmAgent is written again after its listing was read.
+    serve(monkeypatch, {"SmAgent": AGENTS, "SmRealm": REALMS},
+          during_fetch=lambda name: rep.mark_dirty(name) if name == "SmAgent" else None)
+    asyncio.run(rep.refresh(["SmAgent", "SmRealm"]))
+    assert set(rep.dirty) == {"SmAgent"}
+
+
+def test_failed_reload_keeps_the_class_dirty(monkeypatch):
+    rep = PolicyReplica()
+    serve(monkeypatch, {"SmAgent": AGENTS, "SmRealm": REALMS})
+    asyncio.run(rep.refresh(["SmAgent", "SmRealm"]))
+    rep.mark_dirty("SmAgent")
+    serve(monkeypatch, {"SmAgent": RuntimeError("503"), "SmRealm": REALMS})
+    asyncio.run(rep.refresh(["SmAgent", "SmRealm"]))
+    assert set(rep.dirty) == {"SmAgent"}
+    assert len(rep.list_objects("SmAgent")) == 2 and "SmAgent: 503" in rep.last_error
+
+
+def test_path_helpers():
+    assert name_from_path("/SmAgents/web%20agent+1") == "web agent 1"
+    assert parent_path("/SmDomains/d/SmRealms/r") == "/SmDomains/d"
+    assert parent_path("/SmDomains/d") is None
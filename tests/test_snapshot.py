@@ -0,0 +1,132 @@
+import asyncio
+
+from sm_mcp.api.snapshot import (
+    Snapshot,
+    SnapshotStore,
+    build_snapshot,
+    canonical_value,
+    content_hash,
+    diff_snapshots,
+    format_change,
+    snapshot_label,
+)
+
+
+def link(path: str, obj_id: str) -> dict:
+    return {"id": obj_id, "path": path, "href": f"https://sm.example/objects/{obj_id}"}
+
+
+def snapshot(label: str, objects: dict[str, tuple[str, dict]]) -> Snapshot:
+    return Snapshot(label, "default", {
+        path: {"class": cls, "id": path, "hash": content_hash(canonical_value(data)), "data": canonical_value(data)}
+        for path, (cls, data) in objects.items()
+    })
+
+
+STORE = {
+    "/SmAgents/web": ("SmAgent", {"Name": "web", "Desc": "#"}),
+    "/SmDomains/d": ("SmDomain", {"Name": "d", "IsAffiliate": False}),
+    "/SmDomains/d/SmRealms/r1": ("SmRealm", {"Name": "r1", "IdleTimeout": 600}),
+    "/SmDomains/d/SmRealms/r1/SmRules/get": ("SmRule", {"Name": "get", "Actions": ["GET"]}),
+    "/SmDomains/d/SmRealms/r2": ("SmRealm", {"Name": "r2", "IdleTimeout": 900}),
+}
+
+
+def test_canonical_value_drops_unset_and_reduces_links_to_sorted_paths():
+    data = {
+        "Name": "realm",
+        "Desc": "#",
+        "AgentLink": link("/SmAgents/web", "CA.SM::Agent@1"),
+        "Groups": [link("/SmAgentGroups/b", "g2"), link("/SmAgentGroups/a", "g1")],
+        "Actions": ["POST", "GET", "#"],
+        "Nested": {"Unset": "#none", "Kept": 0},
+    }
+    assert canonical_value(data) == {
+        "Name": "realm",
+        "AgentLink": "/SmAgents/web",
+        "Groups": ["/SmAgentGroups/a", "/SmAgentGroups/b"],
+        "Actions": ["POST", "GET"],
+        "Nested": {"Kept": 0},
+    }
+
+
+def test_content_hash_ignores_ids_and_key_order():
+    a = canonical_value({"Name": "x", "AgentLink": link("/SmAgents/web", "id-in-dev")})
+    b = canonical_value({"AgentLink": link("/SmAgents/web", "id-in-prod"), "Name": "x"})
+    assert content_hash(a) == content_hash(b)
+    assert content_hash(a) != content_hash({**a, "Name": "y"})
+
+
+def test_identical_snapshots_compare_nothing():
+    changes, stats = diff_snapshots(snapshot("a", STORE), snapshot("b", STORE))
+    assert changes == []
+    assert stats["identical"] and stats["compared"] == 0
+
+
+def test_diff_reports_changed_added_and_removed_subtrees():
+    after = dict(STORE)
+    after["/SmDomains/d/SmRealms/r1"] = ("SmRealm", {"Name": "r1", "IdleTimeout": 1200})
+    del after["/SmDomains/d/SmRealms/r2"]
+    after["/SmDomains/d/SmRealms/r3"] = ("SmRealm", {"Name": "r3"})
+    after["/SmDomains/d/SmRealms/r3/SmRules/all"] = ("SmRule", {"Name": "all"})
+
+    changes, stats = diff_snapshots(snapshot("a", STORE), snapshot("b", after))
+    assert [(c["op"], c["path"]) for c in changes] == [
+        ("~", "/SmDomains/d/SmRealms/r1"),
+        ("-", "/SmDomains/d/SmRealms/r2"),
+        ("+", "/SmDomains/d/SmRealms/r3"),
+    ]
+    assert changes[0]["attributes"] == ["IdleTimeout: 600 -> 1200"]
+    assert format_change(changes[2]) == "+ SmRealm /SmDomains/d/SmRealms/r3 (and 1 objects below)"
+    assert stats["changes"] == {"+": 1, "-": 1, "~": 1}
+    assert not stats["identical"]
+    # The unchanged SmAgent class and the unchanged rule below r1 are not visited.
+    assert stats["compared"] < len(STORE)
+
+
+def test_attribute_added_or_unset():
+    after = dict(STORE)
+    after["/SmAgents/web"] = ("SmAgent", {"Name": "web", "Desc": "frontend"})
+    changes, _ = diff_snapshots(snapshot("a", STORE), snapshot("b", after))
+    assert changes == [{"op": "~", "path": "/SmAgents/web", "class": "SmAgent",
+                        "attributes": ['Desc: (unset) -> "frontend"']}]
+
+
+def test_store_round_trip(tmp_path):
+    store = SnapshotStore(str(tmp_path), keep=1)
+    first, second = snapshot("first", STORE), snapshot("second", STORE)
+    store.save(first)
+    store.save(second)
+    assert store.labels() == ["first", "second"]
+    loaded = store.get("first")
+    assert loaded is not first and loaded.root == first.root
+    assert store.get("../first") is None
+
+
+def test_snapshot_label_is_file_safe():
+    assert snapshot_label(" prod/2024 01 ") == "prod-2024-01"
+    assert snapshot_label("").startswith("default-")
+
+
+def test_build_snapshot_against_fake(fake_siteminder):
+    from sm_mcp.api.siteminder_api import create_object, get_token
+
+    classes = ["SmDomain", "SmRealm", "SmAgent"]
+    existing = sum(len(fake_siteminder.by_class[c]) for c in classes)
+
+    async def run():
+        token = await get_token()
+        before = await build_snapshot(classes, "fake-before", token)
+        again = await build_snapshot(classes, "fake-again", token)
+        agent_type = fake_siteminder.by_class["SmAgentType"][0]
+        await create_object("SmAgents", {"Name": "snapshot-agent", "AgentTypeLink": {"id": agent_type.id},
+                                         "RealmHintAttrId": 0}, token)
+        after = await build_snapshot(classes, "fake-after", token)
+        return before, again, after
+
+    before, again, after = asyncio.run(run())
+    assert not before.stats["errors"]
+    assert len(before.objects) == existing and len(after.objects) == existing + 1
+    assert diff_snapshots(before, again)[1]["identical"]
+    changes, _ = diff_snapshots(before, after)
+    assert [(c["op"], c["path"]) for c in changes] == [("+", "/SmAgents/snapshot-agent")]